@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from main import (
+    _build_concurrency, _build_http_pool, _build_judge, _build_rate_limiter, _build_retry_policy, run_evaluation
+)
+from utils.utils.config_manager import ConfigManager
+from utils.utils.data_loader import DataLoader
+from utils.utils.logger import setup_logger
+from utils.utils.mock_llm_server import LatencyDistribution, MockLLMServer
+from utils.utils.telemetry import RunTelemetry
+from utils.utils.tracing import Tracer
+
+logger = setup_logger(__name__)
+
+def _load_test_rows(rows: int) -> List[Dict[str, str]]:
+    """Synthetic rows, all distinct so that neither dedupe nor the caches absorb any load."""
+    return [
+        {
+            "question": f"What is fact number {i}?",
+            "answer": f"Fact number {i} is that the sample value equals {i * 7}.",
+            "context": f"Record {i}: the sample value equals {i * 7}. It was measured on day {i % 365}."
+        }
+        for i in range(rows)
+    ]
+
+def _load_test_config(
+    base: Dict[str, Any],
+    server: MockLLMServer,
+    provider: str,
+    metrics: List[str],
+    qps: Optional[float],
+    in_flight: int,
+    work_dir: Path
+) -> Dict[str, Any]:
+    """Points the judge at the mock server and sizes the engine for the requested load."""
+    config = json.loads(json.dumps(base))
+    config["metrics"] = metrics
+    config["judge"] = {
+        **config.get("judge", {}),
+        "enabled": True,
+        "provider": provider,
+        "base_url": server.base_url(provider),
+        "metrics": metrics,
+        "semantic_cache": {"enabled": False},
+        "context_compression": {"enabled": False},
+    }
+    config.setdefault("api_keys", {})[provider] = "mock-key"
+    config["local_llm"] = {**config.get("local_llm", {}), "base_url": server.base_url("local")}
+    config["llm_router"] = {"enabled": False}
+    config["llm_cache"] = {"enabled": False}
+    config["cassette"] = {"mode": "off"}
+    config["dedupe"] = {"enabled": False}
+    config["evaluation"] = {**config.get("evaluation", {}), "parallel_processing": True, "max_workers": in_flight}
+    # Start the adaptive limiter at the target so it does not ramp up from a handful of requests.
+    concurrency = config.get("concurrency", {})
+    config["concurrency"] = {
+        **concurrency,
+        "initial_limit": in_flight,
+        "max_limit": max(concurrency.get("max_limit", 256), in_flight)
+    }
+    config["http_pool"] = {
+        **config.get("http_pool", {}),
+        "max_connections": in_flight,
+        "max_keepalive_connections": in_flight
+    }
+    # A one-second burst keeps the request rate steady instead of front-loading a minute of budget.
+    limits = {provider: {"requests_per_minute": qps * 60, "burst_seconds": 1.0}} if qps else {}
+    config["rate_limits"] = {"path": str(work_dir / "rate_limits.sqlite"), "providers": limits}
+    return config
+
+def _drive_async(config_path: str, data_path: str, output_dir: str, metrics: List[str], in_flight: int) -> None:
+    """
+    Judges every (row, metric) pair on one event loop with at most `in_flight`
+    requests outstanding, through the same HTTP pool, retry policy, concurrency
+    controller and rate limiter as `run_evaluation`, and writes their telemetry.
+    """
+    config_manager = ConfigManager(config_path)
+    rows = DataLoader.load_data(data_path)
+    telemetry = RunTelemetry.load(output_dir)
+    http_pool = _build_http_pool(config_manager)
+    retry_policy = _build_retry_policy(config_manager)
+    concurrency = _build_concurrency(config_manager, telemetry, Tracer(enabled=False))
+    rate_limiter = _build_rate_limiter(config_manager)
+    # The scorer is only used by the semantic cache and context compression, both off for the load test.
+    judge = _build_judge(
+        config_manager, None, http_pool=http_pool, retry_policy=retry_policy, concurrency=concurrency, rate_limiter=rate_limiter
+    )
+    failures = 0
+
+    async def judge_one(gate: asyncio.Semaphore, metric_name: str, row: Dict[str, Any]) -> None:
+        nonlocal failures
+        async with gate:
+            try:
+                await judge.evaluate_async(metric_name, row)
+            except Exception as e:
+                failures += 1
+                logger.debug(f"Load test call failed: {e}")
+
+    async def drive() -> None:
+        gate = asyncio.Semaphore(in_flight)
+        try:
+            await asyncio.gather(*(judge_one(gate, m, row) for row in rows for m in metrics))
+        finally:
+            if http_pool is not None:
+                await http_pool.aclose()
+
+    asyncio.run(drive())
+    if failures:
+        logger.warning(f"{failures} load test calls failed after retries.")
+    telemetry.set_section("retry", retry_policy.stats())
+    if concurrency is not None:
+        telemetry.set_section("concurrency", concurrency.stats())
+    if rate_limiter is not None:
+        telemetry.set_section("rate_limits", {"waited_seconds": round(rate_limiter.waited_seconds, 3)})
+    telemetry.save(output_dir)
+
+def run_load_test(
+    config_path: str,
+    output_dir: str,
+    rows: int = 2000,
+    qps: Optional[float] = None,
+    in_flight: int = 1024,
+    provider: str = "openai",
+    metrics: Optional[List[str]] = None,
+    latency: Optional[Dict[str, Any]] = None,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    retry_after: float = 1.0,
+    seed: Optional[int] = None,
+    driver: str = "async"
+) -> Dict[str, Any]:
+    """
+    Drives the judge against a local mock LLM server and reports how the
+    retry, rate-limit and concurrency layers behaved under the load.
+
+    The 'async' driver keeps `in_flight` judge calls outstanding on one event
+    loop; the 'threads' driver runs the full `run_evaluation` pipeline with
+    `in_flight` worker threads (and the judge's batching, if configured).
+    Without a `qps` limit the run fails if the server never saw `in_flight`
+    concurrent requests, since the numbers would then not describe that load.
+
+    Args:
+        config_path: Base configuration; the judge, caches and limits are overridden for the test.
+        output_dir: Directory for the evaluation report, run telemetry and 'load_test_report.json'.
+        rows: Number of synthetic (all distinct) rows to evaluate.
+        qps: Target requests per second, enforced through the shared rate limiter; None is unthrottled.
+        in_flight: Most requests in flight at once (async calls, or evaluation workers for 'threads').
+        provider: API the judge uses: 'openai', 'anthropic' or 'local'.
+        metrics: Judge metrics to run (default: faithfulness and answer_relevance).
+        latency: Mock server latency distribution (see LatencyDistribution).
+        error_rate: Share of requests the mock server fails with a 500.
+        rate_limit_rate: Share of requests the mock server rejects with a 429.
+        retry_after: Retry-After seconds sent with 429s.
+        seed: Seed for the mock server's latencies and injected failures.
+        driver: 'async' (one event loop) or 'threads' (`run_evaluation`).
+
+    Returns:
+        The load test report: mock server stats, the run's retry/concurrency/rate-limit
+        telemetry and the achieved throughput.
+
+    Raises:
+        ValueError: If `driver` is unknown.
+        RuntimeError: If an unthrottled run never reached `in_flight` concurrent requests.
+    """
+    if driver not in ("async", "threads"):
+        raise ValueError(f"Unknown load test driver '{driver}'; use 'async' or 'threads'.")
+    metrics = metrics or ["faithfulness", "answer_relevance"]
+    output = Path(output_dir)
+    work_dir = output / "load_test"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    data_path = work_dir / "data.json"
+    with data_path.open("w", encoding="utf-8") as f:
+        json.dump(_load_test_rows(rows), f)
+    # A previous run's telemetry would seed the concurrency limits (and be reported if this run failed).
+    telemetry_path = output / "run_telemetry.json"
+    telemetry_path.unlink(missing_ok=True)
+
+    server = MockLLMServer(
+        latency=LatencyDistribution.from_config(latency),
+        error_rate=error_rate,
+        rate_limit_rate=rate_limit_rate,
+        retry_after=retry_after,
+        seed=seed
+    )
+    with server:
+        config = _load_test_config(ConfigManager(config_path).config, server, provider, metrics, qps, in_flight, work_dir)
+        run_config_path = work_dir / "config.json"
+        with run_config_path.open("w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+        logger.info(
+            f"Load test: {rows} rows x {len(metrics)} metrics against {server.url} "
+            f"(qps={qps}, in_flight={in_flight}, driver={driver})"
+        )
+        if driver == "async":
+            _drive_async(str(run_config_path), str(data_path), output_dir, metrics, in_flight)
+        else:
+            run_evaluation(data_path=str(data_path), config_path=str(run_config_path), output_dir=output_dir)
+        server_stats = server.stats()
+
+    telemetry = json.loads(telemetry_path.read_text(encoding="utf-8")) if telemetry_path.is_file() else {}
+    # The most requests that could have been in flight at once: the target, or fewer if the run made fewer calls.
+    target_in_flight = min(in_flight, server_stats["requests"])
+    report = {
+        "target": {"rows": rows, "metrics": metrics, "qps": qps, "in_flight": in_flight, "provider": provider,
+                   "error_rate": error_rate, "rate_limit_rate": rate_limit_rate, "driver": driver},
+        "in_flight_reached": server_stats["peak_in_flight"] >= target_in_flight,
+        "server": server_stats,
+        "retry": telemetry.get("retry"),
+        "concurrency": telemetry.get("concurrency"),
+        "rate_limits": telemetry.get("rate_limits"),
+    }
+    with (output / "load_test_report.json").open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(
+        f"Load test finished: {server_stats['requests']} requests at {server_stats['qps']} QPS, "
+        f"peak {server_stats['peak_in_flight']} in flight, {server_stats['rate_limited']} rate limited, "
+        f"{server_stats['errors']} server errors."
+    )
+    if qps is None and not report["in_flight_reached"]:
+        raise RuntimeError(
+            f"Load test peaked at {server_stats['peak_in_flight']} requests in flight, below the target of "
+            f"{target_in_flight}; the throughput and latency figures do not describe that load."
+        )
+    return report
+
+def main_cli():
+    """Command-line entry point for load-testing the evaluation engine against a mock LLM server."""
+    parser = argparse.ArgumentParser(
+        description="Load-test the RAG-LLM evaluation engine against a local mock LLM server.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--config_path", type=str, default="config.json", help="Base configuration JSON file.")
+    parser.add_argument("--output_dir", type=str, default="reports/load_test", help="Directory for reports and telemetry.")
+    parser.add_argument("--rows", type=int, default=2000, help="Number of synthetic rows to evaluate.")
+    parser.add_argument("--qps", type=float, help="Target requests per second (unthrottled if omitted).")
+    parser.add_argument("--in_flight", type=int, default=1024, help="Maximum concurrent requests.")
+    parser.add_argument("--provider", choices=["openai", "anthropic", "local"], default="openai", help="API the judge speaks.")
+    parser.add_argument("--metrics", nargs="+", help="Judge metrics to run.")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal",
+                        help="Mock server latency distribution.")
+    parser.add_argument("--latency_median", type=float, default=0.2, help="Median (or fixed) latency in seconds.")
+    parser.add_argument("--latency_sigma", type=float, default=0.5, help="Log-space spread of the lognormal latency.")
+    parser.add_argument("--latency_low", type=float, default=0.0, help="Lower bound of the uniform latency.")
+    parser.add_argument("--latency_high", type=float, default=0.5, help="Upper bound of the uniform latency.")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Share of requests failed with a 500.")
+    parser.add_argument("--rate_limit_rate", type=float, default=0.0, help="Share of requests rejected with a 429.")
+    parser.add_argument("--retry_after", type=float, default=1.0, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--seed", type=int, help="Seed for latencies and injected failures.")
+    parser.add_argument("--driver", choices=["async", "threads"], default="async",
+                        help="Drive judge calls on one event loop, or through run_evaluation with worker threads.")
+    args = parser.parse_args()
+
+    report = run_load_test(
+        config_path=args.config_path,
+        output_dir=args.output_dir,
+        rows=args.rows,
+        qps=args.qps,
+        in_flight=args.in_flight,
+        provider=args.provider,
+        metrics=args.metrics,
+        latency={
+            "kind": args.latency,
+            "median": args.latency_median,
+            "sigma": args.latency_sigma,
+            "low": args.latency_low,
+            "high": args.latency_high
+        },
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        driver=args.driver
+    )
+    print(json.dumps(report["server"], indent=2))
+
+if __name__ == "__main__":
+    main_cli()
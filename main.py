@@ -1,4 +1,6 @@
 import os
+import uuid
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 from utils.utils.config_manager import ConfigManager
 from utils.utils.data_loader import DataLoader
@@ -6,17 +8,357 @@ from utils.utils.scorer import Scorer
 from utils.utils.metrics_manager import MetricsManager
 from utils.utils.reporter import Reporter
 from utils.utils.logger import setup_logger
+from utils.utils.profiler import StageProfiler
+from utils.utils.tracing import Tracer
+from utils.utils.llm_wrapper import LLMWrapper
+from utils.utils.llm_router import LLMBackend, LLMRouter
+from utils.utils.http_pool import HTTPClientPool
+from utils.utils.retry import CircuitBreaker, RetryBudget, RetryPolicy
+from utils.utils.concurrency import ConcurrencyController
+from utils.utils.rate_limiter import SharedRateLimiter
+from utils.utils.hedging import HedgingPolicy
+from utils.utils.llm_cache import ResponseCache
+from utils.utils.semantic_cache import SemanticVerdictCache
+from utils.utils.context_compression import ContextCompressor
+from utils.utils.self_consistency import SelfConsistency
+from utils.utils.judge import LLMJudge
+from utils.utils.dedupe import deduplicate_rows, expand_results
+from utils.utils.telemetry import RunTelemetry
+from utils.utils.usage import UsageTracker
+from utils.utils.cassette import Cassette
+from utils.utils.batch_judge import AnthropicBatchClient, BatchJudgeRunner, LocalBatchClient, OpenAIBatchClient
 
 # Setup a logger for the main application
 logger = setup_logger(__name__)
 
+def _build_llm_cache(config_manager: ConfigManager, mode: Optional[str] = None) -> Optional[ResponseCache]:
+    """
+    Creates the persistent LLM response cache from the 'llm_cache' config section.
+    `mode` ('read_write', 'read_only' or 'off') overrides the configured behaviour.
+    """
+    cache_config = config_manager.get_llm_cache_config()
+    if mode == "off" or (mode is None and not cache_config.get("enabled", True)):
+        return None
+    read_only = mode == "read_only" if mode else cache_config.get("read_only", False)
+    return ResponseCache(
+        path=cache_config.get("path", ".cache/llm_responses.sqlite"),
+        ttl_seconds=cache_config.get("ttl_seconds", 30 * 24 * 3600),
+        max_entries=cache_config.get("max_entries", 100_000),
+        max_bytes=cache_config.get("max_bytes", 1024 ** 3),
+        read_only=read_only
+    )
+
+def _build_http_pool(config_manager: ConfigManager) -> HTTPClientPool:
+    """Creates the run's shared keep-alive connection pool from the 'http_pool' config section."""
+    pool_config = config_manager.get_http_pool_config()
+    return HTTPClientPool(
+        max_connections=pool_config.get("max_connections", 100),
+        max_keepalive_connections=pool_config.get("max_keepalive_connections", 20),
+        keepalive_expiry=pool_config.get("keepalive_expiry", 30.0),
+        timeout=pool_config.get("timeout", 60.0)
+    )
+
+def _build_retry_policy(config_manager: ConfigManager) -> RetryPolicy:
+    """
+    Creates the run's retry policy from the 'retry' config section. The retry
+    budget and the per-provider circuit breakers are shared by all LLM calls.
+    """
+    retry_config = config_manager.get_retry_config()
+    budget_config = retry_config.get("budget", {})
+    breaker_config = retry_config.get("circuit_breaker", {})
+    budget = None
+    if budget_config.get("enabled", True):
+        budget = RetryBudget(ratio=budget_config.get("ratio", 0.2), min_retries=budget_config.get("min_retries", 10))
+    breaker_factory = None
+    if breaker_config.get("enabled", True):
+        breaker_factory = lambda: CircuitBreaker(
+            failure_threshold=breaker_config.get("failure_threshold", 0.5),
+            window=breaker_config.get("window", 20),
+            min_calls=breaker_config.get("min_calls", 10),
+            cooldown=breaker_config.get("cooldown_seconds", 30.0)
+        )
+    return RetryPolicy(
+        max_retries=retry_config.get("max_retries", 5),
+        initial_delay=retry_config.get("initial_delay", 1.0),
+        max_delay=retry_config.get("max_delay", 60.0),
+        budget=budget,
+        breaker_factory=breaker_factory
+    )
+
+def _build_concurrency(
+    config_manager: ConfigManager,
+    telemetry: RunTelemetry,
+    tracer: Tracer
+) -> Optional[ConcurrencyController]:
+    """
+    Creates the adaptive (AIMD) concurrency controller from the 'concurrency'
+    config section, seeded with the limits the previous run converged to.
+    """
+    concurrency_config = config_manager.get_concurrency_config()
+    if not concurrency_config.get("enabled", True):
+        return None
+    return ConcurrencyController(
+        initial_limit=concurrency_config.get("initial_limit", 8),
+        min_limit=concurrency_config.get("min_limit", 1),
+        max_limit=concurrency_config.get("max_limit", 256),
+        decrease_factor=concurrency_config.get("decrease_factor", 0.5),
+        cooldown=concurrency_config.get("cooldown_seconds", 1.0),
+        previous_limits=telemetry.previous_section("concurrency"),
+        tracer=tracer
+    )
+
+def _build_rate_limiter(config_manager: ConfigManager) -> Optional[SharedRateLimiter]:
+    """
+    Creates the host-wide rate limiter from the 'rate_limits' config section, or
+    None if no provider has limits. All processes using the same path share the budget.
+    """
+    rate_config = config_manager.get_rate_limits_config()
+    if not rate_config.get("providers"):
+        return None
+    return SharedRateLimiter(
+        limits=rate_config["providers"],
+        path=rate_config.get("path", ".cache/rate_limits.sqlite")
+    )
+
+def _build_hedging(config_manager: ConfigManager) -> Optional[HedgingPolicy]:
+    """Creates the request hedging policy from the 'hedging' config section, or None if disabled."""
+    hedging_config = config_manager.get_hedging_config()
+    if not hedging_config.get("enabled", False):
+        return None
+    return HedgingPolicy(
+        percentile=hedging_config.get("percentile", 0.95),
+        max_hedge_ratio=hedging_config.get("max_hedge_ratio", 0.05),
+        min_samples=hedging_config.get("min_samples", 20)
+    )
+
+def _build_cassette(config_manager: ConfigManager, mode: Optional[str] = None) -> Optional[Cassette]:
+    """
+    Creates the LLM record/replay cassette from the 'cassette' config section.
+    `mode` ('record', 'replay' or 'off') overrides the configured mode.
+    """
+    cassette_config = config_manager.get_cassette_config()
+    mode = mode or cassette_config.get("mode", "off")
+    if mode == "off":
+        return None
+    return Cassette(
+        path=cassette_config.get("path", "cassettes/run.jsonl.gz"),
+        mode=mode,
+        simulate_latency=cassette_config.get("simulate_latency"),
+        latency_scale=cassette_config.get("latency_scale", 1.0),
+        seed=cassette_config.get("seed"),
+        append=cassette_config.get("append", False)
+    )
+
+def _build_batch_runner(
+    config_manager: ConfigManager,
+    judge: Optional[LLMJudge],
+    usage: Optional[UsageTracker] = None,
+    enabled: Optional[bool] = None
+) -> Optional[BatchJudgeRunner]:
+    """
+    Creates the provider batch-API runner from the 'judge.batch_api' config
+    section, or None if it is disabled. `enabled` overrides the configured
+    switch. The local provider runs the batch through the local model server.
+    A routed judge is judged online: one batch job goes to a single provider,
+    which would drop the router's failover and weighting.
+    """
+    batch_config = config_manager.get_judge_config().get("batch_api", {})
+    if judge is None or not (batch_config.get("enabled", False) if enabled is None else enabled):
+        return None
+    if isinstance(judge.llm, LLMRouter):
+        logger.warning(
+            "The batch API is not supported with the LLM router (a batch job goes to one provider, without failover "
+            "or weighting); judging online."
+        )
+        return None
+    if judge.self_consistency is not None:
+        # Identical calls are submitted once, so every sample would get the same response.
+        logger.warning("Self-consistency sampling is not supported with the batch API; judging with one sample per verdict.")
+        judge.self_consistency = None
+    llm = judge.llm
+    if llm.provider == "openai":
+        client = OpenAIBatchClient(llm.client, completion_window=batch_config.get("completion_window", "24h"))
+    elif llm.provider == "anthropic":
+        client = AnthropicBatchClient(llm.client)
+    else:
+        client = LocalBatchClient(llm)
+    timeout_hours = batch_config.get("timeout_hours", 24)
+    return BatchJudgeRunner(
+        client,
+        work_dir=batch_config.get("work_dir", "batches"),
+        poll_interval=batch_config.get("poll_interval", 60),
+        timeout=None if timeout_hours is None else timeout_hours * 3600.0,
+        online_fallback=batch_config.get("online_fallback", True),
+        usage=usage,
+        discount=batch_config.get("discount", 0.5)
+    )
+
+def _build_usage(config_manager: ConfigManager) -> Optional[UsageTracker]:
+    """Creates the LLM usage tracker from the 'usage' config section, or None if disabled."""
+    usage_config = config_manager.get_usage_config()
+    if not usage_config.get("enabled", False):
+        return None
+    return UsageTracker(pricing=usage_config.get("pricing"))
+
+def _save_usage(
+    usage: UsageTracker,
+    config_manager: ConfigManager,
+    results: List[List[Any]],
+    row_index: List[int],
+    telemetry: RunTelemetry,
+    output_dir: str,
+    dataset_name: str
+) -> None:
+    """
+    Attaches per-(row, metric) usage to the judge results of every original
+    row and writes the usage report, telemetry and DB rows. Calls are charged to
+    the first row of each duplicate set; later duplicates show zero usage.
+    """
+    per_task = usage.per_task(row_index)
+    for row, row_results in enumerate(results):
+        for result in row_results:
+            if isinstance(result.details, dict) and (row, result.metric_name) in per_task:
+                result.details["llm_usage"] = per_task[(row, result.metric_name)]
+    summary = usage.summary()
+    telemetry.set_section("usage", {"totals": summary["totals"], "by_metric": summary["by_metric"]})
+    usage.save(output_dir)
+    db_path = config_manager.get_usage_config().get("db_path") or os.getenv("DB_PATH", "data/results.db")
+    try:
+        usage.save_to_db(
+            db_path, run_id=uuid.uuid4().hex, model_name=config_manager.get_model_name(), dataset_name=dataset_name,
+            row_index=row_index
+        )
+    except Exception as e:
+        logger.error(f"Could not write LLM usage to '{db_path}': {e}")
+
+def _build_judge(
+    config_manager: ConfigManager,
+    scorer: Scorer,
+    llm_cache_mode: Optional[str] = None,
+    http_pool: Optional[HTTPClientPool] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency: Optional[ConcurrencyController] = None,
+    rate_limiter: Optional[SharedRateLimiter] = None,
+    hedging: Optional[HedgingPolicy] = None,
+    usage: Optional[UsageTracker] = None,
+    cassette: Optional[Cassette] = None
+) -> Optional[LLMJudge]:
+    """Creates the LLM judge from the 'judge' config section, or None if it is disabled."""
+    judge_config = config_manager.get_judge_config()
+    if not judge_config.get("enabled", False):
+        return None
+    semantic_config = judge_config.get("semantic_cache", {})
+    semantic_cache = None
+    if semantic_config.get("enabled", False):
+        semantic_cache = SemanticVerdictCache(
+            embed_fn=scorer.embed,
+            threshold=semantic_config.get("threshold", 0.97),
+            max_entries=semantic_config.get("max_entries", 50_000)
+        )
+    compression_config = judge_config.get("context_compression", {})
+    compressor = None
+    if compression_config.get("enabled", False):
+        compressor = ContextCompressor(
+            embed_many=scorer.embed_many,
+            budgets=compression_config.get("budgets"),
+            default_budget=compression_config.get("default_budget")
+        )
+    consistency_config = judge_config.get("self_consistency", {})
+    self_consistency = None
+    if consistency_config.get("enabled", False):
+        self_consistency = SelfConsistency(
+            max_samples=consistency_config.get("max_samples", 5),
+            min_samples=consistency_config.get("min_samples", 2),
+            tolerance=consistency_config.get("tolerance", 0.1),
+            confidence=consistency_config.get("confidence", 0.95),
+            temperature=consistency_config.get("temperature", 0.7),
+            concurrency=consistency_config.get("concurrency", 1),
+            thresholds=consistency_config.get("thresholds")
+        )
+    cache = _build_llm_cache(config_manager, llm_cache_mode)
+
+    def make_llm(
+        provider: str,
+        api_key: Optional[str],
+        settings: Dict[str, Any],
+        name: Optional[str] = None,
+        policy: Optional[RetryPolicy] = None
+    ) -> LLMWrapper:
+        if provider == "local":
+            settings = {**config_manager.get_local_llm_config(), **settings}
+        return LLMWrapper(
+            provider,
+            api_key=api_key,
+            cache=cache,
+            http_pool=http_pool,
+            retry_policy=policy or retry_policy,
+            concurrency=concurrency,
+            rate_limiter=rate_limiter,
+            hedging=hedging,
+            base_url=settings.get("base_url"),
+            local_api_style=settings.get("api_style", "ollama"),
+            name=name,
+            usage=usage,
+            cassette=cassette
+        )
+
+    router_config = config_manager.get_llm_router_config()
+    if router_config.get("enabled", False):
+        # The router owns failover and backend health: backends only retry connection failures
+        # in place, and each backend's circuit breaker is the router's (built from the retry config).
+        retry_policy = retry_policy or RetryPolicy()
+        routed_policy = retry_policy.for_routed_backend()
+        breaker_factory = retry_policy.breaker_factory or CircuitBreaker
+        llm = LLMRouter([
+            LLMBackend(
+                name=backend.get("name", backend["provider"]),
+                llm=make_llm(
+                    backend["provider"],
+                    backend.get("api_key")
+                    or (os.getenv(backend["api_key_env"]) if backend.get("api_key_env") else None)
+                    or config_manager.get_api_key(backend["provider"]),
+                    backend,
+                    name=backend.get("name", backend["provider"]),
+                    policy=routed_policy
+                ),
+                weight=backend.get("weight", 1.0),
+                model=backend.get("model"),
+                breaker=breaker_factory()
+            )
+            for backend in router_config.get("backends", [])
+        ], smoothing=router_config.get("smoothing", 0.2))
+    else:
+        provider = judge_config.get("provider", config_manager.get_llm_provider())
+        settings = {"base_url": judge_config["base_url"]} if judge_config.get("base_url") else {}
+        llm = make_llm(provider, config_manager.get_api_key(provider), settings)
+    return LLMJudge(
+        llm,
+        model=judge_config.get("model", config_manager.get_model_name()),
+        metrics=judge_config.get("metrics"),
+        batch_size=judge_config.get("batch_size", 1),
+        completion_kwargs=judge_config.get("completion_kwargs"),
+        groups=judge_config.get("groups"),
+        semantic_cache=semantic_cache,
+        stream=judge_config.get("stream", False),
+        score_first=judge_config.get("score_first", False),
+        compressor=compressor,
+        prompt_caching=judge_config.get("prompt_caching", False),
+        self_consistency=self_consistency
+    )
+
 def run_evaluation(
     data_path: str,
     config_path: str,
     output_dir: str,
     model_name: Optional[str] = None,
     metrics: Optional[List[str]] = None,
-    report_formats: Optional[List[str]] = None
+    report_formats: Optional[List[str]] = None,
+    profile: bool = False,
+    profile_memory: bool = False,
+    trace_path: Optional[str] = None,
+    llm_cache_mode: Optional[str] = None,
+    cassette_mode: Optional[str] = None,
+    batch_api: Optional[bool] = None
 ):
     """
     The main function to run a comprehensive RAG-LLM evaluation.
@@ -35,7 +377,25 @@ def run_evaluation(
         model_name: (Optional) Override the model name from the config file.
         metrics: (Optional) Override the list of metrics from the config file.
         report_formats: (Optional) Override the report formats from the config file.
+        profile: (Optional) Run under a profiler and write a per-stage breakdown
+            to 'profile_report.json' in the output directory.
+        profile_memory: (Optional) Also take tracemalloc snapshots at stage boundaries.
+        trace_path: (Optional) Write a Chrome trace-event JSON file with one span
+            per row and per metric call to this path.
+        llm_cache_mode: (Optional) Override the LLM response cache behaviour:
+            'read_write', 'read_only' (e.g. for CI) or 'off'.
+        cassette_mode: (Optional) Override the LLM cassette mode: 'record' writes
+            every LLM call to the cassette file, 'replay' serves calls from it
+            without network access, 'off' disables it.
+        batch_api: (Optional) Override 'judge.batch_api.enabled': send all judge
+            calls as one provider batch job and wait for it.
     """
+    profiler = StageProfiler(enabled=profile or profile_memory, trace_memory=profile_memory)
+    tracer = Tracer(enabled=trace_path is not None)
+    http_pool = None
+    judge = None
+    cassette = None
+    profiler.start()
     try:
         # 1. Load Configuration
         logger.info(f"Loading configuration from: {config_path}")
@@ -51,47 +411,118 @@ def run_evaluation(
 
         # 2. Load Data
         logger.info(f"Loading data from: {data_path}")
-        dataset = DataLoader.load_data(data_path)
+        with profiler.stage("data_load"):
+            dataset = DataLoader.load_data(data_path)
 
         # 3. Initialize Components
-        scorer = Scorer()
-        metrics_manager = MetricsManager(scorer, config_manager)
-        reporter = Reporter(output_dir=output_dir)
+        with profiler.stage("model_init"):
+            scorer = Scorer()
+            # One pooled HTTP client per provider, shared by every LLM call of this run.
+            http_pool = _build_http_pool(config_manager)
+            retry_policy = _build_retry_policy(config_manager)
+            # Metric costs learned in previous runs drive longest-first scheduling.
+            telemetry = RunTelemetry.load(output_dir)
+            concurrency = _build_concurrency(config_manager, telemetry, tracer)
+            rate_limiter = _build_rate_limiter(config_manager)
+            hedging = _build_hedging(config_manager)
+            usage = _build_usage(config_manager)
+            cassette = _build_cassette(config_manager, cassette_mode)
+            judge = _build_judge(
+                config_manager, scorer, llm_cache_mode, http_pool, retry_policy, concurrency, rate_limiter, hedging, usage,
+                cassette
+            )
+            metrics_manager = MetricsManager(
+                scorer, config_manager, profiler=profiler, tracer=tracer, judge=judge, cost_model=telemetry.cost_model
+            )
+            batch_runner = _build_batch_runner(config_manager, judge, usage, batch_api)
+            reporter = Reporter(output_dir=output_dir)
 
         # 4. Run Evaluation
         logger.info(f"Starting evaluation for {len(dataset)} data points...")
-        all_results = []
+        data_points = []
         for i, data_point in enumerate(dataset):
-            logger.info(f"Evaluating data point {i+1}/{len(dataset)}")
             # This is a placeholder for the logic that would get the 'answer'
             # from an LLM call using the 'question' and 'context'.
             # For this refactoring, we assume 'answer' is already in the dataset.
             if "answer" not in data_point:
                 logger.warning(f"Data point {i+1} is missing an 'answer' and will be skipped.")
                 continue
+            data_points.append(data_point)
+
+        # Score each unique (question, answer, context) once and expand back to all rows.
+        dedupe_config = config_manager.get_dedupe_config()
+        if dedupe_config.get("enabled", True):
+            with profiler.stage("dedupe"):
+                unique_points, row_index = deduplicate_rows(data_points, fields=dedupe_config.get("fields"))
+            logger.info(f"Deduplicated {len(data_points)} data points to {len(unique_points)} unique rows.")
+        else:
+            unique_points, row_index = data_points, list(range(len(data_points)))
 
-            results = metrics_manager.evaluate_metrics(data_point)
+        if batch_runner is not None:
+            unique_results = batch_runner.run(metrics_manager, judge, unique_points)
+            telemetry.set_section("batch_api", batch_runner.stats)
+        else:
+            unique_results = metrics_manager.evaluate_dataset(unique_points)
+        expanded_results = expand_results(unique_results, row_index)
+        if usage is not None:
+            _save_usage(usage, config_manager, expanded_results, row_index, telemetry, output_dir, Path(data_path).stem)
+        all_results = []
+        for results in expanded_results:
             all_results.extend(results)
 
+        if judge is not None and judge.semantic_cache is not None:
+            telemetry.set_section("semantic_cache", {
+                "hits": judge.semantic_cache.hits,
+                "misses": judge.semantic_cache.misses,
+                "threshold": judge.semantic_cache.threshold
+            })
+        if judge is not None and judge.compressor is not None:
+            telemetry.set_section("context_compression", judge.compressor.stats())
+        if judge is not None and judge.self_consistency is not None:
+            telemetry.set_section("self_consistency", judge.self_consistency.stats())
+        if judge is not None and isinstance(judge.llm, LLMRouter):
+            telemetry.set_section("llm_router", judge.llm.stats())
+        telemetry.set_section("retry", retry_policy.stats())
+        if concurrency is not None:
+            telemetry.set_section("concurrency", concurrency.stats())
+        if rate_limiter is not None:
+            telemetry.set_section("rate_limits", {"waited_seconds": round(rate_limiter.waited_seconds, 3)})
+        if hedging is not None:
+            telemetry.set_section("hedging", hedging.stats())
+        if cassette is not None:
+            telemetry.set_section("cassette", cassette.stats())
+        telemetry.save(output_dir)
+
         # 5. Generate Report
         logger.info("Evaluation complete. Generating report...")
-        final_report_data = [
-            {
-                "metric": res.__class__.__name__,  # Or however you define metric name
-                "score": res.score,
-                "details": res.details
-            } for res in all_results
-        ]
-        reporter.generate_report(
-            final_report_data,
-            report_formats=config_manager.get_reporter_config().get("report_formats", ["json", "html"])
-        )
+        with profiler.stage("reporting"):
+            final_report_data = [
+                {
+                    "metric": res.metric_name or res.__class__.__name__,
+                    "score": res.score,
+                    "details": res.details
+                } for res in all_results
+            ]
+            reporter.generate_report(
+                final_report_data,
+                report_formats=config_manager.get_reporter_config().get("report_formats", ["json", "html"])
+            )
         logger.info(f"Report generated successfully in '{output_dir}' directory.")
 
     except (FileNotFoundError, ValueError) as e:
         logger.error(f"A configuration or data file error occurred: {e}")
     except Exception as e:
         logger.error(f"An unexpected error occurred during evaluation: {e}", exc_info=True)
+    finally:
+        if judge is not None:
+            judge.llm.close()
+        if http_pool is not None:
+            http_pool.close()
+        if cassette is not None:
+            cassette.close()
+        profiler.write_report(output_dir)
+        if trace_path:
+            tracer.export_chrome_trace(trace_path)
 
 if __name__ == '__main__':
     # This block allows running main.py directly for default evaluation
@@ -15,7 +15,7 @@ def main_cli():
         "--data_path",
         type=str,
         required=True,
-        help="Path to the evaluation data file (CSV or JSON)."
+        help="Path to the evaluation data file (CSV, JSON or JSONL/NDJSON)."
     )
 
     parser.add_argument(
@@ -52,6 +52,43 @@ def main_cli():
         help="A space-separated list of report formats to generate."
     )
 
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run under a profiler and write a per-stage breakdown to profile_report.json in the output directory."
+    )
+
+    parser.add_argument(
+        "--profile_memory",
+        action="store_true",
+        help="With profiling, also take tracemalloc memory snapshots at stage boundaries (implies --profile)."
+    )
+
+    parser.add_argument(
+        "--trace_path",
+        type=str,
+        help="Write a Chrome trace-event JSON file (one span per row and metric call) to this path."
+    )
+
+    parser.add_argument(
+        "--llm_cache",
+        choices=["read_write", "read_only", "off"],
+        help="Override the persistent LLM response cache mode (read_only is intended for CI)."
+    )
+
+    parser.add_argument(
+        "--cassette",
+        choices=["record", "replay", "off"],
+        help="Record LLM traffic to the configured cassette file, or replay it without network access."
+    )
+
+    parser.add_argument(
+        "--batch_api",
+        action="store_true",
+        default=None,
+        help="Send all judge calls as one provider batch job (about half price) and wait for it to finish."
+    )
+
     args = parser.parse_args()
 
     # Call the main evaluation function with the parsed arguments
@@ -61,7 +98,13 @@ def main_cli():
         output_dir=args.output_dir,
         model_name=args.model_name,
         metrics=args.metrics,
-        report_formats=args.report_formats
+        report_formats=args.report_formats,
+        profile=args.profile,
+        profile_memory=args.profile_memory,
+        trace_path=args.trace_path,
+        llm_cache_mode=args.llm_cache,
+        cassette_mode=args.cassette,
+        batch_api=args.batch_api
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+import json
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+from utils.utils.batch_judge import (
+    AnthropicBatchClient, BatchJobError, BatchJudgeRunner, BatchRequest, LocalBatchClient, OpenAIBatchClient
+)
+from utils.utils.config_manager import ConfigManager
+from utils.utils.judge import LLMJudge
+from utils.utils.metrics_manager import MetricsManager
+from utils.utils.mock_llm_server import mock_verdict
+from utils.utils.response_parser import ParsedResponse
+from utils.utils.tracing import Tracer
+from utils.utils.usage import UsageTracker
+
+class VerdictLLM:
+    """Answers every judge prompt with a well-formed verdict and counts the calls."""
+    provider = "openai"
+
+    def __init__(self, score: float = 0.7):
+        self.score = score
+        self.prompts: List[str] = []
+
+    def get_parsed_completion(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        self.prompts.append(prompt)
+        usage = {"prompt_tokens": 1000, "completion_tokens": 100}
+        return ParsedResponse(mock_verdict(prompt, self.score), None, {"usage": usage}, "openai", model)
+
+class DroppingBatchClient(LocalBatchClient):
+    """A local batch job that loses its first response."""
+
+    def results(self, batch_id: str) -> Dict[str, ParsedResponse]:
+        responses = dict(super().results(batch_id))
+        responses.pop(next(iter(responses)))
+        return responses
+
+@pytest.fixture
+def rows() -> List[Dict[str, Any]]:
+    return [{"question": f"Q{i}", "answer": f"Answer {i}", "context": f"Context {i}"} for i in range(5)]
+
+def make_manager(tmp_path: Path, llm: Any) -> MetricsManager:
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({
+        "metrics": ["faithfulness", "hallucination", "answer_relevance"], "evaluation": {"parallel_processing": True, "max_workers": 4}
+    }))
+    judge = LLMJudge(llm, model="judge-model", metrics=["faithfulness", "hallucination", "answer_relevance"],
+                     batch_size=5, groups={"grounding": ["faithfulness", "hallucination"]})
+    return MetricsManager(None, ConfigManager(str(config_path)), judge=judge)
+
+def test_batch_run_matches_an_online_run(tmp_path: Path, rows: List[Dict[str, Any]]):
+    """Tests that all judge calls go through one batch job and are parsed into per-row results."""
+    online = make_manager(tmp_path, VerdictLLM()).evaluate_dataset(rows)
+    live, batch = VerdictLLM(score=0.1), VerdictLLM()
+    manager = make_manager(tmp_path, live)
+    usage = UsageTracker({"judge-model": {"input_per_million": 1.0, "output_per_million": 10.0}})
+    runner = BatchJudgeRunner(LocalBatchClient(batch), work_dir=str(tmp_path / "batches"), usage=usage, discount=0.5)
+    results = runner.run(manager, manager.judge, rows)
+
+    assert [[(r.metric_name, r.score) for r in row] for row in results] == \
+        [[(r.metric_name, r.score) for r in row] for row in online]
+    # One group call per row plus one cross-row batch for answer_relevance.
+    assert len(batch.prompts) == 6 and live.prompts == []
+    assert runner.stats == {"batch_id": runner.stats["batch_id"], "requests": 6, "responses": 6, "fallback_calls": 0}
+    lines = (tmp_path / "batches" / "batch_requests.jsonl").read_text().splitlines()
+    assert len(lines) == 6 and json.loads(lines[0])["params"]["temperature"] == 0
+    assert usage.summary()["totals"]["cost"] == pytest.approx(6 * 0.002 * 0.5)
+    assert manager.judge.llm is live
+
+@pytest.mark.parametrize("score_first", [False, True])
+def test_collection_pass_is_not_traced_or_costed(tmp_path: Path, rows: List[Dict[str, Any]], score_first: bool):
+    """Tests that collecting with placeholder verdicts leaves traces and learned task costs untouched."""
+    manager = make_manager(tmp_path, VerdictLLM())
+    manager.judge.score_first = score_first
+    manager.tracer = Tracer(enabled=True)
+    costs = manager.cost_model.to_dict()
+    runner = BatchJudgeRunner(LocalBatchClient(VerdictLLM()), work_dir=str(tmp_path / "batches"))
+    requests = runner.collect(manager, manager.judge, rows)
+
+    assert len(requests) == 6
+    assert manager.tracer.events == [] and manager.cost_model.to_dict() == costs
+    assert manager.judge.llm.prompts == []
+
+def test_missing_responses_fall_back_to_online_calls(tmp_path: Path, rows: List[Dict[str, Any]]):
+    """Tests the online fallback for calls the batch did not answer, and failing without it."""
+    live = VerdictLLM(score=0.3)
+    manager = make_manager(tmp_path, live)
+    runner = BatchJudgeRunner(DroppingBatchClient(VerdictLLM()), work_dir=str(tmp_path / "a"))
+    results = runner.run(manager, manager.judge, rows)
+    assert runner.stats["fallback_calls"] == 1 and len(live.prompts) == 1
+    assert sum(r.score == 0.3 for row in results for r in row) in (2, 5)
+
+    strict = BatchJudgeRunner(DroppingBatchClient(VerdictLLM()), work_dir=str(tmp_path / "b"), online_fallback=False)
+    results = strict.run(manager, manager.judge, rows)
+    assert sum(len(row) for row in results) < 15
+
+def test_openai_client_submits_polls_and_resumes(tmp_path: Path):
+    """Tests the OpenAI batch file format, polling until completion and resuming a submitted job."""
+    output = json.dumps({"custom_id": "k1", "response": {"status_code": 200, "body": {
+        "id": "c", "object": "chat.completion", "created": 0, "model": "judge-model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": '{"score": 0.6}'}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8}}}})
+    failed = json.dumps({"custom_id": "k2", "response": None, "error": {"code": "server_error"}})
+    statuses = iter(["validating", "in_progress", "completed", "completed"])
+    created: List[Dict[str, Any]] = []
+    sdk = SimpleNamespace(
+        files=SimpleNamespace(
+            create=lambda file, purpose: SimpleNamespace(id="file-1"),
+            content=lambda file_id: SimpleNamespace(text=output + "\n" + failed + "\n"),
+        ),
+        batches=SimpleNamespace(
+            create=lambda **kwargs: created.append(kwargs) or SimpleNamespace(id="batch-1"),
+            retrieve=lambda batch_id: SimpleNamespace(status=next(statuses), output_file_id="file-2"),
+        ),
+    )
+    sleeps: List[float] = []
+    runner = BatchJudgeRunner(OpenAIBatchClient(sdk), work_dir=str(tmp_path), poll_interval=5, sleep=sleeps.append)
+    requests = [BatchRequest("k1", "prompt 1", "judge-model", {"temperature": 0}), BatchRequest("k2", "prompt 2", "judge-model")]
+    batch_id = runner._submit(requests)
+    responses = runner.wait(batch_id)
+
+    line = json.loads((tmp_path / "batch_requests.jsonl").read_text().splitlines()[0])
+    assert line["url"] == "/v1/chat/completions" and line["body"]["messages"][0]["content"] == "prompt 1"
+    assert created == [{"input_file_id": "file-1", "endpoint": "/v1/chat/completions", "completion_window": "24h"}]
+    assert sleeps == [5, 5]
+    assert list(responses) == ["k1"] and responses["k1"].text == '{"score": 0.6}'
+    assert runner._submit(requests) == "batch-1" and len(created) == 1
+
+    sdk.batches.retrieve = lambda batch_id: SimpleNamespace(status="failed")
+    with pytest.raises(BatchJobError):
+        runner.wait("batch-1")
+
+def test_batch_requests_mark_the_cached_prefix(tmp_path: Path):
+    """Tests the Anthropic Message Batches format and prompt-cache marking in both providers' files."""
+    requests = [BatchRequest("k1", "stable|varying", "claude", {"temperature": 0, "cache_prefix": 7})]
+    line = json.loads(AnthropicBatchClient(None).write_requests(requests, tmp_path / "a.jsonl").read_text())
+    assert line == {"custom_id": "k1", "params": {
+        "model": "claude", "max_tokens": 1024, "temperature": 0, "messages": [{"role": "user", "content": [
+            {"type": "text", "text": "stable|", "cache_control": {"type": "ephemeral"}}, {"type": "text", "text": "varying"}
+        ]}]
+    }}
+    body = json.loads(OpenAIBatchClient(None).write_requests(requests, tmp_path / "o.jsonl").read_text())["body"]
+    assert body["messages"][0]["content"] == "stable|varying"
+    assert "cache_prefix" not in body and len(body["prompt_cache_key"]) == 32
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import pytest
+from openai import OpenAI
+from typing import Any, Dict, List
+from utils.utils import llm_wrapper
+from utils.utils.cassette import Cassette, CassetteMissError
+from utils.utils.http_pool import HTTPClientPool, sdk_http_module
+from utils.utils.llm_wrapper import LLMWrapper
+
+def completion(text: str) -> Dict[str, Any]:
+    return {
+        "id": "c", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8},
+    }
+
+def recording_wrapper(path, requests: List[str], body=None) -> LLMWrapper:
+    http = sdk_http_module(OpenAI)
+
+    def handle(request):
+        prompt = json.loads(request.content)["messages"][0]["content"]
+        requests.append(prompt)
+        if body is not None:
+            return http.Response(200, content=body, headers={"content-type": "text/event-stream"})
+        return http.Response(200, json=completion(f"answer to {prompt} #{len(requests)}"))
+    pool = HTTPClientPool(transport=http.MockTransport(handle))
+    return LLMWrapper("openai", api_key="test-key", http_pool=pool, cassette=Cassette(str(path), mode="record"))
+
+def test_replay_serves_recorded_responses_in_order(tmp_path):
+    """Tests that a recorded session replays without network access or an API key."""
+    path = tmp_path / "run.jsonl.gz"
+    requests: List[str] = []
+    recorder = recording_wrapper(path, requests)
+    recorded = [recorder.get_parsed_completion(p, "gpt-4o-mini").text for p in ("a", "a", "b")]
+    assert recorder.cassette.stats()["recorded"] == 3
+
+    replayer = LLMWrapper("openai", cassette=Cassette(str(path), mode="replay"))
+    replayed = [replayer.get_parsed_completion(p, "gpt-4o-mini").text for p in ("a", "a", "b")]
+    assert replayed == recorded == ["answer to a #1", "answer to a #2", "answer to b #3"]
+    # Once a request's recordings run out, the last one is reused.
+    assert replayer.get_parsed_completion("a", "gpt-4o-mini").text == "answer to a #2"
+    assert asyncio.run(replayer.get_completion_async("b", "gpt-4o-mini")).usage.total_tokens == 8
+    with pytest.raises(CassetteMissError):
+        replayer.get_completion("c", "gpt-4o-mini")
+    with pytest.raises(CassetteMissError):
+        replayer.get_completion("a", "gpt-4o-mini", temperature=0.5)
+
+def test_replay_simulates_recorded_latency(tmp_path, monkeypatch):
+    """Tests recorded and sampled latency simulation."""
+    path = tmp_path / "run.jsonl.gz"
+    cassette = Cassette(str(path), mode="record")
+    cassette.record("k1", "openai", "m", {"type": "openai", "data": completion("x")}, latency=0.4)
+    cassette.record("k2", "openai", "m", {"type": "openai", "data": completion("y")}, latency=1.2)
+    recorded = Cassette(str(path), simulate_latency="recorded", latency_scale=0.5)
+    assert recorded.lookup("k1")[1] == pytest.approx(0.2)
+    assert recorded.lookup("k2")[1] == pytest.approx(0.6)
+    sampled = Cassette(str(path), simulate_latency="sampled", seed=1)
+    assert {sampled.lookup("k1")[1] for _ in range(20)} == {0.4, 1.2}
+    assert Cassette(str(path)).lookup("k1")[1] == 0.0
+
+    sleeps: List[float] = []
+    monkeypatch.setattr(llm_wrapper.time, "sleep", sleeps.append)
+    wrapper = LLMWrapper("openai", cassette=Cassette(str(path), simulate_latency="recorded", latency_scale=0.5))
+    monkeypatch.setattr(wrapper, "_cassette_key", lambda *args, **kwargs: "k1")
+    assert wrapper.get_parsed_completion("p", "m").text == "x"
+    assert sleeps == [pytest.approx(0.2)]
+
+def test_streams_are_recorded_and_replayed(tmp_path):
+    """Tests that a stream closed early replays the text received before it was closed."""
+    path = tmp_path / "run.jsonl.gz"
+    events = [
+        {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o-mini",
+         "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]}
+        for text in ('{"score": 0.9}', " and then a long explanation")
+    ]
+    body = ("\n".join(f"data: {json.dumps(e)}\n" for e in events) + "\ndata: [DONE]\n\n").encode()
+    recorder = recording_wrapper(path, [], body=body)
+    with recorder.stream_completion("p", "gpt-4o-mini") as stream:
+        first = next(iter(stream))
+    assert first == '{"score": 0.9}'
+
+    replayer = LLMWrapper("openai", cassette=Cassette(str(path), mode="replay"))
+    with replayer.stream_completion("p", "gpt-4o-mini") as stream:
+        text = "".join(stream)
+    assert text == '{"score": 0.9}'
+    assert stream.metadata["model"] == "gpt-4o-mini"
+    with pytest.raises(CassetteMissError):
+        replayer.get_completion("p", "gpt-4o-mini")
+
+def test_replay_requires_an_existing_cassette(tmp_path):
+    """Tests invalid modes and missing cassette files."""
+    with pytest.raises(FileNotFoundError):
+        Cassette(str(tmp_path / "missing.jsonl.gz"), mode="replay")
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "run.jsonl.gz"), mode="rewind")
+    with pytest.raises(ValueError):
+        LLMWrapper("openai", cassette=Cassette(str(tmp_path / "run.jsonl.gz"), mode="record"))
+
+def test_recording_starts_a_new_compact_cassette_unless_appending(tmp_path):
+    """Tests that re-recording replaces the old calls, appending extends them, and the file is one compact stream."""
+    path = tmp_path / "run.jsonl.gz"
+    with Cassette(str(path), mode="record") as old:
+        old.record("k", "openai", "m", {"type": "openai", "data": completion("stale")}, latency=0.1)
+    with Cassette(str(path), mode="record") as cassette:
+        for i in range(200):
+            cassette.record(f"k{i}", "openai", "m", {"type": "openai", "data": completion("same verdict")}, latency=0.1)
+        # Flushed lines are replayable while the recording is still open.
+        assert Cassette(str(path)).lookup("k199")[0]["data"]["choices"][0]["message"]["content"] == "same verdict"
+    with pytest.raises(CassetteMissError):
+        Cassette(str(path)).lookup("k")
+    uncompressed = sum(len(json.dumps({"key": f"k{i}", "response": completion("same verdict")})) for i in range(200))
+    assert path.stat().st_size < uncompressed / 5
+
+    with Cassette(str(path), mode="record", append=True) as more:
+        more.record("k", "openai", "m", {"type": "openai", "data": completion("new")}, latency=0.1)
+    replay = Cassette(str(path))
+    assert replay.lookup("k")[0]["data"]["choices"][0]["message"]["content"] == "new"
+    assert replay.lookup("k0")[0]["data"]["choices"][0]["message"]["content"] == "same verdict"
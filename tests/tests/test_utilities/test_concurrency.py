@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+import pytest
+from utils.utils.concurrency import AIMDLimiter, ConcurrencyController
+from utils.utils.tracing import Tracer
+
+class RateLimited(Exception):
+    """Mimics an SDK 429 error."""
+    status_code = 429
+
+def test_success_increases_limit_additively():
+    """Tests that a full round of successes grows the limit by about one."""
+    limiter = AIMDLimiter(initial_limit=2, cooldown=0.0)
+    for _ in range(2):
+        limiter.run(lambda: None)
+    assert limiter.limit == pytest.approx(2.9)
+
+def test_unsaturated_limiter_does_not_grow():
+    """Tests that successes far below the limit do not raise it."""
+    limiter = AIMDLimiter(initial_limit=8)
+    for _ in range(20):
+        limiter.run(lambda: None)
+    assert limiter.limit == 8
+
+def test_overload_decreases_limit_multiplicatively():
+    """Tests that a 429 halves the limit, but only once per cooldown window."""
+    limiter = AIMDLimiter(initial_limit=16, cooldown=60.0)
+    for _ in range(3):
+        with pytest.raises(RateLimited):
+            limiter.run(lambda: (_ for _ in ()).throw(RateLimited()))
+    assert limiter.limit == 8 and limiter.decreases == 1
+
+def test_other_errors_leave_limit_unchanged():
+    """Tests that non-overload failures are not treated as congestion."""
+    limiter = AIMDLimiter(initial_limit=4)
+    with pytest.raises(ValueError):
+        limiter.run(lambda: (_ for _ in ()).throw(ValueError("bad")))
+    assert limiter.limit == 4 and limiter.in_flight == 0
+
+def test_limit_bounds_threads_in_flight():
+    """Tests that threads never exceed the current limit."""
+    limiter = AIMDLimiter(initial_limit=3, max_limit=3)
+
+    def work():
+        time.sleep(0.01)
+
+    threads = [threading.Thread(target=limiter.run, args=(work,)) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert limiter.peak_in_flight == 3
+
+def test_limit_bounds_async_tasks_in_flight():
+    """Tests that asyncio tasks wait for slots without blocking the loop."""
+    limiter = AIMDLimiter(initial_limit=2, max_limit=2)
+
+    async def work():
+        await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(limiter.arun(work) for _ in range(10)))
+
+    asyncio.run(run())
+    assert limiter.peak_in_flight == 2 and limiter.in_flight == 0
+
+def test_controller_keys_by_provider_and_model_and_reports():
+    """Tests per-key limiters, trace counters and seeding from the previous run."""
+    tracer = Tracer(enabled=True)
+    controller = ConcurrencyController(
+        initial_limit=4, previous_limits={"openai/gpt-4o": {"limit": 40}}, tracer=tracer
+    )
+    assert controller.limiter("openai", "gpt-4o").limit == 40
+    assert controller.limiter("openai", "gpt-4o-mini") is not controller.limiter("openai", "gpt-4o")
+    limiter = controller.limiter("anthropic", "claude")
+    with pytest.raises(RateLimited):
+        limiter.run(lambda: (_ for _ in ()).throw(RateLimited()))
+    assert controller.stats()["anthropic/claude"]["limit"] == 2
+    assert any(e["ph"] == "C" and e["args"]["limit"] == 2 for e in tracer.events)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from typing import List
+from utils.utils.context_compression import ContextCompressor, count_tokens, split_sentences
+
+def embed_many(texts: List[str]) -> np.ndarray:
+    """Deterministic toy embeddings: hashed bag of lower-cased words."""
+    vectors = np.zeros((len(texts), 64))
+    for row, text in enumerate(texts):
+        for word in text.lower().strip(".?!").split():
+            vectors[row, sum(map(ord, word)) % 64] += 1.0
+    return vectors
+
+FILLER = [f"Unrelated sentence number {i} talks about weather patterns elsewhere." for i in range(40)]
+CONTEXT = " ".join(FILLER[:20] + ["The Eiffel Tower is in Paris."] + FILLER[20:])
+
+def test_split_sentences_handles_passage_lists():
+    """Tests splitting on sentence ends and line breaks across passages."""
+    assert split_sentences(["A b. C d?", "E\nF"]) == ["A b.", "C d?", "E", "F"]
+
+def test_keeps_most_relevant_sentences_within_budget():
+    """Tests that the reduced context fits the budget and keeps the relevant sentence."""
+    compressor = ContextCompressor(embed_many, default_budget=40)
+    reduced, reduction = compressor.compress(CONTEXT, ["The tower is in Paris.", "Where is the Eiffel Tower?"], 40)
+
+    assert "The Eiffel Tower is in Paris." in reduced
+    assert count_tokens(reduced) <= 40
+    assert reduction == pytest.approx(1 - count_tokens(reduced) / count_tokens(CONTEXT))
+    assert compressor.stats()["reduction"] > 0.9
+
+def test_kept_sentences_stay_in_original_order():
+    """Tests that selected sentences keep their order in the context."""
+    context = "Paris is big. Weather is mild today. The tower is in Paris."
+    reduced, _ = ContextCompressor(embed_many).compress(context, ["tower Paris"], 9)
+    assert reduced == "Paris is big. The tower is in Paris."
+
+def test_short_context_is_untouched():
+    """Tests that a context within the budget is not embedded or changed."""
+    compressor = ContextCompressor(lambda texts: pytest.fail("should not embed"))
+    assert compressor.compress("Short context.", ["q"], 100) == ("Short context.", 0.0)
+
+def test_budget_for_uses_tightest_metric_budget():
+    """Tests per-metric budgets with a default for other metrics."""
+    compressor = ContextCompressor(embed_many, budgets={"faithfulness": 500}, default_budget=2000)
+    assert compressor.budget_for(["faithfulness", "hallucination"]) == 500
+    assert compressor.budget_for(["hallucination"]) == 2000
+    assert ContextCompressor(embed_many).budget_for(["faithfulness"]) is None
@@ -0,0 +1,58 @@
+import pytest
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from utils.utils.dedupe import canonicalize, deduplicate_rows, expand_results
+
+@dataclass
+class Result:
+    score: float
+    details: Any = ""
+
+@pytest.fixture
+def rows() -> List[Dict[str, Any]]:
+    return [
+        {"question": "What is RAG?", "answer": "Retrieval augmented generation.", "context": "RAG combines retrieval and generation."},
+        {"question": "What is RAG? ", "answer": "Retrieval  augmented\ngeneration.", "context": "RAG combines retrieval and generation."},
+        {"question": "What is RAG?", "answer": "A framework.", "context": "RAG combines retrieval and generation."},
+        {"question": "What is RAG?", "answer": "Retrieval augmented generation.", "context": "RAG combines retrieval and generation."},
+    ]
+
+@pytest.mark.parametrize("value, expected", [
+    ("  a   b\n c ", "a b c"),
+    (None, ""),
+    (["first  doc", "second doc"], "first doc\nsecond doc"),
+    ("Case Kept", "Case Kept"),
+])
+def test_canonicalize(value: Any, expected: str):
+    """Tests whitespace/Unicode canonicalization of field values."""
+    assert canonicalize(value) == expected
+
+def test_deduplicate_rows_collapses_canonical_duplicates(rows: List[Dict[str, Any]]):
+    """
+    Tests that rows identical after canonicalization share one unique row.
+    """
+    unique_rows, row_index = deduplicate_rows(rows)
+    assert len(unique_rows) == 2
+    assert row_index == [0, 0, 1, 0]
+    assert unique_rows[0] is rows[0], "The first occurrence should be kept as the representative."
+
+def test_deduplicate_rows_on_custom_fields(rows: List[Dict[str, Any]]):
+    """
+    Tests that identity can be restricted to a subset of fields.
+    """
+    unique_rows, row_index = deduplicate_rows(rows, fields=["question", "context"])
+    assert len(unique_rows) == 1
+    assert row_index == [0, 0, 0, 0]
+
+def test_expand_results_copies_for_duplicates():
+    """
+    Tests that every original row gets results and duplicates do not share objects or details.
+    """
+    unique_results = [[Result(0.9, {"reason": "ok"})], [Result(0.1)]]
+    expanded = expand_results(unique_results, [0, 1, 0])
+
+    assert [[r.score for r in row] for row in expanded] == [[0.9], [0.1], [0.9]]
+    assert expanded[0][0] is unique_results[0][0]
+    assert expanded[2][0] is not expanded[0][0]
+    expanded[2][0].details["llm_usage"] = {"cost": 0.0}
+    assert "llm_usage" not in expanded[0][0].details
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from utils.utils.hedging import HedgingPolicy
+
+def warmed_policy(latency: float = 0.01, **kwargs) -> HedgingPolicy:
+    policy = HedgingPolicy(min_samples=5, **kwargs)
+    for _ in range(20):
+        policy.observe("m", latency)
+    return policy
+
+def policy_thread(policy: HedgingPolicy, executor: ThreadPoolExecutor) -> int:
+    return policy.call(executor, "m", threading.get_ident)
+
+def test_no_hedging_before_enough_samples():
+    """Tests that the hedge delay is unknown until min_samples latencies were seen."""
+    policy = HedgingPolicy(min_samples=3)
+    policy.observe("m", 1.0)
+    assert policy.hedge_delay("m") is None
+    policy.observe("m", 2.0)
+    policy.observe("m", 3.0)
+    assert policy.hedge_delay("m") == 3.0
+    assert policy.hedge_delay("other") is None
+
+def test_slow_request_is_hedged_and_fast_copy_wins():
+    """Tests that a straggler is duplicated after the p95 delay and the first result wins."""
+    policy = warmed_policy(max_hedge_ratio=1.0)
+    calls: List[int] = []
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0.01)
+        return "slow" if first else "fast"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        start = time.perf_counter()
+        assert policy.call(executor, "m", request) == "fast"
+        assert time.perf_counter() - start < 0.3
+    assert policy.stats() == {"requests": 1, "hedges": 1, "hedge_wins": 1}
+
+def test_losing_copy_is_reported_when_it_completes():
+    """Tests that the discarded result of a losing blocking call is passed to on_discard."""
+    policy = warmed_policy(max_hedge_ratio=1.0)
+    calls: List[int] = []
+    discarded: List[str] = []
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(0.2 if first else 0.01)
+        return "slow" if first else "fast"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert policy.call(executor, "m", request, on_discard=discarded.append) == "fast"
+    assert discarded == ["slow"]
+
+def test_unhedgeable_request_runs_on_the_calling_thread():
+    """Tests that requests which cannot be hedged skip the executor."""
+    caller = threading.get_ident()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert policy_thread(HedgingPolicy(), executor) == caller
+        assert policy_thread(warmed_policy(max_hedge_ratio=0.0), executor) == caller
+        assert policy_thread(warmed_policy(max_hedge_ratio=1.0), executor) != caller
+
+def test_hedges_are_capped_by_ratio():
+    """Tests that at most max_hedge_ratio of requests are duplicated."""
+    policy = warmed_policy(max_hedge_ratio=0.0)
+    calls: List[int] = []
+
+    def request():
+        calls.append(1)
+        time.sleep(0.05)
+        return "ok"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert policy.call(executor, "m", request) == "ok"
+    assert len(calls) == 1 and policy.hedges == 0
+
+def test_async_hedge_cancels_the_loser():
+    """Tests that the losing async request is cancelled."""
+    policy = warmed_policy(max_hedge_ratio=1.0)
+    state = {"calls": 0, "cancelled": 0}
+
+    async def request():
+        state["calls"] += 1
+        delay = 1.0 if state["calls"] == 1 else 0.01
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        return delay
+
+    async def run():
+        result = await policy.acall("m", request)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == 0.01
+    assert state == {"calls": 2, "cancelled": 1}
+
+def test_failed_copy_falls_back_to_the_other():
+    """Tests that an error in one copy does not fail the request if the other succeeds."""
+    policy = warmed_policy(max_hedge_ratio=1.0)
+    state = {"calls": 0}
+
+    async def request():
+        state["calls"] += 1
+        if state["calls"] == 1:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("primary failed")
+        await asyncio.sleep(0.1)
+        return "hedge"
+
+    assert asyncio.run(policy.acall("m", request)) == "hedge"
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from typing import Any, List
+from openai import OpenAI
+from utils.utils.http_pool import HTTPClientPool, sdk_http_module
+from utils.utils.llm_cache import ResponseCache
+from utils.utils.llm_wrapper import LLMWrapper
+
+def test_sync_client_is_shared_per_provider():
+    """Tests that one pooled client is reused per provider and closed with the pool."""
+    pool = HTTPClientPool(max_connections=8, max_keepalive_connections=4)
+    client = pool.sync_client("openai")
+    assert pool.sync_client("openai") is client
+    assert pool.sync_client("anthropic") is not client
+    assert client._transport._pool._max_connections == 8
+    pool.close()
+    assert client.is_closed
+
+def test_async_client_is_bound_to_its_event_loop():
+    """Tests that async clients are reused within a loop and replaced on a new loop."""
+    pool = HTTPClientPool()
+
+    async def clients(close: bool = False):
+        pair = pool.async_client("openai"), pool.async_client("openai")
+        if close:
+            await pool.aclose()
+        return pair
+
+    first, again = asyncio.run(clients())
+    assert first is again
+    second, _ = asyncio.run(clients(close=True))
+    assert second is not first
+    assert second.is_closed
+
+def test_llm_wrappers_share_the_run_pool():
+    """Tests that every wrapper of a run sends requests through the same connections."""
+    pool = HTTPClientPool()
+    first = LLMWrapper("openai", api_key="test-key", http_pool=pool)
+    second = LLMWrapper("openai", api_key="test-key", http_pool=pool)
+    assert first.client._client is second.client._client is pool.sync_client("openai", sdk_http_module(OpenAI))
+
+    async def async_clients():
+        return first._get_async_client()._client, second._get_async_client()._client
+
+    a, b = asyncio.run(async_clients())
+    assert a is b
+    first.close()
+    assert not pool.sync_client("openai", sdk_http_module(OpenAI)).is_closed
+    pool.close()
+
+def test_get_completion_async_runs_concurrently_and_uses_cache(tmp_path, monkeypatch):
+    """Tests that async calls overlap on one loop and deterministic responses are cached."""
+    wrapper = LLMWrapper("openai", api_key="test-key", cache=ResponseCache(path=str(tmp_path / "c.sqlite")))
+    in_flight: List[int] = [0, 0]
+
+    async def fake_completion(prompt: str, model: str, **kwargs: Any) -> Any:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return {"prompt": prompt}
+
+    monkeypatch.setattr(wrapper, "_get_openai_completion_async", fake_completion)
+
+    async def run():
+        return await asyncio.gather(*(wrapper.get_completion_async(f"p{i}", "m", temperature=0) for i in range(20)))
+
+    results = asyncio.run(run())
+    assert results[3] == {"prompt": "p3"}
+    assert in_flight[1] == 20
+    assert wrapper.cache.get(wrapper._cache_key("p3", "m", {"temperature": 0})) == {"type": "raw", "data": {"prompt": "p3"}}
+    asyncio.run(wrapper.aclose())
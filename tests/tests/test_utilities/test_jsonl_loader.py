@@ -0,0 +1,43 @@
+import gzip
+import pytest
+from typing import List
+from utils.utils.data_loader import DataLoader, MalformedLine
+
+LINES = [
+    '{"question": "Q1", "answer": "A1", "context": "C1"}',
+    '',
+    '{"question": "Q2", "answer": "A2"',
+    '{"question": "Q3", "answer": "A3", "context": "C3"}',
+    '[1, 2]',
+    '{"question": "Q4", "answer": "A4", "context": "C4"}',
+]
+
+def test_jsonl_is_streamed_and_malformed_lines_are_reported(tmp_path):
+    """Tests that valid records are yielded lazily while bad lines are skipped with their line numbers."""
+    path = tmp_path / "traces.jsonl"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    malformed: List[MalformedLine] = []
+    records = DataLoader.stream_jsonl(str(path), malformed=malformed)
+    assert next(records)["question"] == "Q1" and malformed == []
+    assert [r["question"] for r in records] == ["Q3", "Q4"]
+    assert [m.line_number for m in malformed] == [3, 5]
+    assert "expected a JSON object" in malformed[1].error
+    assert [r["question"] for r in DataLoader.load_data(str(path))] == ["Q1", "Q3", "Q4"]
+
+def test_jsonl_chunks_and_compressed_files(tmp_path):
+    """Tests chunked reads of an NDJSON file and of a gzip-compressed JSONL file with invalid bytes."""
+    records = [f'{{"question": "Q{i}", "answer": "A{i}"}}' for i in range(5)]
+    ndjson = tmp_path / "traces.ndjson"
+    ndjson.write_text("\n".join(records), encoding="utf-8")
+    chunks = list(DataLoader.stream_jsonl(ndjson, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1] and chunks[2][0]["question"] == "Q4"
+
+    compressed = tmp_path / "traces.jsonl.gz"
+    with gzip.open(compressed, "wb") as f:
+        f.write(b'\xef\xbb\xbf' + records[0].encode() + b'\n{"question": "\xff"}\n' + records[1].encode() + b'\n')
+    malformed: List[MalformedLine] = []
+    assert len(list(DataLoader.stream_jsonl(compressed, malformed=malformed))) == 2
+    assert [m.line_number for m in malformed] == [2]
+    assert len(DataLoader.load_data(str(compressed))) == 2
+    with pytest.raises(ValueError):
+        list(DataLoader.stream_jsonl(ndjson, chunk_size=0))
@@ -0,0 +1,320 @@
+import asyncio
+import json
+import re
+import pytest
+from typing import Any, Dict, List
+from utils.utils.context_compression import ContextCompressor
+from utils.utils.judge import LLMJudge, JudgeParseError
+from utils.utils.response_parser import ParsedResponse
+from utils.utils.self_consistency import SelfConsistency
+from utils.utils.semantic_cache import SemanticVerdictCache
+from utils.utils.streaming import CompletionStream
+
+class FakeJudgeLLM:
+    """
+    A stand-in for LLMWrapper that answers judge prompts with canned verdicts.
+    Batched prompts get one verdict per '### Item N' block, except for `drop_ids`;
+    grouped prompts get one verdict per listed metric, except for `drop_metrics`.
+    """
+    provider = "openai"
+
+    def __init__(self, score: float = 0.9, drop_ids: List[int] = None, single_text: str = None, drop_metrics: List[str] = None):
+        self.score = score
+        self.drop_ids = drop_ids or []
+        self.drop_metrics = drop_metrics or []
+        self.single_text = single_text
+        self.prompts: List[str] = []
+        self.streamed_chunks = 0
+
+    def get_parsed_completion(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        self.prompts.append(prompt)
+        item_ids = [int(i) for i in re.findall(r"### Item (\d+)", prompt)]
+        group_metrics = re.findall(r"^- (\w+):", prompt, re.M)
+        if group_metrics:
+            text = json.dumps({m: {"score": self.score, "reason": "grouped"} for m in group_metrics if m not in self.drop_metrics})
+        elif item_ids:
+            verdicts = [{"id": i, "score": self.score, "reason": "batched"} for i in item_ids if i not in self.drop_ids]
+            text = json.dumps({"verdicts": verdicts})
+        else:
+            text = self.single_text or json.dumps({"score": 0.5, "reason": "single"})
+        return ParsedResponse(text=text, raw_response=None, metadata={}, provider="openai", model=model)
+
+    async def get_parsed_completion_async(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        await asyncio.sleep(0)
+        return self.get_parsed_completion(prompt, model, **kwargs)
+
+    def stream_completion(self, prompt: str, model: str, **kwargs) -> CompletionStream:
+        text = self.get_parsed_completion(prompt, model, **kwargs).text
+
+        def chunks():
+            for i in range(0, len(text), 4):
+                self.streamed_chunks += 1
+                yield text[i:i + 4], {}
+        return CompletionStream(chunks(), provider="openai", model=model)
+
+@pytest.fixture
+def rows() -> List[Dict[str, Any]]:
+    return [{"answer": f"Answer {i}", "context": f"Context {i}"} for i in range(5)]
+
+def test_batch_uses_one_call_for_all_rows(rows: List[Dict[str, Any]]):
+    """
+    Tests that K rows for the same metric are scored with a single judge request.
+    """
+    llm = FakeJudgeLLM()
+    judge = LLMJudge(llm, model="judge-model", metrics=["faithfulness"], batch_size=5)
+    results = judge.evaluate_batch("faithfulness", rows)
+
+    assert len(llm.prompts) == 1
+    assert [r.score for r in results] == [0.9] * 5
+    assert all(r.metric_name == "faithfulness" for r in results)
+    assert results[0].details["batch_size"] == 5
+
+def test_batch_falls_back_to_single_calls_for_missing_verdicts(rows: List[Dict[str, Any]]):
+    """
+    Tests that rows without a parsable verdict are re-scored individually.
+    """
+    llm = FakeJudgeLLM(drop_ids=[2, 4])
+    judge = LLMJudge(llm, model="judge-model", metrics=["faithfulness"], batch_size=5)
+    results = judge.evaluate_batch("faithfulness", rows)
+
+    assert len(llm.prompts) == 3
+    assert [r.score for r in results] == [0.9, 0.5, 0.9, 0.5, 0.9]
+
+def test_batch_skips_rows_missing_inputs(rows: List[Dict[str, Any]]):
+    """
+    Tests that rows lacking a required input are left unscored instead of failing the batch.
+    """
+    rows[1] = {"answer": "No context here"}
+    judge = LLMJudge(FakeJudgeLLM(), model="judge-model", metrics=["faithfulness"], batch_size=5)
+    results = judge.evaluate_batch("faithfulness", rows)
+
+    assert results[1] is None
+    assert all(r is not None for i, r in enumerate(results) if i != 1)
+
+def test_single_evaluation_rejects_invalid_verdict():
+    """
+    Tests that a response without a numeric score raises JudgeParseError.
+    """
+    judge = LLMJudge(FakeJudgeLLM(single_text="I think it is fine."), model="judge-model")
+    with pytest.raises(JudgeParseError):
+        judge.evaluate("faithfulness", {"answer": "a", "context": "c"})
+
+def test_scores_are_clamped_and_judge_defaults_to_temperature_zero():
+    """
+    Tests score clamping and the deterministic default sampling parameters.
+    """
+    judge = LLMJudge(FakeJudgeLLM(single_text='{"score": 1.7, "reason": "x"}'), model="judge-model")
+    assert judge.evaluate("answer_relevance", {"question": "q", "answer": "a"}).score == 1.0
+    assert judge.completion_kwargs["temperature"] == 0
+
+GROUNDING = ["faithfulness", "hallucination", "groundedness", "factual_consistency"]
+
+def test_group_scores_all_metrics_in_one_call():
+    """
+    Tests that a judge group fans one combined verdict out into one result per metric.
+    """
+    llm = FakeJudgeLLM(score=0.8)
+    judge = LLMJudge(llm, model="judge-model", groups={"grounding": GROUNDING})
+    results = judge.evaluate_group(GROUNDING, {"answer": "a", "context": "c"})
+
+    assert len(llm.prompts) == 1
+    assert sorted(results) == sorted(GROUNDING)
+    assert all(r.score == 0.8 and r.metric_name == name for name, r in results.items())
+    assert results["faithfulness"].details["judge_group"] == "grounding"
+
+def test_group_falls_back_for_missing_metrics():
+    """
+    Tests that metrics absent from the combined verdict are judged individually.
+    """
+    llm = FakeJudgeLLM(score=0.8, drop_metrics=["hallucination"])
+    judge = LLMJudge(llm, model="judge-model", groups={"grounding": GROUNDING})
+    results = judge.evaluate_group(GROUNDING, {"answer": "a", "context": "c"})
+
+    assert len(llm.prompts) == 2
+    assert results["hallucination"].score == 0.5
+
+def test_incompatible_group_is_ignored():
+    """
+    Tests that a group mixing metrics with different inputs is not used.
+    """
+    judge = LLMJudge(FakeJudgeLLM(), model="judge-model", groups={"mixed": ["faithfulness", "answer_relevance"]})
+    assert judge.groups == {}
+    assert judge.group_of("faithfulness") is None
+
+def test_semantic_cache_reuses_near_duplicate_verdicts():
+    """
+    Tests that a reformatted duplicate row is served from the semantic cache.
+    """
+    llm = FakeJudgeLLM(single_text='{"score": 0.7, "reason": "x"}')
+    cache = SemanticVerdictCache(embed_fn=lambda text: [float(len(text.split())), 1.0], threshold=0.99)
+    judge = LLMJudge(llm, model="judge-model", semantic_cache=cache)
+    first = judge.evaluate("answer_relevance", {"question": "Q", "answer": "An answer"})
+    second = judge.evaluate("answer_relevance", {"question": "q", "answer": "an   answer"})
+
+    assert len(llm.prompts) == 1
+    assert second.score == first.score == 0.7
+    assert second.details["semantic_cache_similarity"] == pytest.approx(1.0)
+
+def test_evaluate_async_judges_rows_concurrently(rows: List[Dict[str, Any]]):
+    """
+    Tests that the async path scores rows concurrently with single-row prompts.
+    """
+    llm = FakeJudgeLLM()
+    judge = LLMJudge(llm, model="judge-model")
+
+    async def run():
+        return await asyncio.gather(*(judge.evaluate_async("faithfulness", row) for row in rows))
+
+    results = asyncio.run(run())
+    assert len(llm.prompts) == 5
+    assert all(r.score == 0.5 and r.metric_name == "faithfulness" for r in results)
+
+def test_streaming_stops_once_the_verdict_is_complete():
+    """
+    Tests that a streamed verdict is parsed as soon as its JSON object closes.
+    """
+    text = '{"score": 0.6, "reason": "short"} and then a long explanation nobody reads'
+    llm = FakeJudgeLLM(single_text=text)
+    result = LLMJudge(llm, model="judge-model", stream=True).evaluate("answer_relevance", {"question": "Q", "answer": "A"})
+
+    assert result.score == 0.6 and result.details["reason"] == "short"
+    assert llm.streamed_chunks == 9
+
+def test_score_first_streaming_skips_the_reason(rows: List[Dict[str, Any]]):
+    """
+    Tests that score-first prompts stop streaming right after the score(s).
+    """
+    llm = FakeJudgeLLM(single_text='{"score": 0.25, "reason": "' + "x" * 200 + '"}')
+    judge = LLMJudge(llm, model="judge-model", stream=True, score_first=True)
+    result = judge.evaluate("answer_relevance", {"question": "Q", "answer": "A"})
+
+    assert "Write the score before the reason." in llm.prompts[0]
+    assert result.score == 0.25
+    assert llm.streamed_chunks < 10
+
+    llm.get_parsed_completion = lambda prompt, model, **kwargs: ParsedResponse(
+        text=json.dumps({"scores": {str(i): 0.4 for i in range(1, 6)}, "reasons": {str(i): "y" * 100 for i in range(1, 6)}}),
+        raw_response=None, metadata={}, provider="openai", model=model
+    )
+    llm.streamed_chunks = 0
+    results = judge.evaluate_batch("faithfulness", rows)
+    assert [r.score for r in results] == [0.4] * 5
+    assert llm.streamed_chunks < 20
+
+def test_long_context_is_compressed_before_judging():
+    """
+    Tests that only budget-sized, relevant context reaches the judge and the reduction is recorded.
+    """
+    def embed_many(texts):
+        return [[float("Paris" in t), float("weather" in t), 1.0] for t in texts]
+
+    llm = FakeJudgeLLM(single_text='{"score": 1.0, "reason": "supported"}')
+    compressor = ContextCompressor(embed_many, budgets={"faithfulness": 20})
+    judge = LLMJudge(llm, model="judge-model", compressor=compressor)
+    context = " ".join(["The weather was mild that day."] * 30 + ["The capital is Paris."])
+    result = judge.evaluate("faithfulness", {"answer": "Paris is the capital.", "context": context})
+
+    assert "The capital is Paris." in llm.prompts[0]
+    assert llm.prompts[0].count("weather") < 3
+    assert result.details["context_reduction"] > 0.8
+    assert "context_reduction" not in judge.evaluate("answer_relevance", {"question": "Q", "answer": "A"}).details
+
+def test_batch_accepts_one_verdict_object_per_item(rows: List[Dict[str, Any]]):
+    """
+    Tests that a batch answered with separate per-item objects is still parsed without fallback calls.
+    """
+    llm = FakeJudgeLLM()
+    text = "\n".join(json.dumps({"id": i, "score": 0.3, "reason": "r {i}"}) for i in range(1, 6))
+    llm.get_parsed_completion = lambda prompt, model, **kwargs: ParsedResponse(
+        text=f"```json\n{text}\n```", raw_response=None, metadata={}, provider="openai", model=model
+    )
+    results = LLMJudge(llm, model="judge-model", batch_size=5).evaluate_batch("faithfulness", rows)
+    assert [r.score for r in results] == [0.3] * 5
+
+def test_prompts_put_the_stable_prefix_first_for_prompt_caching(rows: List[Dict[str, Any]]):
+    """
+    Tests that instructions, schema and context precede the per-call fields and that the prefix length is passed on
+    only when prompt caching is enabled.
+    """
+    llm = FakeJudgeLLM()
+    calls = []
+    llm.get_parsed_completion = lambda prompt, model, **kwargs: calls.append((prompt, kwargs)) or ParsedResponse(
+        text='{"score": 0.5, "reason": "r"}', raw_response=None, metadata={}, provider="openai", model=model
+    )
+    judge = LLMJudge(llm, model="judge-model", prompt_caching=True)
+    judge.evaluate("faithfulness", {"question": "Q?", "answer": "The answer.", "context": "Shared context."})
+    prompt, kwargs = calls[0]
+    prefix = prompt[:kwargs["cache_prefix"]]
+    assert "Shared context." in prefix and "The answer." not in prefix
+    assert prompt.index("Shared context.") < prompt.index("The answer.")
+
+    judge.evaluate("faithfulness", {"question": "Other?", "answer": "Another answer.", "context": "Shared context."})
+    assert calls[1][0][:calls[1][1]["cache_prefix"]] == prefix
+
+    LLMJudge(llm, model="judge-model").evaluate("faithfulness", rows[0])
+    assert "cache_prefix" not in calls[2][1]
+
+def test_self_consistency_samples_until_the_scores_agree():
+    """
+    Tests that sampling stops once samples agree, continues while they disagree and reports mean and variance.
+    """
+    llm = FakeJudgeLLM()
+    scores = iter([0.8, 0.8, 0.2, 0.9, 0.85, 0.8, 0.9])
+    temperatures = []
+
+    def sample(prompt, model, **kwargs):
+        temperatures.append(kwargs["temperature"])
+        return ParsedResponse(json.dumps({"score": next(scores), "reason": "r"}), None, {}, "openai", model)
+    llm.get_parsed_completion = sample
+    policy = SelfConsistency(max_samples=5, tolerance=0.1, temperature=0.6)
+    judge = LLMJudge(llm, model="judge-model", self_consistency=policy)
+
+    agreed = judge.evaluate("faithfulness", {"answer": "A", "context": "C"})
+    assert agreed.score == pytest.approx(0.8) and agreed.details["samples"] == 2
+    assert agreed.details["score_variance"] == 0.0
+    noisy = judge.evaluate("faithfulness", {"answer": "B", "context": "C"})
+    assert noisy.details["samples"] == 5 and noisy.details["sample_scores"] == [0.2, 0.9, 0.85, 0.8, 0.9]
+    assert noisy.score == pytest.approx(0.73) and noisy.details["score_variance"] > 0.05
+    assert temperatures == [0.6] * 7
+    assert policy.stats()["samples"] == 7 and policy.stats()["early_stops"] == 1
+
+def test_self_consistency_resamples_only_unsettled_rows_and_metrics(rows: List[Dict[str, Any]]):
+    """
+    Tests that batched and grouped verdicts are re-requested only for the rows and metrics that disagree.
+    """
+    llm = FakeJudgeLLM()
+    answer = llm.get_parsed_completion
+    prompts = []
+
+    def sample(prompt, model, **kwargs):
+        prompts.append(prompt)
+        parsed = answer(prompt, model)
+        if len(prompts) == 2:
+            # The second sample disagrees on item 3 / hallucination.
+            parsed.text = parsed.text.replace('"id": 3, "score": 0.9', '"id": 3, "score": 0.1')
+            parsed.text = parsed.text.replace('"hallucination": {"score": 0.9', '"hallucination": {"score": 0.1')
+        return parsed
+    llm.get_parsed_completion = sample
+    judge = LLMJudge(llm, model="judge-model", batch_size=5, self_consistency=SelfConsistency(max_samples=3, concurrency=1))
+
+    results = judge.evaluate_batch("faithfulness", rows)
+    assert [r.details["samples"] for r in results] == [2, 2, 3, 2, 2]
+    assert prompts[2].count("### Item") == 1 and "Context 2" in prompts[2]
+    assert results[2].score == pytest.approx((0.9 + 0.1 + 0.9) / 3)
+
+    prompts.clear()
+    grouped = judge.evaluate_group(["faithfulness", "hallucination"], rows[0])
+    assert grouped["faithfulness"].details["samples"] == 2 and grouped["hallucination"].details["samples"] == 3
+    assert "- hallucination:" in prompts[2] and "- faithfulness:" not in prompts[2]
+
+def test_self_consistency_issues_concurrent_samples(rows: List[Dict[str, Any]]):
+    """Tests that concurrent sampling issues a round of samples at once, in both the sync and async paths."""
+    llm = FakeJudgeLLM(single_text=json.dumps({"score": 0.5, "reason": "same"}))
+    judge = LLMJudge(llm, model="judge-model", self_consistency=SelfConsistency(max_samples=4, concurrency=3))
+    assert judge.evaluate("faithfulness", rows[0]).details["samples"] == 3
+
+    async def run():
+        return await asyncio.gather(*(judge.evaluate_async("faithfulness", row) for row in rows))
+
+    results = asyncio.run(run())
+    assert [r.details["samples"] for r in results] == [3] * 5 and len(llm.prompts) == 18
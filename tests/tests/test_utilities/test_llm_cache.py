@@ -0,0 +1,94 @@
+import time
+import pytest
+from pathlib import Path
+from utils.utils.llm_cache import ResponseCache, make_cache_key
+
+@pytest.fixture
+def cache_path(tmp_path: Path) -> Path:
+    return tmp_path / "cache" / "llm.sqlite"
+
+def test_cache_key_is_stable_and_sensitive_to_inputs():
+    """
+    Tests that the key ignores parameter order but changes with any request input.
+    """
+    key = make_cache_key("openai", "gpt-4", "prompt", {"temperature": 0, "max_tokens": 10})
+    assert key == make_cache_key("openai", "gpt-4", "prompt", {"max_tokens": 10, "temperature": 0})
+    assert key != make_cache_key("anthropic", "gpt-4", "prompt", {"temperature": 0, "max_tokens": 10})
+    assert key != make_cache_key("openai", "gpt-4o", "prompt", {"temperature": 0, "max_tokens": 10})
+    assert key != make_cache_key("openai", "gpt-4", "prompt!", {"temperature": 0, "max_tokens": 10})
+    assert key != make_cache_key("openai", "gpt-4", "prompt", {"temperature": 0, "max_tokens": 11})
+
+def test_put_and_get_round_trip(cache_path: Path):
+    """Tests that a stored payload is returned and counted as a hit."""
+    cache = ResponseCache(path=str(cache_path))
+    assert cache.get("k") is None
+    cache.put("k", {"type": "raw", "data": {"response": "ok"}})
+    assert cache.get("k") == {"type": "raw", "data": {"response": "ok"}}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_entries_persist_across_instances(cache_path: Path):
+    """Tests that a new process (instance) sees yesterday's responses."""
+    ResponseCache(path=str(cache_path)).put("k", [1, 2, 3])
+    assert ResponseCache(path=str(cache_path)).get("k") == [1, 2, 3]
+
+def test_expired_entries_are_ignored(cache_path: Path):
+    """Tests TTL expiry."""
+    cache = ResponseCache(path=str(cache_path), ttl_seconds=0.05)
+    cache.put("k", "v")
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+def test_least_recently_used_entries_are_evicted(cache_path: Path):
+    """Tests that the entry limit evicts the least recently accessed entries."""
+    cache = ResponseCache(path=str(cache_path), max_entries=2)
+    cache.put("a", 1)
+    time.sleep(0.01)
+    cache.put("b", 2)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def test_size_limit_evicts_entries(cache_path: Path):
+    """Tests that the byte limit keeps the payload total bounded."""
+    cache = ResponseCache(path=str(cache_path), max_bytes=50)
+    for i in range(5):
+        cache.put(f"k{i}", "x" * 20)
+        time.sleep(0.01)
+    assert cache.get("k0") is None
+    assert cache.get("k4") == "x" * 20
+
+def test_puts_only_scan_the_table_when_purging_or_over_a_limit(cache_path: Path):
+    """Tests that running totals replace a full count per put and expired entries are purged every `purge_every` puts."""
+    cache = ResponseCache(path=str(cache_path), ttl_seconds=0.05, max_entries=3, purge_every=4)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    cache.put("old", "v")
+    time.sleep(0.1)
+    for i in range(2):
+        cache.put(f"k{i}", "v")
+    assert not any("COUNT(*)" in s or "ORDER BY last_accessed" in s for s in statements)
+    assert cache._count == 3
+
+    cache.put("k2", "v")
+    assert any("COUNT(*)" in s for s in statements)
+    assert not any("ORDER BY last_accessed" in s for s in statements)
+    assert (cache._count, cache._bytes) == (3, 9)
+    assert cache.get("k0") == "v"
+
+def test_read_only_mode_serves_hits_but_never_writes(cache_path: Path):
+    """Tests the CI read-only mode."""
+    ResponseCache(path=str(cache_path)).put("k", "v")
+    cache = ResponseCache(path=str(cache_path), read_only=True)
+    assert cache.get("k") == "v"
+    cache.put("new", "value")
+    assert ResponseCache(path=str(cache_path)).get("new") is None
+
+def test_read_only_mode_without_file_always_misses(tmp_path: Path):
+    """Tests that a missing cache file in read-only mode is not created."""
+    path = tmp_path / "missing.sqlite"
+    cache = ResponseCache(path=str(path), read_only=True)
+    assert cache.get("k") is None
+    assert not path.exists()
@@ -0,0 +1,110 @@
+import asyncio
+import random
+import pytest
+from typing import Any, List
+from utils.utils.llm_router import LLMBackend, LLMRouter
+from utils.utils.response_parser import ParsedResponse
+from utils.utils.cassette import CassetteMissError
+from utils.utils.retry import CircuitBreaker
+from utils.utils.streaming import CompletionStream
+
+class FakeLLM:
+    """A stand-in for LLMWrapper that answers with its name or fails."""
+
+    def __init__(self, name: str, provider: str = "openai", fail: bool = False):
+        self.name = name
+        self.provider = provider
+        self.fail = fail
+        self.models: List[str] = []
+
+    def get_parsed_completion(self, prompt: str, model: str, **kwargs: Any) -> ParsedResponse:
+        self.models.append(model)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return ParsedResponse(text=self.name, raw_response=None, metadata={}, provider=self.provider, model=model)
+
+    async def get_parsed_completion_async(self, prompt: str, model: str, **kwargs: Any) -> ParsedResponse:
+        await asyncio.sleep(0)
+        return self.get_parsed_completion(prompt, model, **kwargs)
+
+    def stream_completion(self, prompt: str, model: str, **kwargs: Any) -> CompletionStream:
+        def chunks():
+            if self.fail:
+                raise ConnectionError(f"{self.name} is down")
+            yield from ((part, {}) for part in (self.name, "!"))
+        return CompletionStream(chunks(), self.provider, model)
+
+def backend(name: str, weight: float = 1.0, fail: bool = False, **kwargs: Any) -> LLMBackend:
+    return LLMBackend(name=name, llm=FakeLLM(name, fail=fail), weight=weight, **kwargs)
+
+def test_traffic_follows_backend_weights():
+    """Tests that healthy backends receive traffic in proportion to their weights."""
+    router = LLMRouter([backend("a", weight=3), backend("b", weight=1)], rng=random.Random(0))
+    answers = [router.get_parsed_completion("p", "m").text for _ in range(400)]
+    assert 0.65 < answers.count("a") / 400 < 0.85
+
+def test_failed_backend_fails_over_and_is_ejected():
+    """Tests failover to a healthy backend and circuit breaking of the failing one."""
+    down = backend("down", weight=10, fail=True, breaker=CircuitBreaker(min_calls=3, window=5, cooldown=60))
+    router = LLMRouter([down, backend("up")], rng=random.Random(1))
+    answers = [router.get_parsed_completion("p", "m").text for _ in range(30)]
+
+    assert answers == ["up"] * 30
+    assert down.breaker.state == "open"
+    assert len(down.llm.models) == 3
+    stats = router.stats()
+    assert stats["failovers"] == 3
+    assert stats["backends"]["down"]["failures"] == 3
+    assert stats["backends"]["up"]["requests"] == 30
+
+def test_error_is_raised_when_every_backend_fails():
+    """Tests that the last error surfaces once all backends were tried."""
+    router = LLMRouter([backend("a", fail=True), backend("b", fail=True)])
+    with pytest.raises(ConnectionError):
+        router.get_parsed_completion("p", "m")
+
+def test_backend_model_override_and_async_routing():
+    """Tests per-backend model names on the async path."""
+    claude = backend("claude", model="claude-3-5-haiku")
+    router = LLMRouter([claude])
+
+    async def run():
+        return await asyncio.gather(*(router.get_parsed_completion_async("p", "gpt-4o-mini") for _ in range(3)))
+
+    assert [r.text for r in asyncio.run(run())] == ["claude"] * 3
+    assert claude.llm.models == ["claude-3-5-haiku"] * 3
+
+def test_stream_fails_over_before_first_text():
+    """Tests that a stream failing to start continues on another backend."""
+    router = LLMRouter([backend("down", weight=100, fail=True), backend("up")], rng=random.Random(0))
+    with router.stream_completion("p", "m") as stream:
+        text = "".join(stream)
+    assert text == "up!"
+    assert stream.metadata["backend"] == "up"
+    assert router.failovers == 1
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+def test_request_errors_are_raised_without_failing_over():
+    """
+    Tests that errors caused by the request are raised at once and not counted against backend health,
+    while auth errors fail over.
+    """
+    for error in (StatusError(400), CassetteMissError("not recorded")):
+        llms = [FakeLLM("a"), FakeLLM("b")]
+        for llm in llms:
+            llm.get_parsed_completion = lambda prompt, model, e=error, **kwargs: (_ for _ in ()).throw(e)
+        router = LLMRouter([LLMBackend(name=l.name, llm=l) for l in llms])
+        with pytest.raises(type(error)):
+            router.get_parsed_completion("p", "m")
+        assert router.failovers == 0 and all(b.failures == 0 for b in router.backends)
+
+    rejected, healthy = FakeLLM("a"), FakeLLM("b")
+    rejected.get_parsed_completion = lambda prompt, model, **kwargs: (_ for _ in ()).throw(StatusError(401))
+    router = LLMRouter([LLMBackend(name="a", llm=rejected, weight=1000.0), LLMBackend(name="b", llm=healthy)],
+                       rng=random.Random(0))
+    assert router.get_parsed_completion("p", "m").text == "b"
+    assert router.failovers == 1 and router.backends[0].failures == 1
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import httpx
+import pytest
+from typing import Any, Dict, List
+from utils.utils.http_pool import HTTPClientPool
+from utils.utils.llm_wrapper import LLMWrapper
+from utils.utils.response_parser import ResponseParser
+
+OLLAMA_DONE = {
+    "model": "llama3", "response": "", "done": True, "total_duration": 5_000_000,
+    "load_duration": 1_000, "prompt_eval_count": 12, "eval_count": 3, "eval_duration": 4_000_000
+}
+
+def ollama_handler(requests: List[Dict[str, Any]]):
+    def handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        assert request.url.path == "/api/generate"
+        if body["stream"]:
+            lines = [{"model": "llama3", "response": t, "done": False} for t in ('{"score"', ': 0.8}', " because")]
+            lines.append(OLLAMA_DONE)
+            return httpx.Response(200, content="\n".join(json.dumps(l) for l in lines).encode())
+        return httpx.Response(200, json={**OLLAMA_DONE, "response": '{"score": 0.8}'})
+    return handle
+
+def openai_handler(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    assert request.url.path == "/v1/chat/completions"
+    if body["stream"]:
+        events = [
+            {"model": "qwen", "choices": [{"delta": {"content": "Hel"}, "finish_reason": None}]},
+            {"model": "qwen", "choices": [{"delta": {"content": "lo"}, "finish_reason": "stop"}]},
+            {"model": "qwen", "choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 2}},
+        ]
+        payload = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=payload.encode())
+    return httpx.Response(200, json={
+        "model": "qwen",
+        "choices": [{"message": {"content": "Hello"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 2},
+        "timings": {"prompt_ms": 1.5, "predicted_ms": 20.0},
+    })
+
+def test_local_provider_needs_no_api_key(monkeypatch):
+    """Tests that the local provider works without credentials."""
+    monkeypatch.delenv("LOCAL_API_KEY", raising=False)
+    wrapper = LLMWrapper("local", base_url="http://ollama:11434")
+    assert wrapper.client.base_url == "http://ollama:11434"
+
+def test_ollama_completion_is_parsed_with_timings():
+    """Tests an Ollama round trip including options mapping and timing metadata."""
+    requests: List[Dict[str, Any]] = []
+    pool = HTTPClientPool(transport=httpx.MockTransport(ollama_handler(requests)))
+    wrapper = LLMWrapper("local", base_url="http://ollama:11434", http_pool=pool)
+    parsed = wrapper.get_parsed_completion("prompt", "llama3", temperature=0, max_tokens=64)
+
+    assert requests[0]["options"] == {"temperature": 0, "num_predict": 64}
+    assert parsed.text == '{"score": 0.8}'
+    assert parsed.provider == "local" and parsed.model == "llama3"
+    assert parsed.metadata["eval_count"] == 3 and parsed.metadata["total_duration"] == 5_000_000
+    assert parsed.metadata["usage"] == {"input_tokens": 12, "output_tokens": 3}
+
+def test_openai_compatible_server_is_normalized():
+    """Tests that an OpenAI-compatible local server response becomes an Ollama-style dict."""
+    pool = HTTPClientPool(transport=httpx.MockTransport(openai_handler))
+    wrapper = LLMWrapper("local", base_url="http://vllm:8000", local_api_style="openai", http_pool=pool)
+    response = wrapper.get_completion("prompt", "qwen")
+
+    assert response["response"] == "Hello" and response["done_reason"] == "stop"
+    assert response["prompt_eval_count"] == 5 and response["eval_count"] == 2
+    assert response["eval_duration"] == 20_000_000
+    assert ResponseParser.parse(response, "local").text == "Hello"
+
+def test_async_local_completion():
+    """Tests the async path over the pooled async client."""
+    pool = HTTPClientPool(transport=httpx.MockTransport(ollama_handler([])))
+    wrapper = LLMWrapper("local", base_url="http://ollama:11434", http_pool=pool)
+
+    async def run():
+        return await asyncio.gather(*(wrapper.get_parsed_completion_async("p", "llama3") for _ in range(5)))
+
+    assert [p.text for p in asyncio.run(run())] == ['{"score": 0.8}'] * 5
+
+@pytest.mark.parametrize("style,handler,expected,model", [
+    ("ollama", ollama_handler([]), '{"score": 0.8} because', "llama3"),
+    ("openai", openai_handler, "Hello", "qwen"),
+])
+def test_streaming_yields_tokens_and_final_metadata(style, handler, expected, model):
+    """Tests token streaming for both server styles."""
+    pool = HTTPClientPool(transport=httpx.MockTransport(handler))
+    wrapper = LLMWrapper("local", base_url="http://server", local_api_style=style, http_pool=pool)
+    with wrapper.stream_completion("prompt", model) as stream:
+        chunks = list(stream)
+
+    assert "".join(chunks) == expected and len(chunks) >= 2
+    assert stream.finished and not stream.stopped_early
+    assert stream.metadata["model"] == model
+    assert "total_duration" in stream.metadata and "time_to_first_token" in stream.metadata
+
+def test_closing_a_stream_early_marks_it():
+    """Tests that a consumer can stop a stream before the server finishes."""
+    pool = HTTPClientPool(transport=httpx.MockTransport(ollama_handler([])))
+    wrapper = LLMWrapper("local", base_url="http://ollama:11434", http_pool=pool)
+    stream = wrapper.stream_completion("prompt", "llama3")
+    for chunk in stream:
+        break
+    stream.close()
+    assert stream.text == '{"score"' and stream.stopped_early
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import random
+import pytest
+from utils.utils.judge import LLMJudge
+from utils.utils.llm_wrapper import LLMWrapper
+from utils.utils.mock_llm_server import LatencyDistribution, MockLLMServer, mock_verdict
+from utils.utils.retry import RetryPolicy
+
+ROW = {"question": "What is the capital of France?", "answer": "Paris.", "context": "Paris is the capital of France."}
+
+@pytest.fixture
+def server():
+    with MockLLMServer(latency=LatencyDistribution("fixed", median=0.0), seed=0) as mock:
+        yield mock
+
+@pytest.mark.parametrize("provider", ["openai", "anthropic", "local"])
+def test_endpoints_serve_completions_and_streams(server: MockLLMServer, provider: str):
+    """Tests each provider API, non-streaming, async and streaming."""
+    llm = LLMWrapper(provider, api_key="mock-key", base_url=server.base_url(provider))
+    parsed = llm.get_parsed_completion("Rate this.", "mock-model")
+    assert json.loads(parsed.text) == {"score": 0.8, "reason": "Mock verdict."}
+    assert parsed.metadata["usage"]
+    assert asyncio.run(llm.get_completion_async("Rate this.", "mock-model")) is not None
+    with llm.stream_completion("Rate this.", "mock-model") as stream:
+        assert json.loads("".join(stream))["score"] == 0.8
+    endpoint = "ollama" if provider == "local" else provider
+    assert server.stats()["by_endpoint"][endpoint] == 3
+
+@pytest.mark.parametrize("score_first", [False, True])
+def test_verdicts_follow_the_judge_prompt(score_first: bool):
+    """Tests that templated verdicts answer single, batch and group judge prompts."""
+    judge = LLMJudge(None, model="m", metrics=["faithfulness", "hallucination"], score_first=score_first)
+    verdict = json.loads(mock_verdict(judge.build_batch_prompt("faithfulness", [ROW, ROW, ROW]), 0.5))
+    if score_first:
+        assert verdict["scores"] == {"1": 0.5, "2": 0.5, "3": 0.5}
+    else:
+        assert [v["id"] for v in verdict["verdicts"]] == [1, 2, 3]
+    verdict = json.loads(mock_verdict(judge.build_group_prompt(["faithfulness", "hallucination"], ROW), 0.5))
+    assert set(verdict["scores"] if score_first else verdict) == {"faithfulness", "hallucination"}
+    assert json.loads(mock_verdict(judge.build_prompt("faithfulness", ROW), 0.5))["score"] == 0.5
+
+def test_injected_429s_are_retried(server: MockLLMServer):
+    """Tests 429 injection with Retry-After and server errors surfacing after retries."""
+    server.rate_limit_rate, server.retry_after = 0.5, 0.01
+    llm = LLMWrapper("openai", api_key="mock-key", base_url=server.base_url("openai"),
+                     retry_policy=RetryPolicy(max_retries=10, initial_delay=0.01, max_delay=0.05))
+    for _ in range(10):
+        assert llm.get_parsed_completion("Rate this.", "mock-model").text
+    stats = server.stats()
+    assert stats["completed"] == 10 and stats["rate_limited"] > 0
+    assert stats["requests"] == stats["completed"] + stats["rate_limited"]
+
+    server.rate_limit_rate, server.error_rate = 0.0, 1.0
+    failing = LLMWrapper("openai", api_key="mock-key", base_url=server.base_url("openai"),
+                         retry_policy=RetryPolicy(max_retries=1, initial_delay=0.01))
+    with pytest.raises(Exception) as error:
+        failing.get_completion("Rate this.", "mock-model")
+    assert getattr(error.value, "status_code", None) == 500 or "500" in str(error.value)
+
+def test_latency_distributions():
+    """Tests fixed, uniform and lognormal latency sampling."""
+    rng = random.Random(0)
+    assert LatencyDistribution("fixed", median=0.3).sample(rng) == 0.3
+    assert all(0.1 <= LatencyDistribution("uniform", low=0.1, high=0.2).sample(rng) <= 0.2 for _ in range(50))
+    samples = sorted(LatencyDistribution.from_config({"distribution": "lognormal", "median": 0.2}).sample(rng) for _ in range(501))
+    assert samples[250] == pytest.approx(0.2, rel=0.2)
+    with pytest.raises(ValueError):
+        LatencyDistribution.from_config({"kind": "pareto"})
@@ -0,0 +1,98 @@
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from utils.utils.profiler import StageProfiler
+
+def test_stages_accumulate_time_and_calls():
+    """
+    Tests that repeated entries of the same stage accumulate call counts.
+    """
+    profiler = StageProfiler(enabled=True)
+    profiler.start()
+    for _ in range(3):
+        with profiler.stage("metric:faithfulness"):
+            sum(range(1000))
+    with profiler.stage("reporting"):
+        pass
+    profiler.stop()
+
+    report = profiler.report()
+    assert report["stages"]["metric:faithfulness"]["calls"] == 3
+    assert report["stages"]["reporting"]["calls"] == 1
+    assert report["stages"]["metric:faithfulness"]["cumulative_seconds"] >= 0.0
+    assert report["hotspots"], "cProfile hotspots should be collected for the run."
+
+def _worker_hotspot() -> int:
+    return sum(i * i for i in range(20000))
+
+def test_worker_thread_work_is_merged_into_hotspots():
+    """
+    Tests that work run in pool threads under `worker()` shows up in the run's hotspots.
+    """
+    profiler = StageProfiler(enabled=True)
+    profiler.start()
+
+    def task() -> int:
+        with profiler.worker():
+            return _worker_hotspot()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda _: task(), range(4)))
+    profiler.stop()
+
+    report = profiler.report()
+    assert any("_worker_hotspot" in h["function"] for h in report["hotspots"])
+    assert 2 <= report["profiled_threads"] <= 3
+
+def test_stage_time_is_recorded_when_block_raises():
+    """
+    Tests that a failing stage is still accounted for.
+    """
+    profiler = StageProfiler(enabled=True)
+    with pytest.raises(RuntimeError):
+        with profiler.stage("data_load"):
+            raise RuntimeError("boom")
+    assert profiler.stages["data_load"]["calls"] == 1
+
+def test_memory_snapshots_taken_at_stage_boundaries():
+    """
+    Tests that tracemalloc snapshots are recorded on stage enter and exit.
+    """
+    profiler = StageProfiler(enabled=True, trace_memory=True)
+    profiler.start()
+    with profiler.stage("model_init"):
+        _ = [0] * 10000
+    report = profiler.report()
+    profiler.stop()
+
+    boundaries = [(s["stage"], s["boundary"]) for s in report["memory_snapshots"]]
+    assert boundaries == [("model_init", "enter"), ("model_init", "exit")]
+    assert report["top_allocations"]
+
+def test_disabled_profiler_records_nothing(tmp_path: Path):
+    """
+    Tests that a disabled profiler is a no-op and writes no report.
+    """
+    profiler = StageProfiler(enabled=False)
+    profiler.start()
+    with profiler.stage("data_load"):
+        pass
+    assert profiler.stages == {}
+    assert profiler.write_report(str(tmp_path)) is None
+
+def test_write_report_creates_json_file(tmp_path: Path):
+    """
+    Tests that the report is written as JSON into the output directory.
+    """
+    profiler = StageProfiler(enabled=True)
+    profiler.start()
+    with profiler.stage("data_load"):
+        pass
+    path = profiler.write_report(str(tmp_path / "reports"))
+
+    assert path == tmp_path / "reports" / "profile_report.json"
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert "data_load" in data["stages"]
+    assert data["total_seconds"] >= 0.0
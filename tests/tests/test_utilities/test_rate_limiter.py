@@ -0,0 +1,101 @@
+import multiprocessing
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from utils.utils.llm_wrapper import LLMWrapper
+from utils.utils.rate_limiter import SharedRateLimiter, estimate_tokens
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+LIMITS = {"openai": {"requests_per_minute": 60, "tokens_per_minute": 6000}}
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    return str(tmp_path / "limits.sqlite")
+
+def test_request_bucket_refills_over_time(db_path: str):
+    """Tests RPM: a full minute of budget, then one request per second."""
+    clock = FakeClock()
+    limiter = SharedRateLimiter(LIMITS, path=db_path, clock=clock)
+    for _ in range(60):
+        assert limiter.try_acquire("openai") == 0.0
+    assert limiter.try_acquire("openai") == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter.try_acquire("openai") == 0.0
+
+def test_burst_seconds_caps_the_bucket(db_path: str):
+    """Tests that a short burst window spreads requests evenly instead of front-loading a minute."""
+    clock = FakeClock()
+    limiter = SharedRateLimiter({"openai": {"requests_per_minute": 600, "burst_seconds": 0.5}}, path=db_path, clock=clock)
+    assert [limiter.try_acquire("openai") == 0.0 for _ in range(6)] == [True] * 5 + [False]
+    clock.now += 0.1
+    assert limiter.try_acquire("openai") == 0.0
+    clock.now += 60.0
+    assert sum(limiter.try_acquire("openai") == 0.0 for _ in range(10)) == 5
+
+def test_token_bucket_limits_large_calls(db_path: str):
+    """Tests TPM: a call is admitted only when its tokens fit."""
+    clock = FakeClock()
+    limiter = SharedRateLimiter(LIMITS, path=db_path, clock=clock)
+    assert limiter.try_acquire("openai", tokens=5000) == 0.0
+    assert limiter.try_acquire("openai", tokens=2000) == pytest.approx(10.0)
+    limiter.adjust("openai", -1000)
+    assert limiter.try_acquire("openai", tokens=2000) == 0.0
+
+def test_unlimited_provider_is_never_throttled(db_path: str):
+    """Tests that providers without limits pass straight through."""
+    limiter = SharedRateLimiter(LIMITS, path=db_path)
+    assert all(limiter.try_acquire("anthropic", tokens=10 ** 9) == 0.0 for _ in range(100))
+
+def test_instances_share_one_budget(db_path: str):
+    """Tests that separate limiter instances (e.g. CLI runs) draw from the same buckets."""
+    clock = FakeClock()
+    first = SharedRateLimiter(LIMITS, path=db_path, clock=clock)
+    second = SharedRateLimiter(LIMITS, path=db_path, clock=clock)
+    for _ in range(30):
+        assert first.try_acquire("openai") == 0.0
+        assert second.try_acquire("openai") == 0.0
+    assert first.try_acquire("openai") > 0
+    assert second.try_acquire("openai") > 0
+
+def _grant_count(path: str, queue) -> None:
+    limiter = SharedRateLimiter({"openai": {"requests_per_minute": 50}}, path=path)
+    queue.put(sum(limiter.try_acquire("openai") == 0.0 for _ in range(40)))
+
+def test_waited_seconds_adds_up_across_threads(db_path: str):
+    """Tests that waits recorded concurrently by many threads are all counted."""
+    limiter = SharedRateLimiter({"openai": {"requests_per_minute": 6000, "burst_seconds": 0.01}}, path=db_path)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        waits = list(executor.map(lambda _: limiter.acquire("openai"), range(48)))
+    assert sum(wait > 0 for wait in waits) > 0
+    assert limiter.waited_seconds == pytest.approx(sum(waits))
+
+def test_processes_share_one_budget(db_path: str):
+    """Tests that worker processes together never exceed the combined budget."""
+    SharedRateLimiter({}, path=db_path)
+    queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_grant_count, args=(db_path, queue)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    granted = sum(queue.get() for _ in workers)
+    # 50 requests of burst plus whatever refilled while the workers ran.
+    assert 50 <= granted < 55
+
+def test_estimate_tokens():
+    """Tests the pre-call token estimate (prompt characters / 4 plus max_tokens)."""
+    assert estimate_tokens("x" * 400, max_tokens=100) == 200
+
+def test_named_backends_draw_from_their_provider_budget(db_path: str):
+    """Tests that routed backends use the provider's limits unless the limiter has an entry for the backend name."""
+    limiter = SharedRateLimiter({**LIMITS, "openai-secondary": {"requests_per_minute": 10}}, path=db_path)
+    primary = LLMWrapper("openai", api_key="k", name="openai-primary", rate_limiter=limiter)
+    secondary = LLMWrapper("openai", api_key="k", name="openai-secondary", rate_limiter=limiter)
+    assert primary._rate_key == "openai" and secondary._rate_key == "openai-secondary"
+
@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import MagicMock
 from typing import Dict, Any
-from utils.utils.response_parser import ResponseParser, ParsedResponse
+from utils.utils.response_parser import ResponseParser, ParsedResponse, StreamingJSONExtractor
 
 # --- Mock Response Fixtures ---
 
@@ -61,6 +61,43 @@ def test_extract_json(input_text: str, expected_json: Any):
     json_data = ResponseParser.extract_json(input_text)
     assert json_data == expected_json, "JSON extraction did not produce the expected output."
 
+@pytest.mark.parametrize("input_text, expected_json", [
+    ('```json\n{"score": 0.5}\n```\nThe score is {high}.', {"score": 0.5}),
+    ('{"score": 1, "reason": "uses {x} and \\"}\\""} {"score": 0}', {"score": 1, "reason": 'uses {x} and "}"'}),
+    ('Sets like {a, b} come first. {"score": 0.2}', {"score": 0.2}),
+])
+def test_extract_json_tolerates_fences_braces_and_extra_objects(input_text: str, expected_json: Any):
+    """Tests that the first valid object wins over fences, braces in strings and invalid spans."""
+    assert ResponseParser.extract_json(input_text) == expected_json
+
+def test_extract_all_json_returns_every_object():
+    """Tests extraction of several top-level objects."""
+    text = 'Verdicts: {"id": 1, "score": 0.1}\n{"id": 2, "score": 0.9} done'
+    assert ResponseParser.extract_all_json(text) == [{"id": 1, "score": 0.1}, {"id": 2, "score": 0.9}]
+
+def test_streaming_extractor_completes_objects_across_chunks():
+    """Tests that objects split over arbitrary chunk boundaries are found once complete."""
+    text = 'Sure: {"score": 0.7, "reason": "a } brace"} trailing {"score": 0.1}'
+    extractor = StreamingJSONExtractor()
+    completed = [extractor.feed(text[i:i + 3]) for i in range(0, len(text), 3)]
+    first_done = next(i for i, found in enumerate(completed) if found)
+    assert 3 * (first_done + 1) >= text.index("} trailing") + 1 > 3 * first_done
+    assert extractor.first == {"score": 0.7, "reason": "a } brace"}
+    assert extractor.objects == [{"score": 0.7, "reason": "a } brace"}, {"score": 0.1}]
+
+@pytest.mark.parametrize("text, expected", [
+    ('The answer {is clear. {"score": 0.8, "reason": "ok"} done', {"score": 0.8, "reason": "ok"}),
+    ('Using { "x" as a placeholder, {"score": 0.3}', {"score": 0.3}),
+    ('Result: {see "below" {"score": 1}}', {"score": 1}),
+])
+def test_streaming_extractor_recovers_from_stray_braces(text: str, expected: Dict[str, Any]):
+    """Tests that an unbalanced or non-JSON brace in prose does not hide the object after it, however the text is chunked."""
+    for size in (1, 4, len(text)):
+        extractor = StreamingJSONExtractor()
+        for i in range(0, len(text), size):
+            extractor.feed(text[i:i + size])
+        assert extractor.first == expected and extractor.text == text
+
 # --- Tests for Provider-Specific Parsers ---
 
 def test_parse_openai(sample_openai_response: MagicMock):
@@ -0,0 +1,147 @@
+import asyncio
+import httpx
+import pytest
+from typing import Dict, List
+from utils.utils.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    RetryError,
+    RetryPolicy,
+    is_retryable,
+    retry_after_seconds,
+    retry_with_exponential_backoff,
+)
+
+class StatusError(Exception):
+    """Mimics an SDK APIStatusError carrying an httpx response."""
+
+    def __init__(self, status: int, headers: Dict[str, str] = None):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.response = httpx.Response(status, headers=headers or {})
+
+def flaky(errors: List[Exception], result: str = "ok"):
+    """Returns a callable raising the given errors in order, then returning `result`."""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    func.calls = calls
+    return func
+
+@pytest.fixture
+def sleeps() -> List[float]:
+    return []
+
+def test_errors_are_classified():
+    """Tests retryable vs fatal classification."""
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert is_retryable(httpx.ConnectError("boom"))
+    assert not is_retryable(StatusError(401))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(ValueError("bad"))
+
+def test_fatal_errors_are_not_retried(sleeps: List[float]):
+    """Tests that an auth error fails immediately instead of burning backoff time."""
+    func = flaky([StatusError(401)])
+    with pytest.raises(StatusError):
+        RetryPolicy(sleep=sleeps.append).call(func)
+    assert len(func.calls) == 1 and sleeps == []
+
+def test_routed_backend_policy_leaves_failover_to_the_router(sleeps: List[float]):
+    """Tests that a routed backend retries connection failures in place but raises overload and server errors at once."""
+    budget = RetryBudget(min_retries=5)
+    policy = RetryPolicy(sleep=sleeps.append, budget=budget, breaker_factory=CircuitBreaker)
+    routed = policy.for_routed_backend()
+    assert routed.budget is budget and routed.breaker_factory is None
+
+    func = flaky([httpx.ConnectError("reset")])
+    assert routed.call(func, breaker_key="openai-primary") == "ok" and len(func.calls) == 2
+    for status in (429, 503):
+        func = flaky([StatusError(status)])
+        with pytest.raises(StatusError):
+            routed.call(func, breaker_key="openai-primary")
+        assert len(func.calls) == 1
+    assert len(sleeps) == 1 and routed.breakers == {}
+
+def test_first_delay_is_initial_delay(sleeps: List[float]):
+    """Tests the exponential schedule starts at initial_delay."""
+    func = flaky([StatusError(500), StatusError(500), StatusError(500)])
+    assert RetryPolicy(initial_delay=1.0, jitter=False, sleep=sleeps.append).call(func) == "ok"
+    assert sleeps == [1.0, 2.0, 4.0]
+
+def test_retry_after_headers_are_honoured(sleeps: List[float]):
+    """Tests server-provided delays (seconds and milliseconds), capped at max_delay."""
+    assert retry_after_seconds(StatusError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(StatusError(429, {"retry-after-ms": "250"})) == 0.25
+    func = flaky([StatusError(429, {"retry-after": "120"})])
+    RetryPolicy(max_delay=30.0, sleep=sleeps.append).call(func)
+    assert sleeps == [30.0]
+
+def test_exhausted_retries_raise_retry_error_from_last_error(sleeps: List[float]):
+    """Tests that the final error is chained instead of flattened into a bare Exception."""
+    last = StatusError(503)
+    with pytest.raises(RetryError) as info:
+        RetryPolicy(max_retries=2, sleep=sleeps.append).call(flaky([StatusError(503), StatusError(503), last]))
+    assert info.value.__cause__ is last and info.value.attempts == 3
+
+def test_retry_budget_is_shared_across_calls(sleeps: List[float]):
+    """Tests that a run-wide budget stops retry storms."""
+    policy = RetryPolicy(budget=RetryBudget(ratio=0.0, min_retries=2), sleep=sleeps.append)
+    policy.call(flaky([StatusError(500), StatusError(500)]))
+    with pytest.raises(RetryError, match="budget"):
+        policy.call(flaky([StatusError(500)]))
+    assert policy.budget.to_dict() == {"requests": 2, "retries": 2, "exhausted": 1}
+
+def test_circuit_breaker_opens_and_recovers():
+    """Tests closed -> open -> half-open -> closed transitions."""
+    breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4, cooldown=0.0)
+    for success in (True, False, False, True):
+        assert breaker.allow()
+        breaker.record(success)
+    assert breaker.state == "open" and breaker.trips == 1
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+
+def test_open_breaker_fails_fast(sleeps: List[float]):
+    """Tests that calls for a provider with an open breaker are not attempted."""
+    policy = RetryPolicy(
+        max_retries=10,
+        breaker_factory=lambda: CircuitBreaker(window=3, min_calls=3, cooldown=60.0),
+        sleep=sleeps.append
+    )
+    func = flaky([StatusError(500)] * 10)
+    with pytest.raises(CircuitOpenError):
+        policy.call(func, breaker_key="openai")
+    assert len(func.calls) == 3
+    assert policy.stats()["circuit_breakers"]["openai"]["state"] == "open"
+    assert policy.breaker("anthropic").allow()
+
+def test_async_policy_retries(monkeypatch):
+    """Tests the coroutine variant."""
+    async def no_sleep(delay: float) -> None:
+        return None
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+    attempts = []
+
+    async def func():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise httpx.ReadTimeout("slow")
+        return "done"
+
+    assert asyncio.run(RetryPolicy().acall(func)) == "done"
+    assert len(attempts) == 3
+
+def test_decorator_remains_compatible(monkeypatch):
+    """Tests the legacy decorator still retries transient failures."""
+    monkeypatch.setattr("utils.utils.retry.time.sleep", lambda s: None)
+    func = flaky([StatusError(502)])
+    assert retry_with_exponential_backoff(func)() == "ok"
@@ -0,0 +1,33 @@
+import pytest
+from utils.utils.self_consistency import SelfConsistency, t_quantile
+
+def test_agreeing_samples_stop_at_the_minimum():
+    """Tests the agreement rule, the minimum and maximum sample counts."""
+    policy = SelfConsistency(max_samples=5, min_samples=2, tolerance=0.1)
+    assert not policy.converged([0.8])
+    assert policy.converged([0.8, 0.85])
+    assert not policy.converged([0.8, 0.4])
+    assert policy.converged([0.0, 1.0, 0.0, 1.0, 0.5])
+
+def test_sequential_test_stops_once_the_mean_is_pinned_down():
+    """Tests the confidence-interval rule and the threshold-side rule."""
+    policy = SelfConsistency(max_samples=10, tolerance=0.1, thresholds={"faithfulness": 0.5})
+    scores = [0.7, 0.8, 0.75, 0.85, 0.72, 0.78]
+    assert max(scores) - min(scores) > 0.1 and policy.converged(scores)
+    assert not policy.converged([0.9, 0.6, 0.95])
+    assert policy.converged([0.9, 0.75, 0.95], "faithfulness")
+    assert not policy.converged([0.9, 0.75, 0.95], "answer_relevance")
+
+def test_rounds_aggregate_and_stats():
+    """Tests round sizes, mean and variance, and the telemetry counters."""
+    policy = SelfConsistency(max_samples=5, concurrency=2)
+    assert [policy.round_size(n) for n in (0, 2, 4, 5)] == [2, 2, 1, 0]
+    mean, variance = policy.aggregate([0.6, 0.8])
+    assert mean == pytest.approx(0.7) and variance == pytest.approx(0.02)
+    assert policy.aggregate([0.4]) == (0.4, 0.0)
+    policy.record(2)
+    policy.record(5)
+    assert policy.stats() == {"verdicts": 2, "samples": 7, "mean_samples": 3.5, "early_stops": 1, "max_samples": 5}
+    assert t_quantile(0.975, 4) == pytest.approx(2.776, rel=0.01)
+    with pytest.raises(ValueError):
+        SelfConsistency(max_samples=2, min_samples=3)
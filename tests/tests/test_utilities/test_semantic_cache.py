@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from utils.utils.semantic_cache import SemanticVerdictCache, normalize_payload
+
+def bag_of_words(text: str) -> np.ndarray:
+    """Deterministic toy embedding: hashed bag of words."""
+    vector = np.zeros(64)
+    for word in text.split():
+        vector[sum(map(ord, word)) % 64] += 1.0
+    return vector
+
+@pytest.fixture
+def cache() -> SemanticVerdictCache:
+    return SemanticVerdictCache(embed_fn=bag_of_words, threshold=0.95)
+
+def test_normalize_payload_ignores_case_and_whitespace():
+    """Tests that formatting-only differences normalize to the same payload."""
+    a = normalize_payload("faithfulness", {"answer": "Paris  is the capital.", "context": ["A", "B"]}, ["answer", "context"])
+    b = normalize_payload("faithfulness", {"answer": "paris is\nthe capital.", "context": ["a", "b"]}, ["answer", "context"])
+    assert a == b
+    assert a.startswith("faithfulness\n")
+
+def test_near_duplicate_payload_is_a_hit(cache: SemanticVerdictCache):
+    """Tests that a verdict is reused for a payload above the similarity threshold."""
+    cache.add("faithfulness", "answer: paris is the capital of france", {"score": 0.9, "reason": "ok"})
+    hit = cache.lookup("faithfulness", "answer: paris is the capital of france")
+    assert hit is not None
+    verdict, similarity = hit
+    assert verdict["score"] == 0.9
+    assert similarity == pytest.approx(1.0)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+def test_dissimilar_payload_or_other_metric_misses(cache: SemanticVerdictCache):
+    """Tests that distant payloads and other metrics never share verdicts."""
+    cache.add("faithfulness", "answer: paris is the capital of france", {"score": 0.9})
+    assert cache.lookup("faithfulness", "answer: the moon orbits the earth every month") is None
+    assert cache.lookup("hallucination", "answer: paris is the capital of france") is None
+    assert cache.misses == 2
+
+def test_max_entries_caps_the_index():
+    """Tests that verdicts beyond the per-metric cap are not indexed."""
+    cache = SemanticVerdictCache(embed_fn=bag_of_words, threshold=0.99, max_entries=1)
+    cache.add("faithfulness", "first payload", {"score": 0.1})
+    cache.add("faithfulness", "completely different words here", {"score": 0.2})
+    assert cache.lookup("faithfulness", "completely different words here") is None
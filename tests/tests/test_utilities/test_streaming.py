@@ -0,0 +1,142 @@
+import json
+import pytest
+from anthropic import Anthropic
+from openai import OpenAI
+from typing import Any, Dict, List
+from utils.utils.concurrency import ConcurrencyController
+from utils.utils.http_pool import HTTPClientPool, sdk_http_module
+from utils.utils.llm_wrapper import LLMWrapper
+from utils.utils.retry import CircuitBreaker, RetryPolicy
+from utils.utils.usage import UsageTracker
+
+def sse(events: List[Any], named: bool = False) -> bytes:
+    lines = []
+    for event in events:
+        if named:
+            lines.append(f"event: {event['type']}")
+        lines.append(f"data: {json.dumps(event)}\n")
+    return ("\n".join(lines) + ("" if named else "\ndata: [DONE]\n\n")).encode()
+
+def openai_chunk(text: str, finish: str = None, usage: Dict[str, int] = None) -> Dict[str, Any]:
+    choices = [] if usage else [{"index": 0, "delta": {"content": text}, "finish_reason": finish}]
+    return {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o-mini", "choices": choices, "usage": usage}
+
+OPENAI_EVENTS = [
+    openai_chunk('{"score": 0.7,'),
+    openai_chunk(' "reason": "ok"}'),
+    openai_chunk(" Because the answer...", finish="stop"),
+    openai_chunk("", usage={"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}),
+]
+
+ANTHROPIC_EVENTS = [
+    {"type": "message_start", "message": {
+        "id": "m", "type": "message", "role": "assistant", "content": [], "model": "claude-3-5-haiku",
+        "stop_reason": None, "stop_sequence": None, "usage": {"input_tokens": 11, "output_tokens": 1}}},
+    {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": '{"score": 0.4}'}},
+    {"type": "content_block_stop", "index": 0},
+    {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None}, "usage": {"output_tokens": 9}},
+    {"type": "message_stop"},
+]
+
+def wrapper_for(provider: str, body: bytes, requests: List[Dict[str, Any]]) -> LLMWrapper:
+    http = sdk_http_module(OpenAI if provider == "openai" else Anthropic)
+
+    def handle(request):
+        requests.append(json.loads(request.content))
+        return http.Response(200, content=body, headers={"content-type": "text/event-stream"})
+    pool = HTTPClientPool(transport=http.MockTransport(handle))
+    return LLMWrapper(provider, api_key="test-key", http_pool=pool)
+
+def test_openai_stream_yields_text_and_usage():
+    """Tests OpenAI streaming with the trailing usage chunk."""
+    requests: List[Dict[str, Any]] = []
+    with wrapper_for("openai", sse(OPENAI_EVENTS), requests).stream_completion("p", "gpt-4o-mini", temperature=0) as stream:
+        text = "".join(stream)
+    assert requests[0]["stream"] is True and requests[0]["stream_options"] == {"include_usage": True}
+    assert text == '{"score": 0.7, "reason": "ok"} Because the answer...'
+    assert stream.metadata["usage"]["completion_tokens"] == 20
+    assert stream.metadata["finish_reason"] == "stop"
+    assert stream.to_parsed().provider == "openai"
+
+def test_anthropic_stream_yields_text_and_usage():
+    """Tests Anthropic streaming events including usage and stop reason."""
+    with wrapper_for("anthropic", sse(ANTHROPIC_EVENTS, named=True), []).stream_completion("p", "claude-3-5-haiku") as stream:
+        text = "".join(stream)
+    assert text == '{"score": 0.4}'
+    assert stream.metadata["usage"] == {**stream.metadata["usage"], "input_tokens": 11, "output_tokens": 9}
+    assert stream.metadata["stop_reason"] == "end_turn"
+    assert stream.metadata["model"] == "claude-3-5-haiku"
+
+def test_stream_can_be_stopped_early():
+    """Tests that closing mid-stream marks the stream and keeps the partial text."""
+    stream = wrapper_for("openai", sse(OPENAI_EVENTS), []).stream_completion("p", "gpt-4o-mini")
+    for _ in stream:
+        if stream.text.endswith("}"):
+            break
+    stream.close()
+    assert stream.stopped_early and stream.text == '{"score": 0.7, "reason": "ok"}'
+
+def test_closed_stream_records_usage():
+    """Tests that a stream reports its usage to the tracker when closed."""
+    wrapper = wrapper_for("openai", sse(OPENAI_EVENTS), [])
+    wrapper.usage = UsageTracker()
+    with wrapper.stream_completion("p", "gpt-4o-mini") as stream:
+        "".join(stream)
+    record, = wrapper.usage.records
+    assert (record.input_tokens, record.output_tokens) == (10, 20) and not record.estimated
+
+@pytest.mark.parametrize("provider", ["openai", "anthropic"])
+def test_early_closed_stream_estimates_missing_usage(provider: str):
+    """Tests that a stream closed before its final usage is recorded with estimated, non-zero token counts."""
+    body = sse(OPENAI_EVENTS) if provider == "openai" else sse(ANTHROPIC_EVENTS, named=True)
+    wrapper = wrapper_for(provider, body, [])
+    wrapper.usage = UsageTracker({"m": {"input_per_million": 1.0, "output_per_million": 1.0}})
+    prompt = "Judge this answer. " * 20
+    with wrapper.stream_completion(prompt, "m") as stream:
+        next(iter(stream))
+    record, = wrapper.usage.records
+    assert stream.stopped_early and record.estimated
+    assert record.input_tokens == (len(prompt) // 4 if provider == "openai" else 11)
+    assert record.output_tokens == max(len(stream.text) // 4, 1) and record.cost > 0
+    assert wrapper.usage.summary()["totals"]["estimated_calls"] == 1
+
+class RecordingRateLimiter:
+    def __init__(self):
+        self.calls: List[Any] = []
+
+    def acquire(self, provider: str, tokens: int) -> None:
+        self.calls.append(("acquire", provider, tokens))
+
+    def adjust(self, provider: str, tokens: int) -> None:
+        self.calls.append(("adjust", provider, tokens))
+
+def test_stream_open_is_retried_and_limited():
+    """
+    Tests that a 429 while opening a stream is retried, and that every attempt takes rate-limit budget and a concurrency slot.
+    """
+    http = sdk_http_module(OpenAI)
+    statuses = [429, 200]
+
+    def handle(request):
+        status = statuses.pop(0)
+        if status != 200:
+            return http.Response(status, json={"error": {"message": "slow down"}}, headers={"retry-after": "0"})
+        return http.Response(200, content=sse(OPENAI_EVENTS), headers={"content-type": "text/event-stream"})
+    sleeps: List[float] = []
+    policy = RetryPolicy(sleep=sleeps.append, breaker_factory=CircuitBreaker)
+    concurrency = ConcurrencyController(initial_limit=4)
+    rate_limiter = RecordingRateLimiter()
+    wrapper = LLMWrapper(
+        "openai", api_key="test-key", http_pool=HTTPClientPool(transport=http.MockTransport(handle)),
+        retry_policy=policy, concurrency=concurrency, rate_limiter=rate_limiter
+    )
+    with wrapper.stream_completion("p", "gpt-4o-mini", temperature=0) as stream:
+        assert concurrency.limiter("openai", "gpt-4o-mini").in_flight == 1
+        text = "".join(stream)
+    assert text.startswith('{"score": 0.7') and len(sleeps) == 1
+    limiter = concurrency.limiter("openai", "gpt-4o-mini")
+    assert limiter.in_flight == 0 and limiter.decreases == 1
+    assert [call[0] for call in rate_limiter.calls] == ["acquire", "acquire", "adjust"]
+    assert rate_limiter.calls[2][2] == 30 - rate_limiter.calls[1][2]
+    assert list(policy.breaker("openai")._outcomes) == [False, True]
@@ -0,0 +1,46 @@
+import json
+import pytest
+from pathlib import Path
+from utils.utils.telemetry import MetricCostModel, RunTelemetry
+
+def test_unknown_tasks_use_default_cost():
+    """Tests that never-seen task types get the (pessimistic) default estimate."""
+    model = MetricCostModel(default_cost=2.0)
+    assert model.estimate("faithfulness") == 2.0
+
+def test_observations_update_ewma():
+    """Tests that observed durations are folded into an exponentially weighted mean."""
+    model = MetricCostModel(alpha=0.5)
+    model.observe("redundancy", 0.01)
+    assert model.estimate("redundancy") == pytest.approx(0.01)
+    model.observe("redundancy", 0.03)
+    assert model.estimate("redundancy") == pytest.approx(0.02)
+    assert model.to_dict()["redundancy"]["samples"] == 2
+
+def test_expensive_tasks_sort_first():
+    """Tests that learned costs order tasks longest-processing-time first."""
+    model = MetricCostModel()
+    model.observe("redundancy", 0.002)
+    model.observe("group:grounding", 3.5)
+    model.observe("answer_relevance", 1.2)
+    keys = ["redundancy", "answer_relevance", "group:grounding"]
+    assert sorted(keys, key=model.estimate, reverse=True) == ["group:grounding", "answer_relevance", "redundancy"]
+
+def test_telemetry_round_trip(tmp_path: Path):
+    """Tests that costs saved by one run seed the cost model of the next."""
+    telemetry = RunTelemetry()
+    telemetry.cost_model.observe("faithfulness", 1.5)
+    telemetry.set_section("notes", {"rows": 10})
+    path = telemetry.save(str(tmp_path))
+
+    assert path.name == RunTelemetry.FILENAME
+    with path.open("r", encoding="utf-8") as f:
+        assert json.load(f)["notes"] == {"rows": 10}
+    loaded = RunTelemetry.load(str(tmp_path))
+    assert loaded.cost_model.estimate("faithfulness") == pytest.approx(1.5)
+
+def test_load_ignores_missing_or_corrupt_file(tmp_path: Path):
+    """Tests that a missing or unreadable telemetry file starts an empty model."""
+    assert RunTelemetry.load(str(tmp_path)).cost_model.to_dict() == {}
+    (tmp_path / RunTelemetry.FILENAME).write_text("{not json", encoding="utf-8")
+    assert RunTelemetry.load(str(tmp_path)).cost_model.to_dict() == {}
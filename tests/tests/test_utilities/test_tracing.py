@@ -0,0 +1,117 @@
+import json
+import threading
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+from utils.utils.metrics_manager import MetricsManager
+from utils.utils.scorer import EvaluationResult
+from utils.utils.tracing import Tracer
+
+def test_span_records_complete_event():
+    """
+    Tests that a span produces a Chrome 'complete' event with outcome and worker id.
+    """
+    tracer = Tracer(enabled=True)
+    with tracer.span("faithfulness", category="metric", row=3) as span:
+        span.set(score=0.5)
+
+    (event,) = tracer.events
+    assert event["ph"] == "X"
+    assert event["name"] == "faithfulness"
+    assert event["cat"] == "metric"
+    assert event["dur"] >= 0
+    assert event["args"]["row"] == 3
+    assert event["args"]["score"] == 0.5
+    assert event["args"]["outcome"] == "ok"
+    assert event["args"]["worker"] == event["tid"]
+
+def test_span_marks_error_outcome_and_reraises():
+    """
+    Tests that exceptions propagate and are recorded as the span outcome.
+    """
+    tracer = Tracer(enabled=True)
+    with pytest.raises(KeyError):
+        with tracer.span("context_recall", category="metric"):
+            raise KeyError("context")
+    assert tracer.events[0]["args"]["outcome"] == "error:KeyError"
+
+def test_worker_ids_are_distinct_per_thread():
+    """
+    Tests that spans from different threads land on different worker lanes.
+    """
+    tracer = Tracer(enabled=True)
+    barrier = threading.Barrier(3)
+
+    def work():
+        with tracer.span("row", category="row"):
+            barrier.wait()
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({e["tid"] for e in tracer.events}) == 3
+
+def test_disabled_tracer_is_noop(tmp_path: Path):
+    """
+    Tests that a disabled tracer records nothing and shares one span object.
+    """
+    tracer = Tracer(enabled=False)
+    assert tracer.span("a") is tracer.span("b")
+    with tracer.span("a") as span:
+        span.set(x=1)
+    tracer.counter("in_flight", limit=4)
+    assert tracer.events == []
+    assert tracer.export_chrome_trace(str(tmp_path / "trace.json")) is None
+
+def test_export_chrome_trace(tmp_path: Path):
+    """
+    Tests that the exported file is valid trace-event JSON with thread metadata.
+    """
+    tracer = Tracer(enabled=True)
+    with tracer.span("row 1", category="row"):
+        tracer.counter("in_flight", limit=2)
+    path = tracer.export_chrome_trace(str(tmp_path / "traces" / "run.json"))
+
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    phases = [e["ph"] for e in data["traceEvents"]]
+    assert "M" in phases and "X" in phases and "C" in phases
+
+def test_each_row_gets_a_span_covering_its_metric_tasks():
+    """
+    Tests that rows scored by tasks on several workers each get one async row span around their metric spans.
+    """
+    config = SimpleNamespace(get_evaluation_config=lambda: {"parallel_processing": True, "max_workers": 4}, get_metrics=lambda: ["coherence", "fluency"])
+    scorer = SimpleNamespace(
+        evaluate_coherence=lambda answer: EvaluationResult(score=1.0),
+        evaluate_fluency=lambda answer: EvaluationResult(score=0.5),
+    )
+    tracer = Tracer(enabled=True)
+    manager = MetricsManager(scorer, config, tracer=tracer)
+    results = manager.evaluate_dataset([{"answer": f"A{i}"} for i in range(3)])
+    assert [len(row) for row in results] == [2, 2, 2]
+
+    events = tracer.events
+    rows = {e["id"]: e for e in events if e["cat"] == "row" and e["ph"] == "b"}
+    ends = {e["id"]: e for e in events if e["cat"] == "row" and e["ph"] == "e"}
+    assert sorted(rows) == sorted(ends) == [0, 1, 2] and rows[1]["name"] == "row 2"
+    for span in (e for e in events if e["cat"] == "metric"):
+        row = span["args"]["row"]
+        assert rows[row]["ts"] <= span["ts"] and span["ts"] + span["dur"] <= ends[row]["ts"]
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_max_workers_only_applies_with_parallel_processing(parallel: bool):
+    """
+    Tests that 'max_workers' is ignored (one worker thread) unless 'parallel_processing' is enabled.
+    """
+    evaluation = {"parallel_processing": parallel, "max_workers": 4}
+    config = SimpleNamespace(get_evaluation_config=lambda: evaluation, get_metrics=lambda: ["coherence"])
+    scorer = SimpleNamespace(evaluate_coherence=lambda answer: EvaluationResult(score=1.0))
+    manager = MetricsManager(scorer, config, tracer=Tracer(enabled=True))
+    assert manager.max_workers == (4 if parallel else 1)
+    if not parallel:
+        manager.evaluate_dataset([{"answer": f"A{i}"} for i in range(8)])
+        assert len({e["tid"] for e in manager.tracer.events if e["cat"] == "metric"}) == 1
+
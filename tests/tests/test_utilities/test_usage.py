@@ -0,0 +1,125 @@
+import sqlite3
+import pytest
+from typing import Any
+from openai.types.chat import ChatCompletion
+from utils.utils.llm_cache import ResponseCache
+from utils.utils.llm_wrapper import LLMWrapper
+from utils.utils.usage import UsageTracker, cache_read_tokens, cache_write_tokens, token_counts, usage_scope
+
+PRICING = {"gpt-4o": {"input_per_million": 2.5, "output_per_million": 10.0},
+           "gpt-4o-mini": {"input_per_million": 0.15, "output_per_million": 0.6}}
+
+def completion(prompt_tokens: int, completion_tokens: int) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "c", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini-2024-07-18",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "{}"}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+    })
+
+def test_token_counts_understands_every_provider():
+    """Tests OpenAI, Anthropic and Ollama token fields."""
+    assert token_counts({"prompt_tokens": 3, "completion_tokens": 4}) == (3, 4)
+    assert token_counts({"input_tokens": 5, "output_tokens": 6}) == (5, 6)
+    assert token_counts({"prompt_eval_count": 7, "eval_count": 8}) == (7, 8)
+    assert token_counts(None) == (0, 0)
+
+def test_price_uses_longest_model_prefix():
+    """Tests that dated model names are priced by their family entry."""
+    tracker = UsageTracker(PRICING)
+    assert tracker.price("gpt-4o-mini-2024-07-18", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert tracker.price("gpt-4o", 1_000_000, 0) == pytest.approx(2.5)
+    assert tracker.price("unknown", 10, 10) == 0.0
+
+def test_prompt_cache_reads_are_counted_and_priced():
+    """Tests cached input tokens from both providers and their discounted price."""
+    assert token_counts({"input_tokens": 5, "cache_read_input_tokens": 90, "cache_creation_input_tokens": 10,
+                         "output_tokens": 6}) == (105, 6)
+    assert cache_read_tokens({"input_tokens": 5, "cache_read_input_tokens": 90}) == 90
+    assert cache_read_tokens({"prompt_tokens": 100, "prompt_tokens_details": {"cached_tokens": 64}}) == 64
+    assert cache_read_tokens({"prompt_tokens": 100}) == 0
+
+    tracker = UsageTracker({"gpt-4o": {"input_per_million": 2.0, "cached_input_per_million": 1.0, "output_per_million": 0.0}})
+    assert tracker.price("gpt-4o", 1_000_000, 0, cache_read=500_000) == pytest.approx(1.5)
+    assert UsageTracker(PRICING).price("gpt-4o", 1_000_000, 0, cache_read=500_000) == pytest.approx(2.5)
+    tracker.record("openai", "gpt-4o", {"prompt_tokens": 1_000_000, "completion_tokens": 0,
+                                        "prompt_tokens_details": {"cached_tokens": 1_000_000}}, 0.1)
+    totals = tracker.summary()["totals"]
+    assert totals["cache_read_tokens"] == 1_000_000 and totals["cost"] == pytest.approx(1.0)
+
+def test_prompt_cache_writes_are_priced_at_a_premium():
+    """Tests that Anthropic cache writes cost 1.25x input by default or their configured price."""
+    usage = {"input_tokens": 0, "cache_creation_input_tokens": 1_000_000, "cache_read_input_tokens": 0, "output_tokens": 0}
+    assert cache_write_tokens(usage) == 1_000_000 and cache_write_tokens({"prompt_tokens": 10}) == 0
+
+    tracker = UsageTracker({"claude-3-5-haiku": {"input_per_million": 0.8, "output_per_million": 4.0}})
+    tracker.record("anthropic", "claude-3-5-haiku", usage, 0.1)
+    totals = tracker.summary()["totals"]
+    assert totals["cache_write_tokens"] == 1_000_000 and totals["cost"] == pytest.approx(1.0)
+    priced = UsageTracker({"claude": {"input_per_million": 0.8, "cache_write_input_per_million": 1.6}})
+    assert priced.price("claude", 1_500_000, 0, cache_write=1_000_000) == pytest.approx(2.0)
+
+def test_calls_are_attributed_to_rows_and_metrics():
+    """Tests per-(row, metric) attribution and breakdowns, splitting batched calls."""
+    tracker = UsageTracker(PRICING)
+    with usage_scope([0, 1], ["faithfulness"]):
+        tracker.record("openai", "gpt-4o", {"prompt_tokens": 1000, "completion_tokens": 200}, latency=2.0)
+    with usage_scope([0], ["answer_relevance"]):
+        tracker.record("openai", "gpt-4o", {"prompt_tokens": 400, "completion_tokens": 20}, latency=1.0, cached=True)
+
+    per_task = tracker.per_task()
+    assert per_task[(1, "faithfulness")]["input_tokens"] == 500
+    assert per_task[(1, "faithfulness")]["cost"] == pytest.approx(0.00225)
+    assert per_task[(0, "answer_relevance")]["cached_calls"] == 1
+    summary = tracker.summary()
+    assert summary["totals"]["calls"] == 2 and summary["totals"]["cost"] == pytest.approx(0.0045)
+    assert summary["by_metric"]["answer_relevance"]["cost"] == 0.0
+    assert summary["by_model"]["openai/gpt-4o"]["input_tokens"] == 1400
+    assert summary["by_provider"]["openai"]["latency_seconds"] == 3.0
+
+def test_usage_is_written_to_the_results_db(tmp_path):
+    """Tests the llm_usage table rows per (row, metric, provider, model)."""
+    tracker = UsageTracker(PRICING)
+    with usage_scope([0, 1], ["faithfulness"]):
+        tracker.record("openai", "gpt-4o", {"prompt_tokens": 1000, "completion_tokens": 200}, latency=2.0)
+    db_path = str(tmp_path / "results.db")
+    assert tracker.save_to_db(db_path, run_id="r1", dataset_name="qa") == 2
+    rows = sqlite3.connect(db_path).execute(
+        "SELECT run_id, dataset_name, row_index, metric_name, llm_model, input_tokens FROM llm_usage ORDER BY row_index"
+    ).fetchall()
+    assert rows == [("r1", "qa", 0, "faithfulness", "gpt-4o", 500.0), ("r1", "qa", 1, "faithfulness", "gpt-4o", 500.0)]
+
+def test_deduplicated_usage_is_charged_to_the_first_original_row(tmp_path):
+    """Tests that usage of deduplicated rows is keyed by original row and counted once."""
+    tracker = UsageTracker(PRICING)
+    with usage_scope([0], ["faithfulness"]):
+        tracker.record("openai", "gpt-4o", {"prompt_tokens": 1000, "completion_tokens": 0}, latency=1.0)
+    with usage_scope([1], ["faithfulness"]):
+        tracker.record("openai", "gpt-4o", {"prompt_tokens": 200, "completion_tokens": 0}, latency=1.0)
+    row_index = [1, 0, 1, 0]
+
+    per_task = tracker.per_task(row_index)
+    assert per_task[(0, "faithfulness")]["input_tokens"] == 200
+    assert per_task[(1, "faithfulness")]["input_tokens"] == 1000
+    assert per_task[(2, "faithfulness")]["cost"] == 0.0 and per_task[(2, "faithfulness")]["duplicate_of_row"] == 0
+    assert per_task[(3, "faithfulness")]["duplicate_of_row"] == 1
+    assert sum(t["input_tokens"] for t in per_task.values()) == 1200
+
+    db_path = str(tmp_path / "results.db")
+    assert tracker.save_to_db(db_path, run_id="r1", row_index=row_index) == 2
+    rows = sqlite3.connect(db_path).execute("SELECT row_index, input_tokens FROM llm_usage ORDER BY row_index").fetchall()
+    assert rows == [(0, 200.0), (1, 1000.0)]
+
+def test_llm_wrapper_records_calls_and_cache_hits(tmp_path, monkeypatch):
+    """Tests that the wrapper records provider calls and cache hits under the active scope."""
+    tracker = UsageTracker(PRICING)
+    wrapper = LLMWrapper("openai", api_key="test-key", cache=ResponseCache(path=str(tmp_path / "c.sqlite")), usage=tracker)
+    monkeypatch.setattr(wrapper, "_request_completion", lambda prompt, model, **kwargs: completion(100, 10))
+    with usage_scope([3], ["faithfulness"]):
+        wrapper.get_completion("p", "gpt-4o-mini", temperature=0)
+        wrapper.get_completion("p", "gpt-4o-mini", temperature=0)
+
+    first, second = tracker.records
+    assert (first.cached, second.cached) == (False, True)
+    assert first.rows == (3,) and first.input_tokens == 100 and first.cost > 0
+    assert second.input_tokens == 100 and second.cost == 0.0
+    wrapper.close()
@@ -0,0 +1,420 @@
+import contextlib
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from openai.types.chat import ChatCompletion
+
+from .judge import LLMJudge
+from .llm_cache import make_cache_key
+from .llm_wrapper import prompt_cache_request
+from .logger import setup_logger
+from .profiler import StageProfiler
+from .response_parser import ParsedResponse, ResponseParser
+from .scorer import EvaluationResult
+from .telemetry import MetricCostModel
+from .tracing import Tracer
+from .usage import UsageTracker
+
+logger = setup_logger(__name__)
+
+_ITEM_HEADER = re.compile(r"^### Item (\d+)$", re.M)
+_GROUP_METRIC = re.compile(r"^- (\w+): ", re.M)
+
+
+def _placeholder_verdict(prompt: str) -> str:
+    """
+    Returns a zero-score judge response in the form the prompt asks for: one
+    verdict, one per '### Item N' of a batch prompt or one per metric of a
+    group prompt, in the score-first layout if the prompt uses it.
+    """
+    score_first = '{"scores":' in prompt
+    keys: List[Any] = _ITEM_HEADER.findall(prompt)
+    if not keys and "Score the following metrics" in prompt:
+        keys = _GROUP_METRIC.findall(prompt)
+    if not keys:
+        return json.dumps({"score": 0.0, "reason": ""})
+    if score_first:
+        return json.dumps({"scores": {k: 0.0 for k in keys}, "reasons": {k: "" for k in keys}})
+    if "### Item" in prompt:
+        return json.dumps({"verdicts": [{"id": int(k), "score": 0.0, "reason": ""} for k in keys]})
+    return json.dumps({k: {"score": 0.0, "reason": ""} for k in keys})
+
+
+@contextlib.contextmanager
+def _unrecorded(metrics_manager: Any) -> Iterator[None]:
+    """
+    Runs the enclosed pass without profiling, tracing or learning task costs,
+    so the collection pass's instant placeholder calls do not skew the run's
+    reports or the next run's scheduling.
+    """
+    profiler, tracer, cost_model = metrics_manager.profiler, metrics_manager.tracer, metrics_manager.cost_model
+    metrics_manager.profiler, metrics_manager.tracer = StageProfiler(enabled=False), Tracer(enabled=False)
+    metrics_manager.cost_model = MetricCostModel(cost_model.to_dict(), alpha=cost_model.alpha, default_cost=cost_model.default_cost)
+    try:
+        yield
+    finally:
+        metrics_manager.profiler, metrics_manager.tracer, metrics_manager.cost_model = profiler, tracer, cost_model
+
+
+class BatchJobError(RuntimeError):
+    """Raised when a provider batch job fails or does not finish in time."""
+
+
+@dataclass
+class BatchRequest:
+    """One pending judge call. `custom_id` is the call's cache key, so identical calls are sent once."""
+
+    custom_id: str
+    prompt: str
+    model: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def _read_requests(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class BatchClient:
+    """
+    Submits judge calls to a provider's batch API and collects the responses.
+
+    Subclasses implement one provider: `write_requests` serializes the calls
+    to the provider's batch JSONL format, `submit` starts a job from that file,
+    `poll` reports 'pending', 'completed' or 'failed', and `results` returns
+    the parsed response of every call that succeeded, keyed by custom_id.
+    """
+
+    provider = "local"
+
+    def write_requests(self, requests: Sequence[BatchRequest], path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            for request in requests:
+                f.write(json.dumps(self._line(request), separators=(",", ":")) + "\n")
+        return path
+
+    def _line(self, request: BatchRequest) -> Dict[str, Any]:
+        return asdict(request)
+
+    def submit(self, path: Path) -> str:
+        raise NotImplementedError
+
+    def poll(self, batch_id: str) -> str:
+        raise NotImplementedError
+
+    def results(self, batch_id: str) -> Dict[str, ParsedResponse]:
+        raise NotImplementedError
+
+
+class OpenAIBatchClient(BatchClient):
+    """OpenAI Batch API: the JSONL file is uploaded and run against /v1/chat/completions."""
+
+    provider = "openai"
+
+    def __init__(self, client: Any, completion_window: str = "24h"):
+        """
+        Args:
+            client: An `openai.OpenAI` client.
+            completion_window: Time the provider has to finish the batch.
+        """
+        self.client = client
+        self.completion_window = completion_window
+
+    def _line(self, request: BatchRequest) -> Dict[str, Any]:
+        content, params = prompt_cache_request(self.provider, request.prompt, request.params)
+        return {
+            "custom_id": request.custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": request.model, "messages": [{"role": "user", "content": content}], **params},
+        }
+
+    def submit(self, path: Path) -> str:
+        with path.open("rb") as f:
+            upload = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window=self.completion_window
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> str:
+        status = self.client.batches.retrieve(batch_id).status
+        # An expired batch still returns the calls that finished in time.
+        if status in ("completed", "expired"):
+            return "completed"
+        if status in ("failed", "cancelled", "cancelling"):
+            return "failed"
+        return "pending"
+
+    def results(self, batch_id: str) -> Dict[str, ParsedResponse]:
+        batch = self.client.batches.retrieve(batch_id)
+        responses: Dict[str, ParsedResponse] = {}
+        if not batch.output_file_id:
+            return responses
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                continue
+            responses[entry["custom_id"]] = ResponseParser.parse(ChatCompletion.model_validate(response["body"]), "openai")
+        return responses
+
+
+class AnthropicBatchClient(BatchClient):
+    """Anthropic Message Batches API: the calls are sent inline when the batch is created."""
+
+    provider = "anthropic"
+
+    def __init__(self, client: Any):
+        """
+        Args:
+            client: An `anthropic.Anthropic` client.
+        """
+        self.client = client
+
+    def _line(self, request: BatchRequest) -> Dict[str, Any]:
+        content, params = prompt_cache_request(self.provider, request.prompt, request.params)
+        return {
+            "custom_id": request.custom_id,
+            "params": {"model": request.model, "messages": [{"role": "user", "content": content}], "max_tokens": 1024, **params},
+        }
+
+    def submit(self, path: Path) -> str:
+        return self.client.messages.batches.create(requests=list(_read_requests(path))).id
+
+    def poll(self, batch_id: str) -> str:
+        return "completed" if self.client.messages.batches.retrieve(batch_id).processing_status == "ended" else "pending"
+
+    def results(self, batch_id: str) -> Dict[str, ParsedResponse]:
+        responses: Dict[str, ParsedResponse] = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                responses[entry.custom_id] = ResponseParser.parse(entry.result.message, "anthropic")
+        return responses
+
+
+class LocalBatchClient(BatchClient):
+    """
+    Stand-in batch API that runs the calls through an LLM (e.g. a local model
+    server or a test double) when the job is first polled. The batch id is the
+    request file's path.
+    """
+
+    def __init__(self, llm: Any):
+        """
+        Args:
+            llm: Anything with `get_parsed_completion(prompt, model, **params)`.
+        """
+        self.llm = llm
+        self._results: Dict[str, Dict[str, ParsedResponse]] = {}
+
+    def submit(self, path: Path) -> str:
+        return str(path)
+
+    def poll(self, batch_id: str) -> str:
+        if batch_id not in self._results:
+            responses = {}
+            for line in _read_requests(Path(batch_id)):
+                try:
+                    responses[line["custom_id"]] = self.llm.get_parsed_completion(line["prompt"], line["model"], **line["params"])
+                except Exception as e:
+                    logger.error(f"Local batch call {line['custom_id'][:12]} failed: {e}")
+            self._results[batch_id] = responses
+        return "completed"
+
+    def results(self, batch_id: str) -> Dict[str, ParsedResponse]:
+        return self._results[batch_id]
+
+
+class _CollectingLLM:
+    """Records every judge call and answers it with a well-formed placeholder verdict."""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.requests: "OrderedDict[str, BatchRequest]" = OrderedDict()
+
+    def get_parsed_completion(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        key = make_cache_key(self.provider, model, prompt, kwargs)
+        self.requests.setdefault(key, BatchRequest(key, prompt, model, dict(kwargs)))
+        # A valid verdict keeps the judge from falling back to extra single-row calls.
+        return ParsedResponse(_placeholder_verdict(prompt), None, {}, self.provider, model)
+
+    async def get_parsed_completion_async(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        return self.get_parsed_completion(prompt, model, **kwargs)
+
+
+class _BatchResultsLLM:
+    """Answers judge calls from batch results, sending calls without a result to `fallback` (if any)."""
+
+    def __init__(
+        self,
+        provider: str,
+        responses: Dict[str, ParsedResponse],
+        fallback: Any = None,
+        usage: Optional[UsageTracker] = None,
+        discount: float = 0.0
+    ):
+        self.provider = provider
+        self.responses = responses
+        self.fallback = fallback
+        self.usage = usage
+        self.discount = discount
+        self.fallback_calls = 0
+
+    def get_parsed_completion(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        response = self.responses.get(make_cache_key(self.provider, model, prompt, kwargs))
+        if response is not None:
+            if self.usage is not None:
+                self.usage.record(self.provider, model, response.metadata.get("usage"), 0.0, discount=self.discount)
+            return response
+        if self.fallback is None:
+            raise BatchJobError("The batch job returned no response for this judge call.")
+        self.fallback_calls += 1
+        return self.fallback.get_parsed_completion(prompt, model, **kwargs)
+
+    async def get_parsed_completion_async(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        if make_cache_key(self.provider, model, prompt, kwargs) in self.responses or self.fallback is None:
+            return self.get_parsed_completion(prompt, model, **kwargs)
+        self.fallback_calls += 1
+        return await self.fallback.get_parsed_completion_async(prompt, model, **kwargs)
+
+
+class BatchJudgeRunner:
+    """
+    Scores a dataset with the judge's calls sent through a provider batch API.
+
+    The run has two passes over the same scheduling code as an online run.
+    The first pass (judge metrics only) records every judge prompt instead of
+    sending it; the unique calls are written to `batch_requests.jsonl` in
+    `work_dir`, submitted and polled until the job ends. The second pass
+    evaluates all metrics, with the judge answered from the batch responses,
+    so batched, grouped and score-first prompts are parsed exactly as online.
+    Calls the batch did not answer go to the judge's own LLM when
+    `online_fallback` is set.
+
+    The submitted batch id is kept in `batch_state.json`, keyed by a digest of
+    the requests, so a rerun of an interrupted job resumes polling the same
+    batch instead of paying for it twice.
+    """
+
+    def __init__(
+        self,
+        client: BatchClient,
+        work_dir: str = "batches",
+        poll_interval: float = 60.0,
+        timeout: Optional[float] = 24 * 3600.0,
+        online_fallback: bool = True,
+        usage: Optional[UsageTracker] = None,
+        discount: float = 0.5,
+        sleep=time.sleep
+    ):
+        """
+        Args:
+            client: The provider batch client.
+            work_dir: Directory for the request file and the batch state.
+            poll_interval: Seconds between status polls.
+            timeout: Seconds to wait for the job before giving up (None waits forever).
+            online_fallback: Send calls the batch did not answer through the judge's LLM.
+            usage: Optional tracker recording the token usage of batch responses.
+            discount: Share of the list price saved by the batch API (applied to usage cost).
+            sleep: Sleep function between polls.
+        """
+        self.client = client
+        self.work_dir = Path(work_dir)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.online_fallback = online_fallback
+        self.usage = usage
+        self.discount = discount
+        self.sleep = sleep
+        self.stats: Dict[str, Any] = {}
+
+    def collect(self, metrics_manager: Any, judge: LLMJudge, data_points: Sequence[Dict[str, Any]]) -> List[BatchRequest]:
+        """Returns the unique judge calls an online run of the judge metrics would make."""
+        judged = [m for m in metrics_manager.config_manager.get_metrics() if judge.supports(m)]
+        collector = _CollectingLLM(self.client.provider)
+        # Placeholder verdicts must not reach the semantic cache, and streaming is not batchable.
+        llm, semantic_cache, stream = judge.llm, judge.semantic_cache, judge.stream
+        judge.llm, judge.semantic_cache, judge.stream = collector, None, False
+        try:
+            with _unrecorded(metrics_manager):
+                metrics_manager.evaluate_dataset(data_points, metrics=judged)
+        finally:
+            judge.llm, judge.semantic_cache, judge.stream = llm, semantic_cache, stream
+        return list(collector.requests.values())
+
+    def _submit(self, requests: Sequence[BatchRequest]) -> str:
+        path = self.client.write_requests(requests, self.work_dir / "batch_requests.jsonl")
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        state_path = self.work_dir / "batch_state.json"
+        if state_path.is_file():
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+            if state.get("digest") == digest and state.get("provider") == self.client.provider:
+                logger.info(f"Resuming batch job {state['batch_id']} for {len(requests)} judge calls.")
+                return state["batch_id"]
+        batch_id = self.client.submit(path)
+        state_path.write_text(
+            json.dumps({"batch_id": batch_id, "provider": self.client.provider, "digest": digest, "requests": len(requests)}),
+            encoding="utf-8",
+        )
+        logger.info(f"Submitted batch job {batch_id} with {len(requests)} judge calls.")
+        return batch_id
+
+    def wait(self, batch_id: str) -> Dict[str, ParsedResponse]:
+        """Polls the job until it ends and returns its responses."""
+        start = time.monotonic()
+        while True:
+            status = self.client.poll(batch_id)
+            if status == "completed":
+                return self.client.results(batch_id)
+            if status == "failed":
+                raise BatchJobError(f"Batch job {batch_id} failed.")
+            if self.timeout is not None and time.monotonic() - start > self.timeout:
+                raise BatchJobError(f"Batch job {batch_id} did not finish within {self.timeout:.0f}s.")
+            self.sleep(self.poll_interval)
+
+    def run(self, metrics_manager: Any, judge: LLMJudge, data_points: Sequence[Dict[str, Any]]) -> List[List[EvaluationResult]]:
+        """
+        Evaluates the dataset like `MetricsManager.evaluate_dataset`, with the
+        judge's calls answered by one batch job.
+
+        Raises:
+            BatchJobError: If the job fails or times out.
+        """
+        requests = self.collect(metrics_manager, judge, data_points)
+        responses: Dict[str, ParsedResponse] = {}
+        batch_id = None
+        if requests:
+            batch_id = self._submit(requests)
+            responses = self.wait(batch_id)
+        answers = _BatchResultsLLM(
+            self.client.provider, responses, judge.llm if self.online_fallback else None, self.usage, self.discount
+        )
+        llm, stream = judge.llm, judge.stream
+        judge.llm, judge.stream = answers, False
+        try:
+            results = metrics_manager.evaluate_dataset(data_points)
+        finally:
+            judge.llm, judge.stream = llm, stream
+        self.stats = {
+            "batch_id": batch_id,
+            "requests": len(requests),
+            "responses": len(responses),
+            "fallback_calls": answers.fallback_calls,
+        }
+        logger.info(
+            f"Batch judging: {len(responses)} of {len(requests)} calls answered by the batch, "
+            f"{answers.fallback_calls} sent online."
+        )
+        return results
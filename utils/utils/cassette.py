@@ -0,0 +1,162 @@
+import gzip
+import json
+import random
+import threading
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class Cassette:
+    """
+    Records LLM request/response pairs to a gzip-compressed JSONL file and
+    replays them without network access.
+
+    Each line holds the request key (see `make_cache_key`), the serialized
+    response and the latency of the original call. In replay mode, repeated
+    requests are served the recorded responses in order (the last one is reused
+    once they run out). Latency can be simulated from the recording: either
+    each entry's own latency ('recorded') or a random draw from all latencies
+    recorded for the same provider and model ('sampled'), scaled by
+    `latency_scale`.
+
+    A recording is written as one gzip stream that stays open until `close`
+    (or the end of a `with` block); each call is flushed as it is recorded,
+    so a crashed run still leaves every call recorded before it readable.
+    """
+
+    MODES = ("record", "replay")
+    LATENCY_MODES = (None, "recorded", "sampled")
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        simulate_latency: Optional[str] = None,
+        latency_scale: float = 1.0,
+        seed: Optional[int] = None,
+        append: bool = False
+    ):
+        """
+        Args:
+            path: Cassette file (e.g. 'cassettes/run.jsonl.gz').
+            mode: 'record' writes every call to the file; 'replay' serves calls from it.
+            simulate_latency: None (replay instantly), 'recorded' or 'sampled'.
+            latency_scale: Multiplier applied to simulated latencies.
+            seed: Seed for 'sampled' latencies.
+            append: In record mode, add to an existing cassette instead of starting a new one.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        if simulate_latency not in self.LATENCY_MODES:
+            raise ValueError(f"Unsupported latency simulation: {simulate_latency}")
+        self.path = Path(path)
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+        self.recorded = 0
+        self.replayed = 0
+        self._rng = random.Random(seed)
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._latencies: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+        if self.replaying:
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Appending adds a new gzip member, which readers treat as a continuation.
+            self._file = gzip.open(self.path, "at" if append else "wt", encoding="utf-8")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self) -> None:
+        if not self.path.is_file():
+            raise FileNotFoundError(f"Cassette not found at: {self.path}")
+        for line in self._lines():
+            if line.strip():
+                entry = json.loads(line)
+                self._entries.setdefault(entry["key"], deque()).append(entry)
+                self._latencies.setdefault(f"{entry['provider']}/{entry['model']}", []).append(entry["latency"])
+        logger.info(f"Loaded {sum(len(e) for e in self._entries.values())} recorded LLM calls from '{self.path}'.")
+
+    def _lines(self) -> Iterator[str]:
+        """Yields the cassette's complete lines, tolerating a stream cut off by a crash before `close`."""
+        data = self.path.read_bytes()
+        pending = b""
+        while data:
+            decompressor = zlib.decompressobj(wbits=31)
+            pending += decompressor.decompress(data)
+            *lines, pending = pending.split(b"\n")
+            yield from (line.decode("utf-8") for line in lines)
+            # Several members follow each other when a cassette was appended to.
+            data = decompressor.unused_data if decompressor.eof else b""
+        if pending.strip():
+            logger.warning(f"Ignoring an incomplete last line in cassette '{self.path}'.")
+
+    def lookup(self, key: str) -> Tuple[Any, float]:
+        """
+        Returns (recorded response payload, seconds to wait before returning it).
+
+        Raises:
+            CassetteMissError: If the request is not on the cassette.
+        """
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                entry = self._last[key] = queue.popleft()
+            elif key in self._last:
+                entry = self._last[key]
+            else:
+                raise CassetteMissError(f"Request {key[:12]}... is not on cassette '{self.path}'.")
+            self.replayed += 1
+            if self.simulate_latency == "recorded":
+                delay = entry["latency"]
+            elif self.simulate_latency == "sampled":
+                delay = self._rng.choice(self._latencies[f"{entry['provider']}/{entry['model']}"])
+            else:
+                delay = 0.0
+        return entry["response"], delay * self.latency_scale
+
+    def record(self, key: str, provider: str, model: str, response: Any, latency: float) -> None:
+        """Writes one call to the cassette file."""
+        line = json.dumps(
+            {"key": key, "provider": provider, "model": model, "latency": round(latency, 6), "response": response},
+            separators=(",", ":"),
+            default=str,
+        )
+        with self._lock:
+            if self._file is None:
+                raise ValueError(f"Cassette '{self.path}' is not open for recording.")
+            self._file.write(line + "\n")
+            # A sync flush makes the line readable without restarting compression.
+            self._file.flush()
+            self.recorded += 1
+
+    def close(self) -> None:
+        """Finishes the recording's gzip stream (a no-op in replay mode or when already closed)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "path": str(self.path), "recorded": self.recorded, "replayed": self.replayed}
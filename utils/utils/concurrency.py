@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .logger import setup_logger
+from .retry import is_overload
+from .tracing import Tracer
+
+logger = setup_logger(__name__)
+
+
+class AIMDLimiter:
+    """
+    Adaptive in-flight request limit (additive increase, multiplicative decrease).
+
+    Every successful call grows the limit by `increase / limit`, i.e. by about
+    `increase` per round of `limit` calls; an overload response (429, 503, 529)
+    multiplies it by `decrease_factor`. Decreases are applied at most once per
+    `cooldown` seconds so one burst of rejections from the same window counts as
+    a single congestion signal. The limit only grows while at least half of it
+    is in use, so an application-limited caller does not inflate it to a value
+    it never proved. Usable from threads and from asyncio tasks.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 256,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+        on_change: Optional[Callable[["AIMDLimiter"], None]] = None
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.decreases = 0
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    def _take(self) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _wake(self) -> None:
+        # Called with the condition held.
+        self._condition.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+
+    def acquire(self) -> None:
+        """Blocks until a slot is free under the current limit."""
+        with self._condition:
+            while not self._has_capacity():
+                self._condition.wait()
+            self._take()
+
+    async def acquire_async(self) -> None:
+        """Waits (without blocking the event loop) until a slot is free."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._has_capacity():
+                    self._take()
+                    return
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            await future
+
+    def release(self, overloaded: bool = False, success: bool = True) -> None:
+        """Frees a slot and adjusts the limit from the call's outcome."""
+        with self._condition:
+            saturated = self.in_flight * 2 >= int(self.limit)
+            self.in_flight -= 1
+            previous = int(self.limit)
+            if overloaded:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self.decreases += 1
+                    self._last_decrease = now
+            elif success and saturated:
+                self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            changed = int(self.limit) != previous
+            self._wake()
+        if changed and self.on_change is not None:
+            self.on_change(self)
+
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Calls `func` holding a slot and feeds its outcome back into the limit."""
+        self.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.release(overloaded=is_overload(e), success=False)
+            raise
+        self.release()
+        return result
+
+    async def arun(self, func: Callable, *args, **kwargs) -> Any:
+        """Async counterpart of `run` for coroutine functions."""
+        await self.acquire_async()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            self.release(overloaded=isinstance(e, Exception) and is_overload(e), success=False)
+            raise
+        self.release()
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "peak_in_flight": self.peak_in_flight,
+            "decreases": self.decreases
+        }
+
+
+class ConcurrencyController:
+    """
+    One AIMDLimiter per (provider, model), shared by every LLM call of a run.
+
+    Limit changes are emitted as trace counters and the final limits are kept
+    for run telemetry; limits saved by the previous run seed the next one so it
+    starts near the provider's real throughput ceiling.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 256,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+        previous_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        tracer: Optional[Tracer] = None
+    ):
+        """
+        Args:
+            initial_limit: Starting in-flight limit for keys without history.
+            min_limit: Lower bound of the limit.
+            max_limit: Upper bound of the limit.
+            decrease_factor: Multiplier applied on an overload response.
+            cooldown: Minimum seconds between two decreases.
+            previous_limits: The 'concurrency' telemetry section of a previous run.
+            tracer: Optional tracer receiving a counter per limit change.
+        """
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.previous_limits = previous_limits or {}
+        self.tracer = tracer
+        self._limiters: Dict[str, AIMDLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider: str, model: str) -> AIMDLimiter:
+        """Returns the limiter for a provider/model pair, creating it on first use."""
+        key = f"{provider}/{model}"
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                initial = self.previous_limits.get(key, {}).get("limit", self.initial_limit)
+                limiter = self._limiters[key] = AIMDLimiter(
+                    initial_limit=initial,
+                    min_limit=self.min_limit,
+                    max_limit=self.max_limit,
+                    decrease_factor=self.decrease_factor,
+                    cooldown=self.cooldown,
+                    on_change=lambda l, k=key: self._report(k, l)
+                )
+            return limiter
+
+    def _report(self, key: str, limiter: AIMDLimiter) -> None:
+        if limiter.decreases and int(limiter.limit) == int(limiter.min_limit):
+            logger.warning(f"Concurrency for '{key}' is at its minimum ({limiter.min_limit}); the provider keeps rejecting requests.")
+        if self.tracer is not None:
+            self.tracer.counter(f"concurrency {key}", limit=int(limiter.limit), in_flight=limiter.in_flight)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the current limit per provider/model for run telemetry."""
+        with self._lock:
+            return {key: limiter.to_dict() for key, limiter in self._limiters.items()}
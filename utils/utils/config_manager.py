@@ -39,6 +39,58 @@ class ConfigManager:
         """Returns data loader config."""
         return self.config.get("data_loader", {})
 
+    def get_judge_config(self) -> Dict[str, Any]:
+        """Returns LLM judge config (enabled, model, metrics, batch_size, groups)."""
+        return self.config.get("judge", {})
+
+    def get_dedupe_config(self) -> Dict[str, Any]:
+        """Returns row deduplication config (enabled, fields)."""
+        return self.config.get("dedupe", {})
+
+    def get_evaluation_config(self) -> Dict[str, Any]:
+        """Returns evaluation engine config (parallel_processing, max_workers, ...)."""
+        return self.config.get("evaluation", {})
+
+    def get_http_pool_config(self) -> Dict[str, Any]:
+        """Returns the shared HTTP connection pool configuration."""
+        return self.config.get("http_pool", {})
+
+    def get_retry_config(self) -> Dict[str, Any]:
+        """Returns the LLM retry policy configuration (budget, circuit breaker)."""
+        return self.config.get("retry", {})
+
+    def get_concurrency_config(self) -> Dict[str, Any]:
+        """Returns the adaptive LLM concurrency (AIMD) configuration."""
+        return self.config.get("concurrency", {})
+
+    def get_rate_limits_config(self) -> Dict[str, Any]:
+        """Returns the host-wide per-provider rate limits (requests/tokens per minute)."""
+        return self.config.get("rate_limits", {})
+
+    def get_usage_config(self) -> Dict[str, Any]:
+        """Returns LLM usage accounting config (enabled, pricing per model, db_path)."""
+        return self.config.get("usage", {})
+
+    def get_hedging_config(self) -> Dict[str, Any]:
+        """Returns the request hedging configuration for deterministic LLM calls."""
+        return self.config.get("hedging", {})
+
+    def get_llm_router_config(self) -> Dict[str, Any]:
+        """Returns the judge LLM router config (enabled, backends with name, provider, api_key_env, model, weight)."""
+        return self.config.get("llm_router", {})
+
+    def get_local_llm_config(self) -> Dict[str, Any]:
+        """Returns the self-hosted model server configuration (base_url, api_style)."""
+        return self.config.get("local_llm", {})
+
+    def get_cassette_config(self) -> Dict[str, Any]:
+        """Returns LLM record/replay cassette config (mode, path, simulate_latency, latency_scale, seed, append)."""
+        return self.config.get("cassette", {})
+
+    def get_llm_cache_config(self) -> Dict[str, Any]:
+        """Returns LLM response cache config (enabled, path, ttl_seconds, max_entries, max_bytes, read_only)."""
+        return self.config.get("llm_cache", {})
+
     def get_api_key(self, provider: str) -> Optional[str]:
         """Returns API key for the specified provider, if present."""
         return self.config.get("api_keys", {}).get(provider)
@@ -0,0 +1,115 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .logger import setup_logger
+from .rate_limiter import estimate_tokens
+
+logger = setup_logger(__name__)
+
+# Sentence boundaries: end punctuation followed by whitespace, or a line break.
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(context: Union[str, Sequence[str]]) -> List[str]:
+    """Splits a context (or a list of passages) into non-empty sentences."""
+    passages = [context] if isinstance(context, str) else [str(p) for p in context]
+    return [s.strip() for passage in passages for s in _SENTENCE_BOUNDARY.split(passage) if s.strip()]
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count of a text."""
+    return estimate_tokens(text, max_tokens=0)
+
+
+class ContextCompressor:
+    """
+    Shrinks long RAG contexts to a token budget before they are sent to the judge.
+
+    The context is split into sentences, each sentence is embedded (through the
+    Scorer's embedding cache, so repeated contexts cost nothing) and scored by
+    its highest cosine similarity to the answer or the question. The best
+    sentences are kept until the budget is filled and are returned in their
+    original order. Contexts already within the budget are left untouched.
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], np.ndarray],
+        budgets: Optional[Dict[str, int]] = None,
+        default_budget: Optional[int] = None
+    ):
+        """
+        Args:
+            embed_many: Returns one embedding row per text (e.g. Scorer.embed_many).
+            budgets: Context token budget per metric.
+            default_budget: Budget for metrics without an entry; None leaves them uncompressed.
+        """
+        self.embed_many = embed_many
+        self.budgets = dict(budgets or {})
+        self.default_budget = default_budget
+        self.original_tokens = 0
+        self.kept_tokens = 0
+        self._lock = threading.Lock()
+
+    def budget_for(self, metric_names: Sequence[str]) -> Optional[int]:
+        """Returns the tightest budget among the metrics (None if none is configured)."""
+        budgets = [self.budgets.get(m, self.default_budget) for m in metric_names]
+        budgets = [b for b in budgets if b is not None]
+        return min(budgets) if budgets else None
+
+    def compress(self, context: Union[str, Sequence[str]], queries: Sequence[str], budget: int) -> Tuple[str, float]:
+        """
+        Returns the reduced context and its reduction ratio (the share of context
+        tokens removed, 0.0 when the context already fits the budget).
+        """
+        text = context if isinstance(context, str) else "\n".join(str(p) for p in context)
+        original = count_tokens(text)
+        sentences = split_sentences(context)
+        queries = [q for q in queries if q]
+        if original <= budget or len(sentences) < 2 or not queries:
+            self._record(original, original)
+            return text, 0.0
+
+        vectors = self._normalized(self.embed_many(sentences + queries))
+        relevance = (vectors[:len(sentences)] @ vectors[len(sentences):].T).max(axis=1)
+        kept, used = [], 0
+        for index in np.argsort(-relevance, kind="stable"):
+            tokens = count_tokens(sentences[index])
+            if used + tokens > budget:
+                continue
+            kept.append(index)
+            used += tokens
+        reduced = " ".join(sentences[i] for i in sorted(kept))
+        while len(kept) > 1 and count_tokens(reduced) > budget:
+            # Per-sentence estimates ignore the joining spaces; drop the least relevant.
+            kept.pop()
+            reduced = " ".join(sentences[i] for i in sorted(kept))
+        if not kept:
+            # Even the best sentence is over budget: keep its beginning.
+            reduced = sentences[int(np.argmax(relevance))][:budget * 4]
+        kept_tokens = count_tokens(reduced)
+        self._record(original, kept_tokens)
+        return reduced, 1.0 - kept_tokens / original
+
+    def _record(self, original: int, kept: int) -> None:
+        with self._lock:
+            self.original_tokens += original
+            self.kept_tokens += kept
+
+    @staticmethod
+    def _normalized(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns context token totals for run telemetry."""
+        reduction = 1.0 - self.kept_tokens / self.original_tokens if self.original_tokens else 0.0
+        return {
+            "original_tokens": self.original_tokens,
+            "kept_tokens": self.kept_tokens,
+            "reduction": round(reduction, 4)
+        }
@@ -1,6 +1,24 @@
+import gzip
+import json
 import pandas as pd
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+# Malformed lines logged individually per file; the rest are only counted.
+_MAX_LOGGED_MALFORMED = 20
+
+@dataclass
+class MalformedLine:
+    """A JSONL line that could not be parsed into a record."""
+    line_number: int
+    error: str
 
 class DataLoader:
     """Loads datasets for evaluation from various file formats."""
@@ -8,7 +26,9 @@ class DataLoader:
     @staticmethod
     def load_data(file_path: str) -> List[Dict[str, Any]]:
         """
-        Loads data from CSV or JSON file into a list of dictionaries.
+        Loads data from a CSV, JSON or JSONL/NDJSON file into a list of dictionaries.
+        Malformed JSONL lines are skipped and logged; use `stream_jsonl` to read
+        large JSONL files without materializing them.
 
         Args:
             file_path: Path to the dataset file.
@@ -30,8 +50,9 @@ class DataLoader:
             if extension == '.csv':
                 df = pd.read_csv(path)
                 return df.where(pd.notna(df), None).to_dict(orient='records')
+            elif extension in JSONL_EXTENSIONS or DataLoader._is_gzipped_jsonl(path):
+                return list(DataLoader.stream_jsonl(path))
             elif extension == '.json':
-                import json
                 with path.open('r', encoding='utf-8') as f:
                     data = json.load(f)
                 if isinstance(data, list):
@@ -42,3 +63,73 @@ class DataLoader:
                 raise ValueError(f"Unsupported file format: {extension}")
         except Exception as e:
             raise ValueError(f"Failed to load or parse data file '{path}': {e}") from e
+
+    @staticmethod
+    def _is_gzipped_jsonl(path: Path) -> bool:
+        suffixes = [suffix.lower() for suffix in path.suffixes[-2:]]
+        return len(suffixes) == 2 and suffixes[1] == '.gz' and suffixes[0] in JSONL_EXTENSIONS
+
+    @staticmethod
+    def stream_jsonl(
+        file_path: Union[str, Path],
+        chunk_size: Optional[int] = None,
+        malformed: Optional[List[MalformedLine]] = None
+    ) -> Iterator[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Reads a JSONL/NDJSON file (optionally gzip-compressed) line by line,
+        keeping only the current line (or chunk) in memory.
+
+        Blank lines are ignored. Lines that are not valid JSON objects are
+        skipped and reported with their line numbers instead of failing the file.
+
+        Args:
+            file_path: Path to the '.jsonl' / '.ndjson' (or '.jsonl.gz') file.
+            chunk_size: If set, yields lists of up to this many records instead of single records.
+            malformed: Optional list that receives a MalformedLine for every skipped line.
+
+        Yields:
+            One dictionary per record, or lists of records when `chunk_size` is set.
+
+        Raises:
+            FileNotFoundError: If file does not exist.
+            ValueError: If `chunk_size` is not positive.
+        """
+        path = Path(file_path)
+        if not path.is_file():
+            raise FileNotFoundError(f"Data file not found: {path}")
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+
+        skipped = 0
+        chunk: List[Dict[str, Any]] = []
+        opener = gzip.open if path.suffix.lower() == '.gz' else open
+        # Lines are decoded one at a time, so a bad byte sequence only spoils its own line.
+        with opener(path, 'rb') as f:
+            for line_number, line in enumerate(f, start=1):
+                if line_number == 1 and line.startswith(b'\xef\xbb\xbf'):
+                    line = line[3:]
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+                except ValueError as e:
+                    skipped += 1
+                    if malformed is not None:
+                        malformed.append(MalformedLine(line_number, str(e)))
+                    if skipped <= _MAX_LOGGED_MALFORMED:
+                        logger.warning(f"Skipping malformed line {line_number} in '{path}': {e}")
+                    continue
+                if chunk_size is None:
+                    yield record
+                    continue
+                chunk.append(record)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+        if skipped:
+            logger.warning(f"Skipped {skipped} malformed line(s) in '{path}'.")
@@ -0,0 +1,79 @@
+import copy
+import unicodedata
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+DEFAULT_DEDUPE_FIELDS = ("question", "answer", "context")
+
+
+def canonicalize(value: Any) -> str:
+    """
+    Normalizes a field value for duplicate detection: Unicode NFC, collapsed
+    whitespace and list contexts joined line by line. Case is preserved.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "\n".join(canonicalize(v) for v in value)
+    text = unicodedata.normalize("NFC", str(value))
+    return " ".join(text.split())
+
+
+def row_key(data_point: Dict[str, Any], fields: Sequence[str] = DEFAULT_DEDUPE_FIELDS) -> Tuple[Hashable, ...]:
+    """Returns the canonical identity of a row over the given fields."""
+    return tuple((field, canonicalize(data_point[field])) for field in fields if field in data_point)
+
+
+def deduplicate_rows(
+    data_points: Sequence[Dict[str, Any]],
+    fields: Optional[Sequence[str]] = None
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Collapses rows that are identical after canonicalization.
+
+    Args:
+        data_points: The rows to evaluate.
+        fields: Fields that define row identity (defaults to question, answer, context).
+
+    Returns:
+        A tuple of (unique rows, index into the unique rows for every original row).
+        The first occurrence of each row is kept as its representative.
+    """
+    fields = tuple(fields or DEFAULT_DEDUPE_FIELDS)
+    unique_rows: List[Dict[str, Any]] = []
+    positions: Dict[Tuple[Hashable, ...], int] = {}
+    row_index: List[int] = []
+    for data_point in data_points:
+        key = row_key(data_point, fields)
+        position = positions.get(key)
+        if position is None:
+            position = positions[key] = len(unique_rows)
+            unique_rows.append(data_point)
+        row_index.append(position)
+    return unique_rows, row_index
+
+
+def expand_results(unique_results: Sequence[List[Any]], row_index: Sequence[int]) -> List[List[Any]]:
+    """
+    Maps per-unique-row results back onto every original row.
+
+    The first row using a unique result gets the original objects; later
+    duplicates get copies (with their own `details`) so results can be
+    annotated independently.
+    """
+    expanded: List[List[Any]] = []
+    seen = set()
+    for position in row_index:
+        results = unique_results[position]
+        if position in seen:
+            results = [_copy_result(result) for result in results]
+        else:
+            seen.add(position)
+        expanded.append(list(results))
+    return expanded
+
+
+def _copy_result(result: Any) -> Any:
+    copied = copy.copy(result)
+    if isinstance(getattr(result, "details", None), dict):
+        copied.details = copy.deepcopy(result.details)
+    return copied
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class HedgingPolicy:
+    """
+    Decides when to hedge a slow request with one duplicate.
+
+    Latencies of completed requests are kept per model in a sliding window. Once
+    `min_samples` are known, a request still running after the window's
+    `percentile` latency gets one duplicate; whichever finishes first wins and the
+    other is cancelled. Hedges are capped at `max_hedge_ratio` of all requests,
+    so a provider-wide slowdown cannot double the traffic.
+    """
+
+    def __init__(self, percentile: float = 0.95, max_hedge_ratio: float = 0.05, min_samples: int = 20, window: int = 500):
+        """
+        Args:
+            percentile: Latency quantile after which a request is hedged.
+            max_hedge_ratio: Maximum share of requests that may be hedged.
+            min_samples: Latencies required per model before hedging starts.
+            window: Number of recent latencies kept per model.
+        """
+        self.percentile = percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.window = window
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float) -> None:
+        """Records the latency of a completed request."""
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Returns the delay after which a request should be hedged, or None if unknown."""
+        with self._lock:
+            samples = self._latencies.get(model)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def can_hedge(self) -> bool:
+        """Returns whether the traffic cap has room for one more hedge, without taking it."""
+        with self._lock:
+            return self.hedges + 1 <= self.max_hedge_ratio * self.requests
+
+    def try_hedge(self) -> bool:
+        """Takes one hedge if the traffic cap allows it."""
+        with self._lock:
+            if self.hedges + 1 > self.max_hedge_ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hedging counters for run telemetry."""
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+    def call(self, executor: Executor, model: str, func: Callable, *args, on_discard: Optional[Callable[[Any], None]] = None, **kwargs) -> Any:
+        """
+        Calls `func` and hedges it on `executor` if it runs past the hedge delay.
+
+        Requests that cannot be hedged (no latency window yet, or no room under
+        the hedge cap) run inline on the caller's thread. A losing blocking call
+        cannot be interrupted; when it completes, its result is passed to
+        `on_discard` so its usage can still be recorded.
+        """
+        self.record_request()
+        delay = self.hedge_delay(model)
+        if delay is None or not self.can_hedge():
+            return self._timed(model, func, *args, **kwargs)
+        primary = executor.submit(self._timed, model, func, *args, **kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.try_hedge():
+            return primary.result()
+        hedge = executor.submit(self._timed, model, func, *args, **kwargs)
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._finish(future is hedge, (done - {future}) | pending, on_discard)
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+
+    async def acall(self, model: str, func: Callable, *args, on_discard: Optional[Callable[[Any], None]] = None, **kwargs) -> Any:
+        """
+        Async counterpart of `call`; the losing request is cancelled. A loser that
+        completed anyway is passed to `on_discard`.
+        """
+        self.record_request()
+        delay = self.hedge_delay(model)
+        primary = asyncio.ensure_future(self._atimed(model, func, *args, **kwargs))
+        if delay is None:
+            return await primary
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self.try_hedge():
+                return await primary
+            hedge = asyncio.ensure_future(self._atimed(model, func, *args, **kwargs))
+            pending = {primary, hedge}
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._finish(task is hedge, (done - {task}) | pending, on_discard)
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            # Also stops the in-flight requests if the caller itself is cancelled.
+            for task in pending:
+                task.cancel()
+
+    def _finish(self, hedge_won: bool, losers: set, on_discard: Optional[Callable[[Any], None]]) -> None:
+        if hedge_won:
+            self.record_win()
+        for future in losers:
+            # Running threads cannot be cancelled; report their result once they finish.
+            if not future.cancel() and on_discard is not None:
+                future.add_done_callback(lambda done: self._discard(done, on_discard))
+
+    @staticmethod
+    def _discard(future: Any, on_discard: Callable[[Any], None]) -> None:
+        if not future.cancelled() and future.exception() is None:
+            on_discard(future.result())
+
+    def _timed(self, model: str, func: Callable, *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.observe(model, time.perf_counter() - start)
+        return result
+
+    async def _atimed(self, model: str, func: Callable, *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        result = await func(*args, **kwargs)
+        self.observe(model, time.perf_counter() - start)
+        return result
@@ -0,0 +1,120 @@
+import asyncio
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def sdk_http_module(client_class: type) -> ModuleType:
+    """
+    Returns the httpx-compatible package an SDK client class expects for its
+    `http_client` (httpx, or httpx2 in newer openai/anthropic releases).
+    """
+    package = importlib.import_module(client_class.__module__.partition(".")[0])
+    default_client = getattr(package, "DefaultHttpxClient", None)
+    for cls in getattr(default_client, "__mro__", ()):
+        root = cls.__module__.partition(".")[0]
+        if root.startswith("httpx"):
+            return importlib.import_module(root)
+    return httpx
+
+
+class HTTPClientPool:
+    """
+    Shared keep-alive HTTP clients, one per provider, owned by a run.
+
+    Every LLM client for a provider sends its requests through the same pooled
+    connections, so concurrent calls reuse open TLS connections instead of
+    handshaking per call. Async clients are bound to the event loop that first
+    used them; a different loop gets its own client. Clients are built from the
+    httpx-compatible package the caller's SDK expects (see `sdk_http_module`).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+        transport: Optional[Any] = None
+    ):
+        """
+        Args:
+            max_connections: Maximum open connections per provider.
+            max_keepalive_connections: Idle connections kept open for reuse.
+            keepalive_expiry: Seconds an idle connection is kept open.
+            timeout: Default request timeout in seconds.
+            transport: Custom transport for all clients (e.g. httpx.MockTransport
+                in tests); connection limits then depend on that transport.
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.transport = transport
+        self._sync_clients: Dict[str, Any] = {}
+        self._async_clients: Dict[str, Tuple[Any, asyncio.AbstractEventLoop]] = {}
+        self._lock = threading.Lock()
+
+    def _client_kwargs(self, http_module: ModuleType) -> Dict[str, Any]:
+        limits = http_module.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        return {"limits": limits, "timeout": http_module.Timeout(self.timeout), "transport": self.transport}
+
+    def sync_client(self, provider: str, http_module: ModuleType = httpx) -> Any:
+        """Returns the pooled blocking client for a provider."""
+        with self._lock:
+            client = self._sync_clients.get(provider)
+            if client is None:
+                client = self._sync_clients[provider] = http_module.Client(**self._client_kwargs(http_module))
+            return client
+
+    def async_client(self, provider: str, http_module: ModuleType = httpx) -> Any:
+        """Returns the pooled async client for a provider on the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_clients.get(provider)
+            if entry is not None and entry[1] is loop:
+                return entry[0]
+            if entry is not None:
+                logger.debug(f"Event loop changed; opening a new connection pool for '{provider}'.")
+            client = http_module.AsyncClient(**self._client_kwargs(http_module))
+            self._async_clients[provider] = (client, loop)
+            return client
+
+    def close(self) -> None:
+        """Closes all blocking clients and any async clients whose event loop is idle."""
+        with self._lock:
+            sync_clients, self._sync_clients = list(self._sync_clients.values()), {}
+            async_clients, self._async_clients = list(self._async_clients.values()), {}
+        for client in sync_clients:
+            client.close()
+        for client, loop in async_clients:
+            if loop.is_closed() or loop.is_running():
+                continue
+            loop.run_until_complete(client.aclose())
+
+    async def aclose(self) -> None:
+        """Closes all clients; async clients must belong to the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            async_clients = [c for c, l in self._async_clients.values() if l is loop]
+            self._async_clients = {p: e for p, e in self._async_clients.items() if e[1] is not loop}
+        for client in async_clients:
+            await client.aclose()
+        self.close()
+
+    def __enter__(self) -> "HTTPClientPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,632 @@
+import asyncio
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .scorer import EvaluationResult
+from .context_compression import ContextCompressor
+from .llm_wrapper import LLMWrapper
+from .response_parser import ResponseParser, StreamingJSONExtractor
+from .self_consistency import SelfConsistency
+from .semantic_cache import SemanticVerdictCache, normalize_payload
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Judge metrics, the data point fields they need and the scoring criteria given to the judge.
+JUDGE_METRICS: Dict[str, Dict[str, Any]] = {
+    "faithfulness": {
+        "inputs": ["answer", "context"],
+        "criteria": "Score how faithful the answer is to the context: 1.0 if every claim in the answer is supported by the context, 0.0 if none are.",
+    },
+    "hallucination": {
+        "inputs": ["answer", "context"],
+        "criteria": "Score the degree of hallucination: 1.0 if the answer contains claims that are unsupported by or contradict the context, 0.0 if it contains none (lower is better).",
+    },
+    "groundedness": {
+        "inputs": ["answer", "context"],
+        "criteria": "Score how well the answer is grounded in the context: 1.0 if it relies only on information present in the context, 0.0 if it ignores the context.",
+    },
+    "factual_consistency": {
+        "inputs": ["answer", "context"],
+        "criteria": "Score the factual consistency between the answer and the context: 1.0 if no fact in the answer conflicts with the context, 0.0 if the answer is factually inconsistent.",
+    },
+    "factuality": {
+        "inputs": ["answer", "context"],
+        "criteria": "Score the factual accuracy of the answer with respect to the context: 1.0 if all stated facts are correct, 0.0 if they are wrong.",
+    },
+    "answer_relevance": {
+        "inputs": ["question", "answer"],
+        "criteria": "Score how relevant the answer is to the question: 1.0 if it directly addresses the question, 0.0 if it is off-topic.",
+    },
+    "completeness": {
+        "inputs": ["question", "answer"],
+        "criteria": "Score how completely the answer addresses every part of the question: 1.0 if fully complete, 0.0 if it answers nothing.",
+    },
+    "helpfulness": {
+        "inputs": ["question", "answer"],
+        "criteria": "Score how helpful the answer would be to the person asking the question: 1.0 for very helpful, 0.0 for unhelpful.",
+    },
+    "context_relevance": {
+        "inputs": ["question", "context"],
+        "criteria": "Score how relevant the retrieved context is to the question: 1.0 if it contains the information needed, 0.0 if it is unrelated.",
+    },
+}
+
+_VERDICT_SCHEMA = '{"score": <number between 0 and 1>, "reason": "<one short sentence>"}'
+
+# A complete score at the start of a score-first single verdict (optionally in a code fence).
+_LEADING_SCORE = re.compile(r'^\s*(?:```(?:json)?\s*)?\{\s*"score"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*[,}]')
+
+
+class JudgeParseError(ValueError):
+    """Raised when a judge response does not contain a usable verdict."""
+
+
+def _format_field(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return "\n".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+def _from_score_first(parsed: Any) -> Any:
+    """Converts a score-first {"scores": {...}, "reasons": {...}} verdict into {key: verdict}."""
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("scores"), dict):
+        return parsed
+    reasons = parsed.get("reasons") if isinstance(parsed.get("reasons"), dict) else {}
+    return {str(key): {"score": score, "reason": reasons.get(key, "")} for key, score in parsed["scores"].items()}
+
+
+def _parse_score(verdict: Any) -> Optional[float]:
+    """Returns the verdict score clamped to [0, 1], or None if it is missing or invalid."""
+    if not isinstance(verdict, dict):
+        return None
+    try:
+        score = float(verdict.get("score"))
+    except (TypeError, ValueError):
+        return None
+    if score != score:  # NaN
+        return None
+    return min(max(score, 0.0), 1.0)
+
+
+class LLMJudge:
+    """
+    Scores metrics by asking an LLM for a structured JSON verdict.
+
+    Rows for the same metric can be batched: `evaluate_batch` sends K rows in a
+    single prompt asking for K verdicts and falls back to single-row calls for
+    any row whose verdict could not be parsed.
+
+    Compatible metrics (same inputs) can be grouped: `evaluate_group` asks for
+    a verdict on every metric of the group in one call and fans the answer out
+    into one EvaluationResult per metric.
+
+    With a semantic cache, rows whose normalized payload is a near duplicate
+    of an already judged row reuse that verdict instead of calling the judge.
+
+    With streaming, the response is parsed as it arrives and the generation is
+    stopped once a complete verdict is available. The score-first schema asks
+    for all scores before any reason, so streaming can stop right after the
+    scores and the rationale is never generated.
+
+    With a context compressor, contexts over a metric's token budget are
+    reduced to their sentences most similar to the answer and question before
+    being sent; the share of context tokens removed is recorded in the
+    result details as 'context_reduction'.
+
+    Prompts are laid out for provider prompt caching: the metric instructions
+    and response schema come first, then the context, then the varying
+    content (answer, question, batch items). With `prompt_caching` (off by
+    default, since Anthropic charges a premium for cache writes that only pays
+    off when the prefix is reused within the cache lifetime), the length of
+    that stable prefix is sent as the 'cache_prefix' option so the wrapper can
+    mark it for the provider's prompt cache.
+
+    With self-consistency, every verdict (single, batched or grouped) is
+    sampled several times and the samples are averaged; rows whose samples
+    already agree stop early. The results record the number of samples, the
+    sample scores and their variance.
+    """
+
+    def __init__(
+        self,
+        llm: LLMWrapper,
+        model: str,
+        metrics: Optional[Sequence[str]] = None,
+        batch_size: int = 1,
+        completion_kwargs: Optional[Dict[str, Any]] = None,
+        groups: Optional[Dict[str, Sequence[str]]] = None,
+        semantic_cache: Optional[SemanticVerdictCache] = None,
+        stream: bool = False,
+        score_first: bool = False,
+        compressor: Optional[ContextCompressor] = None,
+        prompt_caching: bool = False,
+        self_consistency: Optional[SelfConsistency] = None
+    ):
+        """
+        Args:
+            llm: The wrapper (or an LLMRouter over several backends) used to reach the judge model.
+            model: Judge model name.
+            metrics: Metrics to judge (defaults to every metric in JUDGE_METRICS).
+            batch_size: Number of rows sent per judge request for batchable metrics.
+            completion_kwargs: Extra sampling parameters (defaults to temperature 0).
+            groups: Named groups of metrics scored together in a single call, e.g.
+                {"grounding": ["faithfulness", "hallucination", "groundedness"]}.
+            semantic_cache: Optional near-duplicate verdict cache consulted before each call.
+            stream: Stream judge responses and stop generating once the verdict is parsed.
+            score_first: Ask for scores before reasons; when streaming, reasons are skipped.
+            compressor: Optional context compressor applied before building prompts.
+            prompt_caching: Mark the stable prompt prefix for provider-side prompt caching.
+            self_consistency: Optional sampling policy; each verdict becomes the mean of several samples.
+        """
+        self.llm = llm
+        self.model = model
+        self.metrics = [m for m in (metrics or JUDGE_METRICS) if m in JUDGE_METRICS]
+        unknown = set(metrics or []) - set(JUDGE_METRICS)
+        if unknown:
+            logger.warning(f"No judge prompt defined for metrics {sorted(unknown)}; they will use the Scorer.")
+        self.batch_size = max(1, int(batch_size))
+        self.completion_kwargs = {"temperature": 0}
+        self.completion_kwargs.update(completion_kwargs or {})
+        self.semantic_cache = semantic_cache
+        self.stream = stream
+        self.score_first = score_first
+        self.compressor = compressor
+        self.prompt_caching = prompt_caching
+        self.self_consistency = self_consistency
+        self.groups: Dict[str, List[str]] = {}
+        for group_name, members in (groups or {}).items():
+            members = [m for m in members if m in self.metrics]
+            if len({tuple(JUDGE_METRICS[m]["inputs"]) for m in members}) > 1:
+                logger.warning(f"Judge group '{group_name}' mixes metrics with different inputs; metrics will be judged separately.")
+                continue
+            if len(members) > 1:
+                self.groups[group_name] = members
+
+    def group_of(self, metric_name: str) -> Optional[str]:
+        """Returns the name of the judge group containing the metric, if any."""
+        for group_name, members in self.groups.items():
+            if metric_name in members:
+                return group_name
+        return None
+
+    def supports(self, metric_name: str) -> bool:
+        """Returns True if this judge is configured to score the metric."""
+        return metric_name in self.metrics
+
+    def _fields(self, metric_name: str, data_point: Dict[str, Any]) -> List[str]:
+        # Raises KeyError for missing inputs, mirroring MetricsManager's argument mapping.
+        return [f"{name.capitalize()}:\n{_format_field(data_point[name])}" for name in JUDGE_METRICS[metric_name]["inputs"]]
+
+    def _split_fields(self, metric_name: str, data_point: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """Returns the formatted (context, other) inputs: the context is shared by every prompt for the row."""
+        inputs = JUDGE_METRICS[metric_name]["inputs"]
+        fields = dict(zip(inputs, self._fields(metric_name, data_point)))
+        return [fields[n] for n in inputs if n == "context"], [fields[n] for n in inputs if n != "context"]
+
+    @staticmethod
+    def _layout(stable: Sequence[str], varying: Sequence[str]) -> Tuple[str, int]:
+        """Joins prompt sections; returns the prompt and the length of its stable prefix."""
+        prefix = "\n\n".join(stable)
+        if not varying:
+            return prefix, 0
+        prefix += "\n\n"
+        return prefix + "\n\n".join(varying), len(prefix)
+
+    def _compressed(self, metric_names: Sequence[str], data_point: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Returns the data point with its context reduced to the metrics' budget, and the details to record."""
+        if self.compressor is None or "context" not in JUDGE_METRICS[metric_names[0]]["inputs"]:
+            return data_point, {}
+        budget = self.compressor.budget_for(metric_names)
+        if budget is None:
+            return data_point, {}
+        queries = [str(data_point.get(name) or "") for name in ("answer", "question")]
+        context, reduction = self.compressor.compress(data_point["context"], queries, budget)
+        return {**data_point, "context": context}, {"context_reduction": round(reduction, 4)}
+
+    def build_prompt(self, metric_name: str, data_point: Dict[str, Any]) -> str:
+        """Builds the single-row judge prompt for a metric."""
+        return self._single_prompt(metric_name, data_point)[0]
+
+    def _single_prompt(self, metric_name: str, data_point: Dict[str, Any]) -> Tuple[str, int]:
+        spec = JUDGE_METRICS[metric_name]
+        order = " Write the score before the reason." if self.score_first else ""
+        context, others = self._split_fields(metric_name, data_point)
+        return self._layout([
+            f"You are an impartial evaluator scoring {metric_name.replace('_', ' ')}.",
+            spec["criteria"],
+            f"Respond with only a JSON object of the form {_VERDICT_SCHEMA}.{order}",
+            *context,
+        ], others)
+
+    def build_batch_prompt(self, metric_name: str, data_points: Sequence[Dict[str, Any]]) -> str:
+        """Builds one prompt asking for a verdict on each of several rows."""
+        return self._batch_prompt(metric_name, data_points)[0]
+
+    def _batch_prompt(self, metric_name: str, data_points: Sequence[Dict[str, Any]]) -> Tuple[str, int]:
+        spec = JUDGE_METRICS[metric_name]
+        items = []
+        for item_id, data_point in enumerate(data_points, start=1):
+            items.append(f"### Item {item_id}\n" + "\n\n".join(self._fields(metric_name, data_point)))
+        if self.score_first:
+            schema = ('Respond with only a JSON object of the form {"scores": {"<item number>": <number between 0 and 1>, ...}, '
+                      '"reasons": {"<item number>": "<one short sentence>", ...}} containing exactly one score per item.')
+        else:
+            schema = ('Respond with only a JSON object of the form {"verdicts": [{"id": <item number>, "score": <number between 0 and 1>, '
+                      '"reason": "<one short sentence>"}]} containing exactly one verdict per item.')
+        return self._layout([
+            f"You are an impartial evaluator scoring {metric_name.replace('_', ' ')}.",
+            spec["criteria"],
+            schema,
+        ], [
+            f"You will be given {len(data_points)} items. Score each item independently of the others.",
+            *items,
+        ])
+
+    def build_group_prompt(self, metric_names: Sequence[str], data_point: Dict[str, Any]) -> str:
+        """Builds one prompt asking for a verdict on each of several metrics for a row."""
+        return self._group_prompt(metric_names, data_point)[0]
+
+    def _group_prompt(self, metric_names: Sequence[str], data_point: Dict[str, Any]) -> Tuple[str, int]:
+        criteria = [f"- {name}: {JUDGE_METRICS[name]['criteria']}" for name in metric_names]
+        if self.score_first:
+            scores = ", ".join(f'"{name}": <number between 0 and 1>' for name in metric_names)
+            reasons = ", ".join(f'"{name}": "<one short sentence>"' for name in metric_names)
+            schema = f'{{"scores": {{{scores}}}, "reasons": {{{reasons}}}}}'
+        else:
+            schema = "{" + ", ".join(f'"{name}": {_VERDICT_SCHEMA}' for name in metric_names) + "}"
+        context, others = self._split_fields(metric_names[0], data_point)
+        return self._layout([
+            "You are an impartial evaluator. Score the following metrics independently of each other.",
+            "\n".join(criteria),
+            f"Respond with only a JSON object of the form {schema}.",
+            *context,
+        ], others)
+
+    def _call_kwargs(self, prefix: int, sampled: bool = False) -> Dict[str, Any]:
+        kwargs = dict(self.completion_kwargs)
+        if sampled:
+            kwargs["temperature"] = self.self_consistency.temperature
+        if self.prompt_caching and prefix:
+            kwargs["cache_prefix"] = prefix
+        return kwargs
+
+    def _complete(self, prompt: str, single: bool = True, prefix: int = 0, sampled: bool = False) -> Tuple[str, Any]:
+        """
+        Returns the judge's text and its parsed JSON verdict (None if unparsable).
+        When streaming, generation is stopped as soon as the verdict is complete.
+        """
+        kwargs = self._call_kwargs(prefix, sampled)
+        if not self.stream:
+            text = self.llm.get_parsed_completion(prompt, self.model, **kwargs).text
+            return text, ResponseParser.extract_json(text)
+        watch = self._verdict_watcher(single)
+        with self.llm.stream_completion(prompt, self.model, **kwargs) as stream:
+            for chunk in stream:
+                verdict = watch(chunk)
+                if verdict is not None:
+                    return stream.text, verdict
+        return stream.text, ResponseParser.extract_json(stream.text)
+
+    def _verdict_watcher(self, single: bool) -> Callable[[str], Optional[Any]]:
+        """Returns a function fed each streamed chunk that gives the verdict once enough text has arrived."""
+        extractor = StreamingJSONExtractor()
+        if not self.score_first:
+            def first_object(chunk: str) -> Optional[Dict[str, Any]]:
+                extractor.feed(chunk)
+                return extractor.first
+            return first_object
+        if single:
+            def leading_score(chunk: str) -> Optional[Dict[str, Any]]:
+                extractor.feed(chunk)
+                match = _LEADING_SCORE.match(extractor.text)
+                return {"score": float(match.group(1)), "reason": ""} if match else None
+            return leading_score
+
+        # The scores are a nested object, complete long before the outer one.
+        scores = StreamingJSONExtractor()
+
+        def scores_object(chunk: str) -> Optional[Dict[str, Any]]:
+            if scores.text:
+                scores.feed(chunk)
+            else:
+                extractor.feed(chunk)
+                key = extractor.text.find('"scores"')
+                if key >= 0:
+                    scores.feed(extractor.text[key:])
+            return {"scores": scores.first} if scores.first is not None else None
+        return scores_object
+
+    async def _complete_async(self, prompt: str, prefix: int = 0, sampled: bool = False) -> Tuple[str, Any]:
+        parsed = await self.llm.get_parsed_completion_async(prompt, self.model, **self._call_kwargs(prefix, sampled))
+        return parsed.text, ResponseParser.extract_json(parsed.text)
+
+    def _verdicts(
+        self,
+        keys: Sequence[Any],
+        draw: Callable[[List[Any], bool], Dict[Any, Dict[str, Any]]],
+        metric_of: Optional[Callable[[Any], str]] = None
+    ) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Returns the valid verdicts drawn for each key; keys without any are left out.
+
+        `draw(keys, sampled)` makes one judge call covering `keys` and returns
+        their valid verdicts. Without self-consistency that is a single call;
+        with it, calls are repeated (`concurrency` at a time) for the keys
+        whose samples have not converged. `metric_of` maps a key to its metric
+        (keys are metric names by default).
+        """
+        policy = self.self_consistency
+        if policy is None:
+            return {key: [verdict] for key, verdict in draw(list(keys), False).items()}
+        samples: Dict[Any, List[Dict[str, Any]]] = {key: [] for key in keys}
+        pending, drawn = list(keys), 0
+        while pending:
+            size = policy.round_size(drawn)
+            if size == 1:
+                rounds = [draw(pending, True)]
+            else:
+                # Each sample runs in a copy of the caller's context, keeping usage attribution.
+                with ThreadPoolExecutor(max_workers=size) as pool:
+                    futures = [pool.submit(contextvars.copy_context().run, draw, pending, True) for _ in range(size)]
+                    rounds = [future.result() for future in futures]
+            drawn += size
+            pending = self._settle(samples, pending, rounds, drawn, metric_of)
+        return {key: verdicts for key, verdicts in samples.items() if verdicts}
+
+    async def _verdicts_async(
+        self,
+        keys: Sequence[Any],
+        draw: Callable[[List[Any], bool], Awaitable[Dict[Any, Dict[str, Any]]]],
+        metric_of: Optional[Callable[[Any], str]] = None
+    ) -> Dict[Any, List[Dict[str, Any]]]:
+        """Async counterpart of `_verdicts`; the samples of a round are gathered concurrently."""
+        policy = self.self_consistency
+        if policy is None:
+            return {key: [verdict] for key, verdict in (await draw(list(keys), False)).items()}
+        samples: Dict[Any, List[Dict[str, Any]]] = {key: [] for key in keys}
+        pending, drawn = list(keys), 0
+        while pending:
+            size = policy.round_size(drawn)
+            rounds = await asyncio.gather(*(draw(pending, True) for _ in range(size)))
+            drawn += size
+            pending = self._settle(samples, pending, rounds, drawn, metric_of)
+        return {key: verdicts for key, verdicts in samples.items() if verdicts}
+
+    def _settle(
+        self,
+        samples: Dict[Any, List[Dict[str, Any]]],
+        pending: List[Any],
+        rounds: Sequence[Dict[Any, Dict[str, Any]]],
+        drawn: int,
+        metric_of: Optional[Callable[[Any], str]]
+    ) -> List[Any]:
+        """Adds a round of verdicts to the samples; returns the keys that still need more."""
+        policy = self.self_consistency
+        for verdicts in rounds:
+            for key, verdict in verdicts.items():
+                samples[key].append(verdict)
+        remaining = []
+        for key in pending:
+            scores = [_parse_score(verdict) for verdict in samples[key]]
+            if drawn < policy.max_samples and not policy.converged(scores, metric_of(key) if metric_of else key):
+                remaining.append(key)
+            else:
+                policy.record(drawn)
+        return remaining
+
+    def _result(self, metric_name: str, verdict: Dict[str, Any], score: float, **details: Any) -> EvaluationResult:
+        details = {"reason": str(verdict.get("reason", "")), "judge_model": self.model, **details}
+        return EvaluationResult(score=score, details=details, metric_name=metric_name)
+
+    def _sampled_result(self, metric_name: str, verdicts: List[Dict[str, Any]], **details: Any) -> EvaluationResult:
+        """Returns the result for a metric's verdicts: the only one, or the aggregate of self-consistency samples."""
+        if self.self_consistency is None:
+            return self._result(metric_name, verdicts[0], _parse_score(verdicts[0]), **details)
+        scores = [_parse_score(verdict) for verdict in verdicts]
+        mean, variance = self.self_consistency.aggregate(scores)
+        # The reason of the sample closest to the aggregate best explains it.
+        closest = min(verdicts, key=lambda verdict: abs(_parse_score(verdict) - mean))
+        return self._result(
+            metric_name, closest, mean, samples=len(scores), sample_scores=scores, score_variance=round(variance, 6), **details
+        )
+
+    def _cached_result(self, metric_name: str, data_point: Dict[str, Any]) -> Optional[EvaluationResult]:
+        """Returns a result reusing a near-duplicate verdict from the semantic cache, if any."""
+        if self.semantic_cache is None:
+            return None
+        payload = normalize_payload(metric_name, data_point, JUDGE_METRICS[metric_name]["inputs"])
+        hit = self.semantic_cache.lookup(metric_name, payload)
+        if hit is None:
+            return None
+        verdict, similarity = hit
+        return self._result(metric_name, verdict, verdict["score"], semantic_cache_similarity=round(similarity, 4))
+
+    def _remember(self, metric_name: str, data_point: Dict[str, Any], result: EvaluationResult) -> EvaluationResult:
+        if self.semantic_cache is not None and "semantic_cache_similarity" not in result.details:
+            payload = normalize_payload(metric_name, data_point, JUDGE_METRICS[metric_name]["inputs"])
+            self.semantic_cache.add(metric_name, payload, {"score": result.score, "reason": result.details.get("reason", "")})
+        return result
+
+    def evaluate(self, metric_name: str, data_point: Dict[str, Any]) -> EvaluationResult:
+        """
+        Scores a single row with one judge call.
+
+        Raises:
+            KeyError: If the data point lacks an input the metric needs.
+            JudgeParseError: If the response contains no valid verdict.
+        """
+        self._fields(metric_name, data_point)
+        cached = self._cached_result(metric_name, data_point)
+        if cached is not None:
+            return cached
+        view, details = self._compressed([metric_name], data_point)
+        prompt, prefix = self._single_prompt(metric_name, view)
+        texts: List[str] = []
+
+        def draw(_: List[str], sampled: bool) -> Dict[str, Dict[str, Any]]:
+            text, verdict = self._complete(prompt, prefix=prefix, sampled=sampled)
+            texts.append(text)
+            return {metric_name: verdict} if _parse_score(verdict) is not None else {}
+        verdicts = self._verdicts([metric_name], draw).get(metric_name)
+        return self._single_result(metric_name, data_point, texts, verdicts, **details)
+
+    async def evaluate_async(self, metric_name: str, data_point: Dict[str, Any]) -> EvaluationResult:
+        """
+        Async counterpart of `evaluate`; many rows can be judged concurrently on
+        one event loop (e.g. with asyncio.gather) over the pooled connections.
+        """
+        self._fields(metric_name, data_point)
+        cached = self._cached_result(metric_name, data_point)
+        if cached is not None:
+            return cached
+        view, details = self._compressed([metric_name], data_point)
+        prompt, prefix = self._single_prompt(metric_name, view)
+        texts: List[str] = []
+
+        async def draw(_: List[str], sampled: bool) -> Dict[str, Dict[str, Any]]:
+            text, verdict = await self._complete_async(prompt, prefix, sampled)
+            texts.append(text)
+            return {metric_name: verdict} if _parse_score(verdict) is not None else {}
+        verdicts = (await self._verdicts_async([metric_name], draw)).get(metric_name)
+        return self._single_result(metric_name, data_point, texts, verdicts, **details)
+
+    def _single_result(
+        self,
+        metric_name: str,
+        data_point: Dict[str, Any],
+        texts: List[str],
+        verdicts: Optional[List[Dict[str, Any]]],
+        **details: Any
+    ) -> EvaluationResult:
+        if not verdicts:
+            raise JudgeParseError(f"Judge returned no valid verdict for '{metric_name}': {texts[-1][:200]}")
+        return self._remember(metric_name, data_point, self._sampled_result(metric_name, verdicts, **details))
+
+    def evaluate_batch(self, metric_name: str, data_points: Sequence[Dict[str, Any]]) -> List[Optional[EvaluationResult]]:
+        """
+        Scores several rows for one metric with a single batched judge call.
+
+        Rows whose verdict is missing or malformed are re-scored with single-row
+        calls. The returned list is aligned with `data_points`; an entry is None
+        if that row could not be scored at all.
+        """
+        results: List[Optional[EvaluationResult]] = [None] * len(data_points)
+        valid = []
+        for index, data_point in enumerate(data_points):
+            try:
+                self._fields(metric_name, data_point)
+            except KeyError as e:
+                logger.error(f"Missing key {e} in data point for metric '{metric_name}'. Skipping.")
+                continue
+            results[index] = self._cached_result(metric_name, data_point)
+            if results[index] is None:
+                valid.append(index)
+        if not valid:
+            return results
+        if len(valid) == 1:
+            return self._fallback(metric_name, data_points, valid, results)
+
+        views = {index: self._compressed([metric_name], data_points[index]) for index in valid}
+
+        def draw(indices: List[int], sampled: bool) -> Dict[int, Dict[str, Any]]:
+            prompt, prefix = self._batch_prompt(metric_name, [views[index][0] for index in indices])
+            by_id = self._batch_verdicts(*self._complete(prompt, single=False, prefix=prefix, sampled=sampled))
+            return {index: by_id[item_id] for item_id, index in enumerate(indices, start=1) if item_id in by_id}
+        sampled = self._verdicts(valid, draw, metric_of=lambda _: metric_name)
+
+        missing = []
+        for index in valid:
+            if index not in sampled:
+                missing.append(index)
+                continue
+            results[index] = self._remember(
+                metric_name, data_points[index],
+                self._sampled_result(metric_name, sampled[index], batch_size=len(valid), **views[index][1])
+            )
+        if missing:
+            logger.warning(
+                f"Batched judge response for '{metric_name}' had no valid verdict for {len(missing)} of "
+                f"{len(valid)} rows; falling back to single-row calls."
+            )
+            self._fallback(metric_name, data_points, missing, results)
+        return results
+
+    def _batch_verdicts(self, text: str, parsed: Any) -> Dict[int, Dict[str, Any]]:
+        """Returns the valid verdicts of a batched response by item number."""
+        if self.score_first and isinstance(parsed, dict) and "scores" in parsed:
+            parsed = {"verdicts": [{"id": key, **verdict} for key, verdict in _from_score_first(parsed).items()]}
+        verdicts = parsed.get("verdicts") if isinstance(parsed, dict) else None
+        if not isinstance(verdicts, list):
+            # Tolerate one verdict object per item instead of the requested wrapper.
+            verdicts = [v for v in ResponseParser.extract_all_json(text) if "id" in v]
+        by_id: Dict[int, Dict[str, Any]] = {}
+        for verdict in verdicts if isinstance(verdicts, list) else []:
+            try:
+                item_id = int(verdict["id"])
+            except (TypeError, KeyError, ValueError):
+                continue
+            if _parse_score(verdict) is not None:
+                by_id[item_id] = verdict
+        return by_id
+
+    def evaluate_group(self, metric_names: Sequence[str], data_point: Dict[str, Any]) -> Dict[str, EvaluationResult]:
+        """
+        Scores several compatible metrics for one row with a single judge call.
+
+        Metrics served by the semantic cache are not sent; metrics missing from
+        the combined verdict are re-scored with one call each.
+
+        Returns:
+            A mapping from metric name to its EvaluationResult.
+
+        Raises:
+            KeyError: If the data point lacks an input the metrics need.
+        """
+        metric_names = list(metric_names)
+        self._fields(metric_names[0], data_point)
+        results: Dict[str, EvaluationResult] = {}
+        for metric_name in metric_names:
+            cached = self._cached_result(metric_name, data_point)
+            if cached is not None:
+                results[metric_name] = cached
+        pending = [m for m in metric_names if m not in results]
+        if len(pending) > 1:
+            view, details = self._compressed(pending, data_point)
+            group_name = self.group_of(pending[0])
+
+            def draw(names: List[str], sampled: bool) -> Dict[str, Dict[str, Any]]:
+                prompt, prefix = self._group_prompt(names, view)
+                parsed = _from_score_first(self._complete(prompt, single=False, prefix=prefix, sampled=sampled)[1])
+                if not isinstance(parsed, dict):
+                    return {}
+                return {name: parsed[name] for name in names if _parse_score(parsed.get(name)) is not None}
+            for metric_name, verdicts in self._verdicts(pending, draw).items():
+                results[metric_name] = self._remember(
+                    metric_name, data_point, self._sampled_result(metric_name, verdicts, judge_group=group_name, **details)
+                )
+        missing = [m for m in metric_names if m not in results]
+        if missing and len(pending) > 1:
+            logger.warning(f"Combined judge response had no valid verdict for {missing}; falling back to single-metric calls.")
+        for metric_name in missing:
+            try:
+                results[metric_name] = self.evaluate(metric_name, data_point)
+            except Exception as e:
+                logger.error(f"Error during judge evaluation of metric '{metric_name}': {e}")
+        return results
+
+    def _fallback(
+        self,
+        metric_name: str,
+        data_points: Sequence[Dict[str, Any]],
+        indices: Sequence[int],
+        results: List[Optional[EvaluationResult]]
+    ) -> List[Optional[EvaluationResult]]:
+        for index in indices:
+            try:
+                results[index] = self.evaluate(metric_name, data_points[index])
+            except Exception as e:
+                logger.error(f"Error during judge evaluation of metric '{metric_name}': {e}")
+        return results
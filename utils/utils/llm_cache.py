@@ -0,0 +1,164 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def make_cache_key(provider: str, model: str, prompt: Any, params: Dict[str, Any]) -> str:
+    """
+    Returns a stable hash of everything that determines an LLM response:
+    provider, model, prompt (or message list) and sampling parameters.
+    """
+    payload = json.dumps(
+        {"provider": provider, "model": model, "prompt": prompt, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent LLM response cache backed by a local SQLite file.
+
+    Entries expire after `ttl_seconds` and the least recently used entries are
+    evicted once the cache exceeds `max_entries` rows or `max_bytes` of payload.
+    The entry count and payload total are kept as running totals, so a put only
+    evicts when it crosses a limit; expired entries are purged (and the totals
+    re-read from the file, which other processes may share) every
+    `purge_every` puts. In read-only mode (e.g. CI) the file is opened
+    read-only: hits are served but nothing is written, not even access times.
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/llm_responses.sqlite",
+        ttl_seconds: Optional[float] = 30 * 24 * 3600,
+        max_entries: Optional[int] = 100_000,
+        max_bytes: Optional[int] = 1024 ** 3,
+        read_only: bool = False,
+        purge_every: int = 1000
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.read_only = read_only
+        self.purge_every = max(1, int(purge_every))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._count = 0
+        self._bytes = 0
+        self._conn = self._connect()
+        if self._conn is not None and not self.read_only:
+            with self._lock:
+                self._purge()
+                self._conn.commit()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.read_only:
+            if not self.path.is_file():
+                logger.warning(f"Read-only LLM cache '{self.path}' does not exist; every call will miss.")
+                return None
+            return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, payload TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, last_accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_accessed ON responses(last_accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses(created_at)")
+        conn.commit()
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached payload for `key`, or None on a miss or expired entry."""
+        if self._conn is None:
+            self.misses += 1
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT payload, created_at, size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds is not None and now - row[1] > self.ttl_seconds):
+                if row is not None and not self.read_only:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self._count -= 1
+                    self._bytes -= row[2]
+                self.misses += 1
+                return None
+            if not self.read_only:
+                self._conn.execute("UPDATE responses SET last_accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, payload: Any) -> None:
+        """Stores a JSON-serializable payload under `key` (no-op in read-only mode)."""
+        if self.read_only or self._conn is None:
+            return
+        data = json.dumps(payload, default=str)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, size, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            if old is None:
+                self._count += 1
+            self._bytes += len(data) - (old[0] if old else 0)
+            self._puts += 1
+            if self._puts % self.purge_every == 0:
+                self._purge()
+            if self._over_limit():
+                self._evict()
+            self._conn.commit()
+
+    def _over_limit(self) -> bool:
+        return (
+            (self.max_entries is not None and self._count > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        )
+
+    def _purge(self) -> None:
+        """Deletes expired entries and re-reads the totals (the file may be shared by other processes)."""
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._count, self._bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if self._over_limit():
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drops the least recently used entries until both limits hold again."""
+        excess_count = self._count - self.max_entries if self.max_entries is not None else 0
+        excess_bytes = self._bytes - self.max_bytes if self.max_bytes is not None else 0
+        victims = []
+        freed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_accessed ASC"):
+            if len(victims) >= excess_count and freed >= excess_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._count -= len(victims)
+        self._bytes -= freed
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
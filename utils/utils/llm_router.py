@@ -0,0 +1,223 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .llm_wrapper import LLMWrapper
+from .logger import setup_logger
+from .response_parser import ParsedResponse
+from .retry import CircuitBreaker, CircuitOpenError, RetryError, is_auth_error, is_overload, is_retryable
+from .streaming import CompletionStream
+
+logger = setup_logger(__name__)
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    Returns True if the error is the backend's fault (transient, overloaded,
+    unauthorized, or out of retries), so another backend may succeed. Errors
+    caused by the request itself (e.g. a 400 for an oversized prompt, or a
+    cassette miss) would fail on every backend.
+    """
+    if isinstance(error, RetryError):
+        # The wrapper's own retries or circuit breaker gave up on this backend.
+        return True
+    # A rejected API key is specific to its backend; another backend may accept the call.
+    return is_retryable(error) or is_overload(error) or is_auth_error(error)
+
+
+@dataclass
+class LLMBackend:
+    """One routable LLM backend: a wrapper (provider + API key) and its share of traffic."""
+
+    name: str
+    llm: LLMWrapper
+    weight: float = 1.0
+    model: Optional[str] = None
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    requests: int = 0
+    failures: int = 0
+
+
+class LLMRouter:
+    """
+    Spreads LLM traffic over several backends (API keys, providers, local
+    servers) and fails over when one of them degrades.
+
+    Each call picks a backend by weighted random choice, where a backend's
+    weight is scaled down by its smoothed error rate and by its smoothed
+    latency relative to the other backends. A call failing for a backend
+    reason (see `is_backend_failure`) is retried once on each remaining
+    backend; other errors are raised at once and do not count against the
+    backend's health. Backends whose recent failure rate trips their
+    circuit breaker are skipped until the breaker's cooldown lets a trial call
+    through. Backend wrappers should use `RetryPolicy.for_routed_backend()`,
+    which retries only transport errors in place and has no breaker of its
+    own, so overloads and server errors fail over at once and the router's
+    breakers are the only ones. The router has the same completion interface
+    as LLMWrapper, so LLMJudge can use either.
+    """
+
+    def __init__(self, backends: Sequence[LLMBackend], smoothing: float = 0.2, rng: Optional[random.Random] = None):
+        """
+        Args:
+            backends: The backends to route over (names must be unique).
+            smoothing: Weight of the newest observation in the latency and error averages.
+            rng: Random source for backend selection.
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend.")
+        self.backends = list(backends)
+        self.smoothing = smoothing
+        self.rng = rng or random.Random()
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def _effective_weight(self, backend: LLMBackend, typical_latency: float) -> float:
+        latency = backend.latency if backend.latency is not None else typical_latency
+        return backend.weight * max(0.01, 1.0 - backend.error_rate) * typical_latency / max(latency, 1e-6)
+
+    def _ranked(self, exclude: Set[str]) -> List[LLMBackend]:
+        """Orders the remaining backends by weighted random sampling without replacement."""
+        with self._lock:
+            candidates = [b for b in self.backends if b.name not in exclude and b.weight > 0]
+            known = [b.latency for b in candidates if b.latency is not None]
+            typical = sum(known) / len(known) if known else 1.0
+            keys = [
+                (self.rng.random() ** (1.0 / self._effective_weight(b, typical)), b) for b in candidates
+            ]
+        return [b for _, b in sorted(keys, key=lambda item: item[0], reverse=True)]
+
+    def choose(self, exclude: Optional[Set[str]] = None, last_error: Optional[BaseException] = None) -> LLMBackend:
+        """Returns the backend for the next call, skipping excluded and tripped ones."""
+        for backend in self._ranked(exclude or set()):
+            if backend.breaker.allow():
+                return backend
+        raise CircuitOpenError(
+            "No LLM backend is available (all failed or circuit open).", attempts=len(exclude or ()), last_error=last_error
+        )
+
+    def record(self, backend: LLMBackend, success: bool, seconds: Optional[float] = None) -> None:
+        """Feeds a call's outcome into the backend's live stats and circuit breaker."""
+        backend.breaker.record(success)
+        with self._lock:
+            backend.requests += 1
+            backend.failures += 0 if success else 1
+            backend.error_rate += self.smoothing * ((0.0 if success else 1.0) - backend.error_rate)
+            if success and seconds is not None:
+                backend.latency = seconds if backend.latency is None else backend.latency + self.smoothing * (seconds - backend.latency)
+
+    def _failed(self, backend: LLMBackend, error: Exception, tried: Set[str]) -> None:
+        if not is_backend_failure(error):
+            raise error
+        self.record(backend, success=False)
+        tried.add(backend.name)
+        if len(tried) >= len(self.backends):
+            raise error
+        with self._lock:
+            self.failovers += 1
+        logger.warning(f"LLM backend '{backend.name}' failed ({error}); failing over.")
+
+    def _route(self, call: Callable[[LLMBackend], Any]) -> Any:
+        tried: Set[str] = set()
+        error: Optional[Exception] = None
+        while True:
+            backend = self.choose(tried, error)
+            start = time.perf_counter()
+            try:
+                result = call(backend)
+            except Exception as e:
+                self._failed(backend, e, tried)
+                error = e
+                continue
+            self.record(backend, success=True, seconds=time.perf_counter() - start)
+            return result
+
+    async def _aroute(self, call: Callable[[LLMBackend], Any]) -> Any:
+        tried: Set[str] = set()
+        error: Optional[Exception] = None
+        while True:
+            backend = self.choose(tried, error)
+            start = time.perf_counter()
+            try:
+                result = await call(backend)
+            except Exception as e:
+                self._failed(backend, e, tried)
+                error = e
+                continue
+            self.record(backend, success=True, seconds=time.perf_counter() - start)
+            return result
+
+    def get_completion(self, prompt: str, model: str, **kwargs) -> Any:
+        return self._route(lambda b: b.llm.get_completion(prompt, b.model or model, **kwargs))
+
+    async def get_completion_async(self, prompt: str, model: str, **kwargs) -> Any:
+        return await self._aroute(lambda b: b.llm.get_completion_async(prompt, b.model or model, **kwargs))
+
+    def get_parsed_completion(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        return self._route(lambda b: b.llm.get_parsed_completion(prompt, b.model or model, **kwargs))
+
+    async def get_parsed_completion_async(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        return await self._aroute(lambda b: b.llm.get_parsed_completion_async(prompt, b.model or model, **kwargs))
+
+    def stream_completion(self, prompt: str, model: str, **kwargs) -> CompletionStream:
+        """
+        Streams from the chosen backend. A backend failing before its first text
+        is failed over; once text has been received the error is raised.
+        """
+        return CompletionStream(self._stream_chunks(prompt, model, **kwargs), "router", model)
+
+    def _stream_chunks(self, prompt: str, model: str, **kwargs) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        tried: Set[str] = set()
+        error: Optional[Exception] = None
+        while True:
+            backend = self.choose(tried, error)
+            start = time.perf_counter()
+            received = False
+            try:
+                with backend.llm.stream_completion(prompt, backend.model or model, **kwargs) as stream:
+                    for text in stream:
+                        received = True
+                        yield text, {}
+                    yield "", {**stream.metadata, "provider": backend.llm.provider, "backend": backend.name}
+            except GeneratorExit:
+                # Closed by the reader (e.g. the verdict was complete): a success.
+                self.record(backend, success=True, seconds=time.perf_counter() - start)
+                raise
+            except Exception as e:
+                if received:
+                    if is_backend_failure(e):
+                        self.record(backend, success=False)
+                    raise
+                self._failed(backend, e, tried)
+                error = e
+                continue
+            self.record(backend, success=True, seconds=time.perf_counter() - start)
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns per-backend traffic and health for run telemetry."""
+        with self._lock:
+            backends = {
+                b.name: {
+                    "provider": b.llm.provider,
+                    "requests": b.requests,
+                    "failures": b.failures,
+                    "latency": None if b.latency is None else round(b.latency, 4),
+                    "error_rate": round(b.error_rate, 4),
+                    **b.breaker.to_dict(),
+                }
+                for b in self.backends
+            }
+            return {"failovers": self.failovers, "backends": backends}
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.llm.close()
+
+    async def aclose(self) -> None:
+        for backend in self.backends:
+            await backend.llm.aclose()
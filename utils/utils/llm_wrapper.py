@@ -1,48 +1,571 @@
+import asyncio
+import hashlib
 import os
-from typing import Any, Optional
-from openai import OpenAI
-from anthropic import Anthropic
-from .retry import retry_with_exponential_backoff
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletion
+from anthropic import Anthropic, AsyncAnthropic
+from anthropic.types import Message
+from .retry import RetryPolicy, is_overload
+from .http_pool import HTTPClientPool, sdk_http_module
+from .concurrency import ConcurrencyController
+from .rate_limiter import SharedRateLimiter, estimate_tokens
+from .hedging import HedgingPolicy
+from .local_llm import LocalLLMClient
+from .streaming import CompletionStream
+from .response_parser import ResponseParser, ParsedResponse
+from .llm_cache import ResponseCache, make_cache_key
+from .usage import UsageTracker, token_counts
+from .cassette import Cassette
+
+def prompt_cache_request(provider: str, prompt: str, params: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Applies the 'cache_prefix' option (length in characters of the prompt's
+    stable prefix) for a provider. Returns the user message content and the
+    request parameters without the option.
+
+    Anthropic gets the prefix as its own text block marked for prompt caching.
+    OpenAI caches prompt prefixes automatically; calls sharing a prefix get the
+    same 'prompt_cache_key' so they are routed to the same cache. Other
+    providers (e.g. Ollama, llama.cpp) reuse their KV cache on their own.
+    """
+    params = dict(params)
+    prefix = params.pop("cache_prefix", None)
+    if not prefix or prefix >= len(prompt):
+        return prompt, params
+    if provider == "anthropic":
+        return [
+            {"type": "text", "text": prompt[:prefix], "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": prompt[prefix:]},
+        ], params
+    if provider == "openai":
+        params.setdefault("prompt_cache_key", hashlib.sha256(prompt[:prefix].encode("utf-8")).hexdigest()[:32])
+    return prompt, params
 
 class LLMWrapper:
     """A wrapper for various LLM provider APIs."""
 
-    def __init__(self, provider: str, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        provider: str,
+        api_key: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        cache_nondeterministic: bool = False,
+        http_pool: Optional[HTTPClientPool] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        concurrency: Optional[ConcurrencyController] = None,
+        rate_limiter: Optional[SharedRateLimiter] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        base_url: Optional[str] = None,
+        local_api_style: str = "ollama",
+        name: Optional[str] = None,
+        usage: Optional[UsageTracker] = None,
+        cassette: Optional[Cassette] = None
+    ):
+        """
+        Args:
+            provider: 'openai', 'anthropic' or 'local' (a self-hosted server).
+            api_key: API key; defaults to the <PROVIDER>_API_KEY environment variable.
+                Optional for the local provider.
+            cache: Optional persistent response cache.
+            cache_nondeterministic: Also cache calls that are not temperature 0.
+            http_pool: Shared keep-alive connection pool; the wrapper creates and
+                owns a private one if omitted.
+            retry_policy: Retry policy shared by the run (budget, circuit breakers);
+                defaults to a plain per-call policy.
+            concurrency: Adaptive in-flight limits per provider/model; unlimited if omitted.
+            rate_limiter: Host-wide requests/tokens per minute budget shared with other processes.
+            hedging: Optional policy duplicating slow deterministic (temperature 0) requests.
+            base_url: Override of the provider's API endpoint. For the local provider
+                it defaults to LOCAL_LLM_BASE_URL or Ollama's 'http://localhost:11434'.
+            local_api_style: 'ollama' or 'openai' (OpenAI-compatible local servers).
+            name: Backend name keying this wrapper's circuit breaker and concurrency
+                limits (defaults to the provider). Rate limits are keyed by provider,
+                unless the rate limiter has an entry for this name (e.g. a second
+                API key with its own quota).
+            usage: Optional tracker recording tokens, cost, latency and cache status of every call.
+            cassette: Optional record/replay cassette. In replay mode provider calls
+                (including streams) are served from the cassette and no API key is needed.
+        """
         self.provider = provider.lower()
+        self.name = name or self.provider
+        self.cache = cache
+        self.cache_nondeterministic = cache_nondeterministic
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.hedging = hedging
+        self.usage = usage
+        self._rate_key = name if name in getattr(rate_limiter, "limits", {}) else self.provider
+        self.cassette = cassette
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+        self._owns_pool = http_pool is None
+        self.http_pool = http_pool or HTTPClientPool()
+        self._async_client = None
+        self._async_http_client = None
+        self.base_url = base_url
         api_key = api_key or os.getenv(f"{self.provider.upper()}_API_KEY")
 
-        if not api_key:
-            raise ValueError(f"API key for provider '{self.provider}' not found.")
+        if not api_key and self.provider != 'local':
+            if cassette is None or not cassette.replaying:
+                raise ValueError(f"API key for provider '{self.provider}' not found.")
+            # Replayed calls never reach the provider; the SDK client still needs a key.
+            api_key = "cassette-replay"
+        self._api_key = api_key
 
         if self.provider == 'openai':
-            self.client = OpenAI(api_key=api_key)
+            self._http_module = sdk_http_module(OpenAI)
+            self.client = OpenAI(
+                api_key=api_key, base_url=base_url, max_retries=0,
+                http_client=self.http_pool.sync_client(self.provider, self._http_module)
+            )
         elif self.provider == 'anthropic':
-            self.client = Anthropic(api_key=api_key)
+            self._http_module = sdk_http_module(Anthropic)
+            self.client = Anthropic(
+                api_key=api_key, base_url=base_url, max_retries=0,
+                http_client=self.http_pool.sync_client(self.provider, self._http_module)
+            )
+        elif self.provider == 'local':
+            self.client = LocalLLMClient(
+                base_url or os.getenv("LOCAL_LLM_BASE_URL", "http://localhost:11434"),
+                self.http_pool,
+                api_style=local_api_style,
+                api_key=api_key
+            )
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
 
-    @retry_with_exponential_backoff
     def get_completion(self, prompt: str, model: str, **kwargs) -> Any:
         """
         Gets a completion from the configured provider/model.
+
+        Deterministic (temperature 0) calls are served from the response cache
+        when one is configured; misses are stored after a successful call.
+        """
+        start = time.perf_counter()
+        cache_key = self._cache_key(prompt, model, kwargs)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return self._record_usage(self._deserialize_response(cached), model, start, cached=True)
+        if self._should_hedge(kwargs):
+            response = self.hedging.call(
+                self._get_hedge_executor(), model, self._request_completion, prompt, model,
+                on_discard=lambda loser: self._record_usage(loser, model, start), **kwargs,
+            )
+        else:
+            response = self._request_completion(prompt, model, **kwargs)
+        if cache_key is not None:
+            self.cache.put(cache_key, self._serialize_response(response))
+        return self._record_usage(response, model, start)
+
+    async def get_completion_async(self, prompt: str, model: str, **kwargs) -> Any:
+        """
+        Async counterpart of `get_completion` using the provider's async client.
+
+        Requests share the pooled keep-alive connections of `http_pool`, so many
+        calls can be in flight on one event loop without a thread per call.
+        """
+        start = time.perf_counter()
+        cache_key = self._cache_key(prompt, model, kwargs)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return self._record_usage(self._deserialize_response(cached), model, start, cached=True)
+        if self._should_hedge(kwargs):
+            response = await self.hedging.acall(
+                model, self._request_completion_async, prompt, model,
+                on_discard=lambda loser: self._record_usage(loser, model, start), **kwargs,
+            )
+        else:
+            response = await self._request_completion_async(prompt, model, **kwargs)
+        if cache_key is not None:
+            self.cache.put(cache_key, self._serialize_response(response))
+        return self._record_usage(response, model, start)
+
+    @staticmethod
+    def _response_usage(response: Any) -> Dict[str, Any]:
+        # Local responses are Ollama-style dicts carrying their token counts at the top level.
+        if isinstance(response, dict):
+            return response
+        return ResponseParser._usage_dict(getattr(response, "usage", None))
+
+    def _record_usage(self, response: Any, model: str, start: float, cached: bool = False) -> Any:
+        if self.usage is not None:
+            self.usage.record(self.provider, model, self._response_usage(response), time.perf_counter() - start, cached=cached)
+        return response
+
+    def _request_completion(self, prompt: str, model: str, **kwargs) -> Any:
+        # The SDK clients do not retry; the policy is the only retry layer.
+        return self.retry_policy.call(self._dispatch_completion, prompt, model, breaker_key=self.name, **kwargs)
+
+    async def _request_completion_async(self, prompt: str, model: str, **kwargs) -> Any:
+        return await self.retry_policy.acall(self._dispatch_completion_async, prompt, model, breaker_key=self.name, **kwargs)
+
+    def _dispatch_completion(self, prompt: str, model: str, **kwargs) -> Any:
+        # Each attempt takes rate-limit budget and holds a concurrency slot;
+        # backoff sleeps between attempts do not.
+        estimate = 0
+        if self.rate_limiter is not None:
+            estimate = estimate_tokens(prompt, kwargs.get("max_tokens"))
+            self.rate_limiter.acquire(self._rate_key, estimate)
+        if self.concurrency is not None:
+            response = self.concurrency.limiter(self.name, model).run(self._call_provider, prompt, model, **kwargs)
+        else:
+            response = self._call_provider(prompt, model, **kwargs)
+        self._settle_rate_limit(response, estimate)
+        return response
+
+    async def _dispatch_completion_async(self, prompt: str, model: str, **kwargs) -> Any:
+        estimate = 0
+        if self.rate_limiter is not None:
+            estimate = estimate_tokens(prompt, kwargs.get("max_tokens"))
+            await self.rate_limiter.acquire_async(self._rate_key, estimate)
+        if self.concurrency is not None:
+            response = await self.concurrency.limiter(self.name, model).arun(self._call_provider_async, prompt, model, **kwargs)
+        else:
+            response = await self._call_provider_async(prompt, model, **kwargs)
+        self._settle_rate_limit(response, estimate)
+        return response
+
+    def _settle_rate_limit(self, response: Any, estimate: int) -> None:
+        """Replaces the estimated token debit with the usage the provider reported."""
+        if self.rate_limiter is None:
+            return
+        if isinstance(response, dict):
+            used = (response.get("prompt_eval_count") or 0) + (response.get("eval_count") or 0)
+        else:
+            usage = ResponseParser._usage_dict(getattr(response, "usage", None))
+            used = usage.get("total_tokens") or (usage.get("input_tokens") or 0) + (usage.get("output_tokens") or 0)
+        if used:
+            self.rate_limiter.adjust(self._rate_key, used - estimate)
+
+    def _open_stream(self, prompt: str, model: str, **kwargs) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        One attempt at opening a stream: takes rate-limit budget and a concurrency
+        slot, then reads up to the first chunk so that connection errors, 429s
+        and 5xx surface here, where the retry policy can retry them. The slot is
+        held until the stream ends.
         """
+        estimate = 0
+        if self.rate_limiter is not None:
+            estimate = estimate_tokens(prompt, kwargs.get("max_tokens"))
+            self.rate_limiter.acquire(self._rate_key, estimate)
+        limiter = self.concurrency.limiter(self.name, model) if self.concurrency is not None else None
+        if limiter is not None:
+            limiter.acquire()
+        chunks = self._provider_stream_chunks(prompt, model, **kwargs)
+        try:
+            first = next(chunks, None)
+        except Exception as e:
+            chunks.close()
+            if limiter is not None:
+                limiter.release(overloaded=is_overload(e), success=False)
+            raise
+        return self._held_chunks(chunks, first, limiter, estimate)
+
+    def _held_chunks(
+        self,
+        chunks: Iterator[Tuple[str, Dict[str, Any]]],
+        first: Optional[Tuple[str, Dict[str, Any]]],
+        limiter: Any,
+        estimate: int
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yields an opened stream; when it ends, releases its slot and settles its token debit."""
+        metadata: Dict[str, Any] = {}
+        error: Optional[Exception] = None
+        try:
+            if first is not None:
+                metadata.update(first[1])
+                yield first
+            for text, chunk_metadata in chunks:
+                metadata.update(chunk_metadata)
+                yield text, chunk_metadata
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # A stream closed early by its reader is a success, not a failure.
+            chunks.close()
+            if limiter is not None:
+                limiter.release(overloaded=error is not None and is_overload(error), success=error is None)
+            used = sum(token_counts(metadata.get("usage") or metadata))
+            if self.rate_limiter is not None and used:
+                self.rate_limiter.adjust(self._rate_key, used - estimate)
+
+    def _provider_stream_chunks(self, prompt: str, model: str, **kwargs) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        if self.provider == 'openai':
+            return self._openai_stream_chunks(prompt, model, **kwargs)
+        if self.provider == 'anthropic':
+            return self._anthropic_stream_chunks(prompt, model, **kwargs)
+        if self.provider == 'local':
+            return self.client.stream(prompt, model, **prompt_cache_request(self.provider, prompt, kwargs)[1])
+        raise NotImplementedError(f"Streaming not implemented for provider: {self.provider}")
+
+    def _cassette_key(self, prompt: str, model: str, kwargs: Dict[str, Any], stream: bool = False) -> str:
+        return make_cache_key(self.provider, model, prompt, {**kwargs, "stream": True} if stream else kwargs)
+
+    def _call_provider(self, prompt: str, model: str, **kwargs) -> Any:
+        if self.cassette is None:
+            return self._send(prompt, model, **kwargs)
+        key = self._cassette_key(prompt, model, kwargs)
+        if self.cassette.replaying:
+            payload, delay = self.cassette.lookup(key)
+            time.sleep(delay)
+            return self._deserialize_response(payload)
+        start = time.perf_counter()
+        response = self._send(prompt, model, **kwargs)
+        self.cassette.record(key, self.provider, model, self._serialize_response(response), time.perf_counter() - start)
+        return response
+
+    async def _call_provider_async(self, prompt: str, model: str, **kwargs) -> Any:
+        if self.cassette is None:
+            return await self._send_async(prompt, model, **kwargs)
+        key = self._cassette_key(prompt, model, kwargs)
+        if self.cassette.replaying:
+            payload, delay = self.cassette.lookup(key)
+            await asyncio.sleep(delay)
+            return self._deserialize_response(payload)
+        start = time.perf_counter()
+        response = await self._send_async(prompt, model, **kwargs)
+        self.cassette.record(key, self.provider, model, self._serialize_response(response), time.perf_counter() - start)
+        return response
+
+    def _send(self, prompt: str, model: str, **kwargs) -> Any:
         if self.provider == 'openai':
             return self._get_openai_completion(prompt, model, **kwargs)
         elif self.provider == 'anthropic':
             return self._get_anthropic_completion(prompt, model, **kwargs)
+        elif self.provider == 'local':
+            return self.client.complete(prompt, model, **prompt_cache_request(self.provider, prompt, kwargs)[1])
+        raise NotImplementedError(f"Completion logic not implemented for provider: {self.provider}")
+
+    async def _send_async(self, prompt: str, model: str, **kwargs) -> Any:
+        if self.provider == 'openai':
+            return await self._get_openai_completion_async(prompt, model, **kwargs)
+        elif self.provider == 'anthropic':
+            return await self._get_anthropic_completion_async(prompt, model, **kwargs)
+        elif self.provider == 'local':
+            return await self.client.complete_async(prompt, model, **prompt_cache_request(self.provider, prompt, kwargs)[1])
         raise NotImplementedError(f"Completion logic not implemented for provider: {self.provider}")
 
+    def _get_async_client(self) -> Any:
+        """Returns the provider's async SDK client bound to the pooled client of the running loop."""
+        http_client = self.http_pool.async_client(self.provider, self._http_module)
+        if self._async_client is None or self._async_http_client is not http_client:
+            client_class = AsyncOpenAI if self.provider == 'openai' else AsyncAnthropic
+            self._async_client = client_class(
+                api_key=self._api_key, base_url=self.base_url, http_client=http_client, max_retries=0
+            )
+            self._async_http_client = http_client
+        return self._async_client
+
+    def _should_hedge(self, params: Dict[str, Any]) -> bool:
+        # Only deterministic requests are hedged: both copies must produce the same answer.
+        return self.hedging is not None and params.get("temperature") == 0
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-hedge")
+            return self._hedge_executor
+
+    def _cache_key(self, prompt: Any, model: str, params: Dict[str, Any]) -> Optional[str]:
+        """Returns the cache key for a call, or None if the call must not be cached."""
+        if self.cache is None:
+            return None
+        if self.cassette is not None and not self.cassette.replaying:
+            # A recording must hold every call, so calls go to the provider while recording.
+            return None
+        if not self.cache_nondeterministic and params.get("temperature") != 0:
+            return None
+        return make_cache_key(self.provider, model, prompt, params)
+
+    def _serialize_response(self, response: Any) -> Dict[str, Any]:
+        if hasattr(response, "model_dump"):
+            return {"type": self.provider, "data": response.model_dump(mode="json")}
+        return {"type": "raw", "data": response}
+
+    def _deserialize_response(self, payload: Dict[str, Any]) -> Any:
+        if payload["type"] == "openai":
+            return ChatCompletion.model_validate(payload["data"])
+        if payload["type"] == "anthropic":
+            return Message.model_validate(payload["data"])
+        return payload["data"]
+
+    def get_parsed_completion(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        """
+        Gets a completion and parses it into a provider-independent ParsedResponse.
+        """
+        response = self.get_completion(prompt, model, **kwargs)
+        return ResponseParser.parse(response, self.provider)
+
+    async def get_parsed_completion_async(self, prompt: str, model: str, **kwargs) -> ParsedResponse:
+        """
+        Async counterpart of `get_parsed_completion`.
+        """
+        response = await self.get_completion_async(prompt, model, **kwargs)
+        return ResponseParser.parse(response, self.provider)
+
+    def stream_completion(self, prompt: str, model: str, **kwargs) -> CompletionStream:
+        """
+        Streams a completion from any provider; iterate the returned stream for
+        text deltas and close it to stop generation early.
+
+        Streams share the rate limits and concurrency limits of other calls and
+        hold their slot until closed. Opening the stream, up to its first
+        chunk, runs under the retry policy and circuit breaker; an error after
+        text has been received is raised to the reader. Streams are not cached.
+        """
+        if self.cassette is not None and self.cassette.replaying:
+            chunks = self._replayed_chunks(*self.cassette.lookup(self._cassette_key(prompt, model, kwargs, stream=True)))
+        else:
+            chunks = self.retry_policy.call(self._open_stream, prompt, model, breaker_key=self.name, **kwargs)
+        if self.cassette is not None and not self.cassette.replaying:
+            chunks = self._recorded_chunks(self._cassette_key(prompt, model, kwargs, stream=True), model, chunks)
+        on_close = None
+        if self.usage is not None:
+            start = time.perf_counter()
+            on_close = lambda stream: self._record_stream_usage(stream, prompt, model, time.perf_counter() - start)
+        return CompletionStream(chunks, self.provider, model, on_close=on_close)
+
+    def _record_stream_usage(self, stream: CompletionStream, prompt: str, model: str, latency: float) -> None:
+        # A stream closed early (score-first, early stop) never receives OpenAI's trailing usage chunk,
+        # and Anthropic has only reported its opening counts; missing counts are estimated from the
+        # prompt and the text received, and the record is marked as estimated.
+        usage = dict(stream.metadata.get("usage") or stream.metadata)
+        input_tokens, output_tokens = token_counts(usage)
+        received = estimate_tokens(stream.text, 0)
+        estimated = False
+        if not input_tokens:
+            usage["prompt_tokens"] = estimate_tokens(prompt, 0)
+            estimated = True
+        if output_tokens < received and (stream.stopped_early or not output_tokens):
+            usage["output_tokens" if "output_tokens" in usage else "completion_tokens"] = received
+            estimated = True
+        self.usage.record(self.provider, model, usage, latency, estimated=estimated)
+
+    def _recorded_chunks(
+        self, key: str, model: str, chunks: Iterator[Tuple[str, Dict[str, Any]]]
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        # A stream closed early by its reader is recorded as received, so replay stops at the same point.
+        start = time.perf_counter()
+        parts, metadata, completed = [], {}, False
+        try:
+            for text, chunk_metadata in chunks:
+                parts.append(text)
+                metadata.update(chunk_metadata)
+                yield text, chunk_metadata
+            completed = True
+        except GeneratorExit:
+            completed = True
+            raise
+        finally:
+            chunks.close()
+            if completed:
+                payload = {"text": "".join(parts), "metadata": metadata}
+                self.cassette.record(key, self.provider, model, payload, time.perf_counter() - start)
+
+    @staticmethod
+    def _replayed_chunks(payload: Dict[str, Any], delay: float, size: int = 16) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        time.sleep(delay)
+        text = payload["text"]
+        for start in range(0, len(text), size):
+            yield text[start:start + size], {}
+        yield "", payload["metadata"]
+
+    def _openai_stream_chunks(self, prompt: str, model: str, **kwargs) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        content, kwargs = prompt_cache_request(self.provider, prompt, kwargs)
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": content}],
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs
+        )
+        # Closing the SDK stream closes the HTTP response, which stops generation.
+        try:
+            for chunk in stream:
+                metadata: Dict[str, Any] = {"model": chunk.model} if chunk.model else {}
+                if chunk.usage is not None:
+                    metadata["usage"] = ResponseParser._usage_dict(chunk.usage)
+                text = ""
+                for choice in chunk.choices:
+                    text += choice.delta.content or ""
+                    if choice.finish_reason:
+                        metadata["finish_reason"] = choice.finish_reason
+                yield text, metadata
+        finally:
+            stream.close()
+
+    def _anthropic_stream_chunks(self, prompt: str, model: str, **kwargs) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        content, kwargs = prompt_cache_request(self.provider, prompt, kwargs)
+        max_tokens = kwargs.pop("max_tokens", 1024)
+        stream = self.client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": content}],
+            stream=True,
+            **kwargs
+        )
+        usage: Dict[str, Any] = {}
+        try:
+            for event in stream:
+                if event.type == "message_start":
+                    usage = ResponseParser._usage_dict(event.message.usage)
+                    yield "", {"model": event.message.model, "usage": dict(usage)}
+                elif event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield event.delta.text, {}
+                elif event.type == "message_delta":
+                    usage["output_tokens"] = event.usage.output_tokens
+                    yield "", {"stop_reason": event.delta.stop_reason, "usage": dict(usage)}
+        finally:
+            stream.close()
+
+    def close(self) -> None:
+        """Stops hedging threads and closes the connection pool if this wrapper created it."""
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_pool:
+            self.http_pool.close()
+
+    async def aclose(self) -> None:
+        """Closes the connection pool, including async clients, if this wrapper created it."""
+        if self._owns_pool:
+            await self.http_pool.aclose()
+
     def _get_openai_completion(self, prompt: str, model: str, **kwargs) -> Any:
-        messages = [{"role": "user", "content": prompt}]
+        content, kwargs = prompt_cache_request(self.provider, prompt, kwargs)
+        messages = [{"role": "user", "content": content}]
         response = self.client.chat.completions.create(model=model, messages=messages, **kwargs)
         return response
 
     def _get_anthropic_completion(self, prompt: str, model: str, **kwargs) -> Any:
+        content, kwargs = prompt_cache_request(self.provider, prompt, kwargs)
         max_tokens = kwargs.pop("max_tokens", 1024)
         response = self.client.messages.create(
             model=model,
             max_tokens=max_tokens,
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": content}],
             **kwargs
         )
         return response
+
+    async def _get_openai_completion_async(self, prompt: str, model: str, **kwargs) -> Any:
+        content, kwargs = prompt_cache_request(self.provider, prompt, kwargs)
+        messages = [{"role": "user", "content": content}]
+        return await self._get_async_client().chat.completions.create(model=model, messages=messages, **kwargs)
+
+    async def _get_anthropic_completion_async(self, prompt: str, model: str, **kwargs) -> Any:
+        content, kwargs = prompt_cache_request(self.provider, prompt, kwargs)
+        max_tokens = kwargs.pop("max_tokens", 1024)
+        return await self._get_async_client().messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": content}],
+            **kwargs
+        )
@@ -0,0 +1,148 @@
+import json
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+from .http_pool import HTTPClientPool
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Request parameters that Ollama expects inside "options" (max_tokens maps to num_predict).
+_OLLAMA_OPTION_NAMES = {"max_tokens": "num_predict"}
+
+
+class LocalLLMClient:
+    """
+    Client for self-hosted model servers, over the run's pooled HTTP connections.
+
+    Two server styles are supported: 'ollama' (/api/generate) and 'openai' for
+    OpenAI-compatible servers such as vLLM or llama.cpp (/v1/chat/completions).
+    Responses are normalized to Ollama-style dicts ('response', 'model',
+    'total_duration', 'load_duration', 'prompt_eval_count', 'eval_count', ...;
+    durations in nanoseconds) so ResponseParser.parse_local handles both.
+    """
+
+    API_STYLES = ("ollama", "openai")
+
+    def __init__(self, base_url: str, http_pool: HTTPClientPool, api_style: str = "ollama", api_key: Optional[str] = None):
+        """
+        Args:
+            base_url: Server root URL, e.g. 'http://localhost:11434'.
+            http_pool: Pool providing the keep-alive clients.
+            api_style: 'ollama' or 'openai'.
+            api_key: Optional bearer token for servers that require one.
+        """
+        if api_style not in self.API_STYLES:
+            raise ValueError(f"Unsupported local API style: {api_style}")
+        self.base_url = base_url.rstrip("/")
+        self.http_pool = http_pool
+        self.api_style = api_style
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def _url(self) -> str:
+        if self.api_style == "ollama":
+            return f"{self.base_url}/api/generate"
+        root = self.base_url if self.base_url.endswith("/v1") else f"{self.base_url}/v1"
+        return f"{root}/chat/completions"
+
+    def _payload(self, prompt: str, model: str, stream: bool, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.api_style == "ollama":
+            options = {_OLLAMA_OPTION_NAMES.get(k, k): v for k, v in params.items()}
+            return {"model": model, "prompt": prompt, "stream": stream, "options": options}
+        payload = {"model": model, "messages": [{"role": "user", "content": prompt}], "stream": stream, **params}
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def _normalize(self, data: Dict[str, Any], elapsed_ns: int) -> Dict[str, Any]:
+        """Converts a complete server response into the Ollama-style dict."""
+        if self.api_style == "ollama":
+            return data
+        choice = (data.get("choices") or [{}])[0]
+        return {
+            "response": (choice.get("message") or {}).get("content") or "",
+            "model": data.get("model", "unknown"),
+            "done_reason": choice.get("finish_reason"),
+            **self._openai_timings(data, elapsed_ns),
+        }
+
+    @staticmethod
+    def _openai_timings(data: Dict[str, Any], elapsed_ns: int) -> Dict[str, Any]:
+        usage = data.get("usage") or {}
+        # llama.cpp reports server-side timings in milliseconds.
+        timings = data.get("timings") or {}
+        result = {"total_duration": elapsed_ns, "load_duration": 0}
+        if usage:
+            result["prompt_eval_count"] = usage.get("prompt_tokens", 0)
+            result["eval_count"] = usage.get("completion_tokens", 0)
+        if timings:
+            result["prompt_eval_duration"] = int(timings.get("prompt_ms", 0) * 1e6)
+            result["eval_duration"] = int(timings.get("predicted_ms", 0) * 1e6)
+        return result
+
+    def complete(self, prompt: str, model: str, **params: Any) -> Dict[str, Any]:
+        """Sends a non-streaming request and returns the normalized response."""
+        start = time.perf_counter_ns()
+        response = self.http_pool.sync_client("local").post(
+            self._url(), json=self._payload(prompt, model, False, params), headers=self.headers
+        )
+        response.raise_for_status()
+        return self._normalize(response.json(), time.perf_counter_ns() - start)
+
+    async def complete_async(self, prompt: str, model: str, **params: Any) -> Dict[str, Any]:
+        """Async counterpart of `complete`."""
+        start = time.perf_counter_ns()
+        response = await self.http_pool.async_client("local").post(
+            self._url(), json=self._payload(prompt, model, False, params), headers=self.headers
+        )
+        response.raise_for_status()
+        return self._normalize(response.json(), time.perf_counter_ns() - start)
+
+    def stream(self, prompt: str, model: str, **params: Any) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streams a completion, yielding (text delta, metadata) pairs. The final
+        pair carries the server's timing metadata. Closing the generator closes
+        the HTTP response, which stops generation on the server.
+        """
+        start = time.perf_counter_ns()
+        client = self.http_pool.sync_client("local")
+        with client.stream("POST", self._url(), json=self._payload(prompt, model, True, params), headers=self.headers) as response:
+            response.raise_for_status()
+            if self.api_style == "ollama":
+                yield from self._ollama_chunks(response)
+            else:
+                yield from self._openai_chunks(response, start)
+
+    @staticmethod
+    def _ollama_chunks(response: httpx.Response) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for line in response.iter_lines():
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            if chunk.get("done"):
+                metadata = {k: v for k, v in chunk.items() if k not in ("response", "done", "context")}
+                yield chunk.get("response", ""), metadata
+                return
+            yield chunk.get("response", ""), {}
+
+    def _openai_chunks(self, response: httpx.Response, start: int) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for line in response.iter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            chunk = json.loads(data)
+            metadata = {}
+            if chunk.get("model"):
+                metadata["model"] = chunk["model"]
+            if chunk.get("usage") or chunk.get("timings"):
+                metadata.update(self._openai_timings(chunk, time.perf_counter_ns() - start))
+            text = ""
+            for choice in chunk.get("choices") or []:
+                text += (choice.get("delta") or {}).get("content") or ""
+                if choice.get("finish_reason"):
+                    metadata["done_reason"] = choice["finish_reason"]
+            yield text, metadata
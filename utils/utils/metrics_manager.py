@@ -1,38 +1,300 @@
-from typing import List, Dict, Any
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Sequence, Callable, Tuple
 from .scorer import Scorer, EvaluationResult
 from .config_manager import ConfigManager
 from .logger import setup_logger
+from .profiler import StageProfiler
+from .tracing import Tracer
+from .judge import LLMJudge
+from .telemetry import MetricCostModel
+from .usage import usage_scope
 
 logger = setup_logger(__name__)
 
+# Results produced by one scheduled task, keyed by (row index, metric name).
+TaskResults = Dict[Tuple[int, str], EvaluationResult]
+
+@dataclass
+class _MetricTask:
+    """One schedulable unit of work: a metric call, a judge group call or a judge batch."""
+    cost_key: str
+    run: Callable[[], TaskResults]
+    rows: Tuple[int, ...] = ()
+    estimate: float = 0.0
+
+class _RowSpans:
+    """
+    Traces one span per row, from the start of the row's first task to the
+    end of its last one. A row's tasks may run on several workers (and batch
+    tasks cover several rows), so the span is recorded once its last task is done.
+    """
+
+    def __init__(self, tracer: Tracer, tasks: Sequence[_MetricTask]):
+        self.tracer = tracer
+        self._pending = Counter(row for task in tasks for row in task.rows)
+        self._starts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def started(self, task: _MetricTask) -> None:
+        now = time.perf_counter_ns()
+        with self._lock:
+            for row in task.rows:
+                self._starts.setdefault(row, now)
+
+    def finished(self, task: _MetricTask) -> None:
+        now = time.perf_counter_ns()
+        done = []
+        with self._lock:
+            for row in task.rows:
+                self._pending[row] -= 1
+                if self._pending[row] == 0:
+                    done.append((row, self._starts.pop(row)))
+        for row, start in done:
+            self.tracer.async_span(f"row {row + 1}", "row", start, now, span_id=row, row=row)
+
 class MetricsManager:
     """Orchestrates the evaluation of multiple metrics."""
-    def __init__(self, scorer: Scorer, config_manager: ConfigManager):
+    def __init__(
+        self,
+        scorer: Scorer,
+        config_manager: ConfigManager,
+        profiler: Optional[StageProfiler] = None,
+        tracer: Optional[Tracer] = None,
+        judge: Optional[LLMJudge] = None,
+        cost_model: Optional[MetricCostModel] = None
+    ):
         self.scorer = scorer
         self.config_manager = config_manager
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.tracer = tracer or Tracer(enabled=False)
+        self.judge = judge
+        self.cost_model = cost_model or MetricCostModel()
+        # 'max_workers' only applies when 'parallel_processing' is switched on.
+        evaluation_config = config_manager.get_evaluation_config()
+        parallel = evaluation_config.get("parallel_processing", False)
+        self.max_workers = max(1, int(evaluation_config.get("max_workers", 1))) if parallel else 1
 
-    def evaluate_metrics(self, data_point: Dict[str, Any]) -> List[EvaluationResult]:
-        results = []
-        metrics_to_run = self.config_manager.get_metrics()
+    def _is_judged(self, metric_name: str) -> bool:
+        return self.judge is not None and self.judge.supports(metric_name)
+
+    def _evaluate_metric(self, metric_name: str, data_point: Dict[str, Any], row: Optional[int] = None) -> Optional[EvaluationResult]:
+        """Evaluates one metric for one data point, returning None if it cannot be scored."""
+        judged = self._is_judged(metric_name)
+        evaluation_method_name = f"evaluate_{metric_name}"
+        if not judged and not hasattr(self.scorer, evaluation_method_name):
+            logger.warning(f"Metric '{metric_name}' is configured but no method found in Scorer. Skipping.")
+            return None
+        try:
+            with self.profiler.stage(f"metric:{metric_name}"), self.tracer.span(metric_name, category="metric", row=row), \
+                    usage_scope([] if row is None else [row], [metric_name]):
+                if judged:
+                    result = self.judge.evaluate(metric_name, data_point)
+                else:
+                    result = self._call_scorer(getattr(self.scorer, evaluation_method_name), metric_name, data_point)
+            result.metric_name = result.metric_name or metric_name
+            return result
+        except KeyError as e:
+            logger.error(f"Missing key '{e}' in data point for metric '{metric_name}'. Skipping.")
+        except Exception as e:
+            logger.error(f"Error during evaluation of metric '{metric_name}': {e}")
+        return None
+
+    @staticmethod
+    def _call_scorer(evaluation_method, metric_name: str, data_point: Dict[str, Any]) -> EvaluationResult:
+        # Explicit argument mapping for each metric type
+        if metric_name in ["answer_relevance", "completeness", "helpfulness"]:
+            return evaluation_method(answer=data_point["answer"], question=data_point["question"])
+        elif metric_name in ["faithfulness", "factuality", "hallucination", "groundedness"]:
+            return evaluation_method(answer=data_point["answer"], context=data_point["context"])
+        elif metric_name in ["coherence", "conciseness", "fluency", "redundancy"]:
+            return evaluation_method(answer=data_point["answer"])
+        else:
+            return evaluation_method(question=data_point["question"], answer=data_point["answer"], context=data_point["context"])
+
+    def _active_groups(self, metrics_to_run: Sequence[str]) -> Dict[str, List[str]]:
+        """Returns the judge groups with at least two configured metrics, keyed by group name."""
+        if self.judge is None:
+            return {}
+        groups = {}
+        for group_name, members in self.judge.groups.items():
+            active = [m for m in members if m in metrics_to_run]
+            if len(active) > 1:
+                groups[group_name] = active
+        return groups
+
+    def _evaluate_group(
+        self,
+        group_name: str,
+        metric_names: List[str],
+        data_point: Dict[str, Any],
+        row: Optional[int] = None
+    ) -> Dict[str, EvaluationResult]:
+        """Evaluates a group of judge metrics for one data point with a single judge call."""
+        try:
+            with self.profiler.stage(f"metric_group:{group_name}"), \
+                    self.tracer.span(group_name, category="judge_group", row=row, metrics=len(metric_names)), \
+                    usage_scope([] if row is None else [row], metric_names):
+                return self.judge.evaluate_group(metric_names, data_point)
+        except KeyError as e:
+            logger.error(f"Missing key '{e}' in data point for metric group '{group_name}'. Skipping.")
+        except Exception as e:
+            logger.error(f"Error during evaluation of metric group '{group_name}': {e}")
+        return {}
+
+    def _evaluate_batch(self, metric_name: str, start: int, chunk: Sequence[Dict[str, Any]]) -> TaskResults:
+        """Evaluates one judge metric for a contiguous chunk of rows with a single batched call."""
+        try:
+            with self.profiler.stage(f"metric:{metric_name}"), \
+                    self.tracer.span(metric_name, category="judge_batch", first_row=start, rows=len(chunk)), \
+                    usage_scope(range(start, start + len(chunk)), [metric_name]):
+                chunk_results = self.judge.evaluate_batch(metric_name, chunk)
+        except Exception as e:
+            logger.error(f"Error during batched evaluation of metric '{metric_name}' (rows {start+1}-{start+len(chunk)}): {e}")
+            return {}
+        return {(start + offset, metric_name): r for offset, r in enumerate(chunk_results) if r is not None}
+
+    def _evaluate_row(
+        self,
+        data_point: Dict[str, Any],
+        metrics_to_run: Sequence[str],
+        groups: Dict[str, List[str]]
+    ) -> Dict[str, EvaluationResult]:
+        results: Dict[str, EvaluationResult] = {}
+        grouped = {m: g for g, members in groups.items() for m in members}
+        done_groups = set()
         for metric_name in metrics_to_run:
-            evaluation_method_name = f"evaluate_{metric_name}"
-            if not hasattr(self.scorer, evaluation_method_name):
-                logger.warning(f"Metric '{metric_name}' is configured but no method found in Scorer. Skipping.")
+            group_name = grouped.get(metric_name)
+            if group_name is not None:
+                if group_name not in done_groups:
+                    done_groups.add(group_name)
+                    results.update(self._evaluate_group(group_name, groups[group_name], data_point))
                 continue
-            evaluation_method = getattr(self.scorer, evaluation_method_name)
-            try:
-                # Explicit argument mapping for each metric type
-                if metric_name in ["answer_relevance", "completeness", "helpfulness"]:
-                    result = evaluation_method(answer=data_point["answer"], question=data_point["question"])
-                elif metric_name in ["faithfulness", "factuality", "hallucination", "groundedness"]:
-                    result = evaluation_method(answer=data_point["answer"], context=data_point["context"])
-                elif metric_name in ["coherence", "conciseness", "fluency", "redundancy"]:
-                    result = evaluation_method(answer=data_point["answer"])
+            result = self._evaluate_metric(metric_name, data_point)
+            if result is not None:
+                results[metric_name] = result
+        return results
+
+    def evaluate_metrics(self, data_point: Dict[str, Any]) -> List[EvaluationResult]:
+        metrics_to_run = self.config_manager.get_metrics()
+        results = self._evaluate_row(data_point, metrics_to_run, self._active_groups(metrics_to_run))
+        return [results[m] for m in metrics_to_run if m in results]
+
+    def _build_tasks(self, data_points: Sequence[Dict[str, Any]], metrics_to_run: Sequence[str]) -> List[_MetricTask]:
+        groups = self._active_groups(metrics_to_run)
+        grouped = {m: g for g, members in groups.items() for m in members}
+        batched = [
+            m for m in metrics_to_run
+            if self._is_judged(m) and m not in grouped and self.judge.batch_size > 1 and len(data_points) > 1
+        ]
+        tasks: List[_MetricTask] = []
+        for i, data_point in enumerate(data_points):
+            done_groups = set()
+            for metric_name in metrics_to_run:
+                group_name = grouped.get(metric_name)
+                if metric_name in batched or group_name in done_groups:
+                    continue
+                if group_name is not None:
+                    done_groups.add(group_name)
+                    tasks.append(_MetricTask(
+                        f"group:{group_name}",
+                        lambda i=i, g=group_name, dp=data_point: {
+                            (i, m): r for m, r in self._evaluate_group(g, groups[g], dp, row=i).items()
+                        },
+                        rows=(i,)
+                    ))
                 else:
-                    result = evaluation_method(question=data_point["question"], answer=data_point["answer"], context=data_point["context"])
-                results.append(result)
-            except KeyError as e:
-                logger.error(f"Missing key '{e}' in data point for metric '{metric_name}'. Skipping.")
-            except Exception as e:
-                logger.error(f"Error during evaluation of metric '{metric_name}': {e}")
+                    tasks.append(_MetricTask(
+                        metric_name,
+                        lambda i=i, m=metric_name, dp=data_point: self._evaluate_metric_task(i, m, dp),
+                        rows=(i,)
+                    ))
+        for metric_name in batched:
+            for start in range(0, len(data_points), self.judge.batch_size):
+                chunk = data_points[start:start + self.judge.batch_size]
+                tasks.append(_MetricTask(
+                    f"batch:{metric_name}",
+                    lambda m=metric_name, s=start, c=chunk: self._evaluate_batch(m, s, c),
+                    rows=tuple(range(start, start + len(chunk)))
+                ))
+        return tasks
+
+    def _evaluate_metric_task(self, row: int, metric_name: str, data_point: Dict[str, Any]) -> TaskResults:
+        result = self._evaluate_metric(metric_name, data_point, row=row)
+        return {} if result is None else {(row, metric_name): result}
+
+    def _run_timed(self, task: _MetricTask, row_spans: Optional[_RowSpans] = None) -> TaskResults:
+        start = time.perf_counter()
+        if row_spans is not None:
+            row_spans.started(task)
+        try:
+            with self.profiler.worker():
+                return task.run()
+        finally:
+            self.cost_model.observe(task.cost_key, time.perf_counter() - start)
+            if row_spans is not None:
+                row_spans.finished(task)
+
+    def _run_tasks(self, tasks: List[_MetricTask]) -> TaskResults:
+        """
+        Runs tasks longest-first (LPT) using the learned cost model.
+
+        With a worker pool, submitting in descending cost order makes idle
+        workers always pick the most expensive remaining task, so slow judge
+        calls start early instead of setting the finish time. When tracing,
+        each row also gets a span covering all of its tasks.
+        """
+        for task in tasks:
+            task.estimate = self.cost_model.estimate(task.cost_key)
+        tasks = sorted(tasks, key=lambda t: t.estimate, reverse=True)
+        total = len(tasks)
+        log_every = max(1, total // 10)
+        results: TaskResults = {}
+        row_spans = _RowSpans(self.tracer, tasks) if self.tracer.enabled else None
+
+        if self.max_workers == 1:
+            for done, task in enumerate(tasks, start=1):
+                results.update(self._run_timed(task, row_spans))
+                if done % log_every == 0 or done == total:
+                    logger.info(f"Completed {done}/{total} metric tasks")
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="metric-worker") as executor:
+            futures = [executor.submit(self._run_timed, task, row_spans) for task in tasks]
+            for done, future in enumerate(as_completed(futures), start=1):
+                results.update(future.result())
+                if done % log_every == 0 or done == total:
+                    logger.info(f"Completed {done}/{total} metric tasks")
         return results
+
+    def evaluate_dataset(
+        self, data_points: Sequence[Dict[str, Any]], metrics: Optional[Sequence[str]] = None
+    ) -> List[List[EvaluationResult]]:
+        """
+        Evaluates all configured metrics for a list of data points.
+
+        Judge metrics in a configured judge group are scored together with one
+        call per row. Other judge metrics are scored in cross-row batches of
+        `judge.batch_size` rows per LLM request; every remaining metric is
+        evaluated row by row. All resulting tasks are scheduled longest-first
+        across `evaluation.max_workers` workers.
+
+        Args:
+            data_points: The rows to evaluate.
+            metrics: Metrics to run instead of the configured ones.
+
+        Returns:
+            One list of results per data point, in configured metric order.
+        """
+        metrics_to_run = list(metrics) if metrics is not None else self.config_manager.get_metrics()
+        tasks = self._build_tasks(data_points, metrics_to_run)
+        logger.info(f"Scheduling {len(tasks)} metric tasks for {len(data_points)} data points on {self.max_workers} worker(s)")
+        task_results = self._run_tasks(tasks)
+
+        per_row: List[Dict[str, EvaluationResult]] = [{} for _ in data_points]
+        for (row, metric_name), result in task_results.items():
+            per_row[row][metric_name] = result
+        return [[row[m] for m in metrics_to_run if m in row] for row in per_row]
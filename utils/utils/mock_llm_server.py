@@ -0,0 +1,333 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logger import setup_logger
+from .rate_limiter import estimate_tokens
+
+logger = setup_logger(__name__)
+
+_ITEM_HEADER = re.compile(r"^### Item (\d+)$", re.M)
+_GROUP_METRIC = re.compile(r"^- (\w+): ", re.M)
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Server-side latency of mock completions, in seconds.
+
+    'fixed' always waits `median`; 'uniform' draws from [low, high];
+    'lognormal' draws around `median` with log-space spread `sigma`, which
+    gives the long tail real providers show.
+    """
+
+    kind: str = "lognormal"
+    median: float = 0.2
+    sigma: float = 0.5
+    low: float = 0.0
+    high: float = 0.0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "LatencyDistribution":
+        config = dict(config or {})
+        kind = config.pop("kind", config.pop("distribution", "lognormal"))
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unsupported latency distribution: {kind}")
+        return cls(kind=kind, **config)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.median
+        if self.kind == "uniform":
+            return rng.uniform(self.low, self.high)
+        return self.median * math.exp(self.sigma * rng.gauss(0.0, 1.0))
+
+
+def mock_verdict(prompt: str, score: float, reason: str = "Mock verdict.") -> str:
+    """
+    Returns a judge response in the form the prompt asks for: one verdict,
+    one verdict per '### Item N' of a batch prompt, or one per metric of a
+    group prompt (score-first layouts included).
+    """
+    score_first = '{"scores":' in prompt
+    items = _ITEM_HEADER.findall(prompt)
+    if items:
+        if score_first:
+            return json.dumps({"scores": {i: score for i in items}, "reasons": {i: reason for i in items}})
+        return json.dumps({"verdicts": [{"id": int(i), "score": score, "reason": reason} for i in items]})
+    if "Score the following metrics" in prompt:
+        metrics = _GROUP_METRIC.findall(prompt)
+        if score_first:
+            return json.dumps({"scores": {m: score for m in metrics}, "reasons": {m: reason for m in metrics}})
+        return json.dumps({m: {"score": score, "reason": reason} for m in metrics})
+    return json.dumps({"score": score, "reason": reason})
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_MockHTTPServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+    def do_POST(self) -> None:
+        routes = {"/v1/chat/completions": "openai", "/v1/messages": "anthropic", "/api/generate": "ollama"}
+        api = routes.get(self.path.split("?")[0])
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if api is None:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+        self.server.mock.handle(self, api, body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, content_type: str, events: List[bytes]) -> None:
+        # Streams end with the connection instead of a Content-Length.
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for event in events:
+            self.wfile.write(event)
+            self.wfile.flush()
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 refuses connections long before 1,000 clients are in flight.
+    request_queue_size = 4096
+    mock: "MockLLMServer"
+
+
+class MockLLMServer:
+    """
+    A local stand-in for LLM providers, for load-testing the evaluation engine.
+
+    Serves the OpenAI chat completions (/v1/chat/completions), Anthropic
+    messages (/v1/messages) and Ollama generate (/api/generate) endpoints,
+    streaming and non-streaming, on a thread per connection. Every request
+    waits a latency drawn from `latency`, then fails with a 429 (carrying a
+    Retry-After header) with probability `rate_limit_rate`, fails with a 500
+    with probability `error_rate`, or returns a judge verdict templated from
+    the prompt (or the canned `response`, if given).
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[LatencyDistribution] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        score: Optional[float] = 0.8,
+        response: Optional[str] = None,
+        chunk_size: int = 16,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            host: Interface to listen on.
+            port: Port to listen on; 0 picks a free port (see `url`).
+            latency: Per-request latency; defaults to a lognormal around 0.2s.
+            error_rate: Share of requests answered with a 500.
+            rate_limit_rate: Share of requests answered with a 429.
+            retry_after: Seconds sent in the Retry-After header of 429s.
+            score: Score of every templated verdict; None draws a random score per request.
+            response: Canned response text returned instead of templated verdicts.
+            chunk_size: Characters per streamed text delta.
+            seed: Seed for latencies, injected failures and random scores.
+        """
+        self.latency = latency or LatencyDistribution()
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.score = score
+        self.response = response
+        self.chunk_size = chunk_size
+        self.requests: Dict[str, int] = {"openai": 0, "anthropic": 0, "ollama": 0}
+        self.completed = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._started: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._httpd = _MockHTTPServer((host, port), _MockHandler)
+        self._httpd.mock = self
+
+    @property
+    def url(self) -> str:
+        """Root URL of the server, e.g. 'http://127.0.0.1:52341'."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_url(self, provider: str) -> str:
+        """Returns the `base_url` to give LLMWrapper for a provider ('openai', 'anthropic' or 'local')."""
+        return f"{self.url}/v1" if provider == "openai" else self.url
+
+    def start(self) -> "MockLLMServer":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Mock LLM server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _draw(self) -> Tuple[float, float, float]:
+        with self._lock:
+            return self.latency.sample(self._rng), self._rng.random(), self._rng.random()
+
+    def handle(self, handler: _MockHandler, api: str, body: Dict[str, Any]) -> None:
+        """Serves one request: waits, optionally injects a failure, then responds."""
+        with self._lock:
+            self.requests[api] += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            delay, failure, score = self._draw()
+            time.sleep(max(0.0, delay))
+            if failure < self.rate_limit_rate:
+                with self._lock:
+                    self.rate_limited += 1
+                handler._send_json(429, self._error(api, "rate_limit_error", "Mock rate limit."),
+                                   headers={"Retry-After": str(self.retry_after)})
+                return
+            if failure < self.rate_limit_rate + self.error_rate:
+                with self._lock:
+                    self.errors += 1
+                handler._send_json(500, self._error(api, "api_error", "Mock server error."))
+                return
+            prompt = self._prompt(api, body)
+            text = self.response if self.response is not None else mock_verdict(
+                prompt, round(score if self.score is None else self.score, 2)
+            )
+            usage = (estimate_tokens(prompt, 0), estimate_tokens(text, 0))
+            model = body.get("model", "mock")
+            if body.get("stream"):
+                content_type, events = self._stream_events(api, model, text, usage, body)
+                handler._send_stream(content_type, events)
+            else:
+                handler._send_json(200, self._completion(api, model, text, usage, delay))
+            with self._lock:
+                self.completed += 1
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _prompt(api: str, body: Dict[str, Any]) -> str:
+        if api == "ollama":
+            return body.get("prompt", "")
+        content = (body.get("messages") or [{}])[-1].get("content", "")
+        if isinstance(content, list):
+            return "\n".join(block.get("text", "") for block in content if isinstance(block, dict))
+        return content
+
+    @staticmethod
+    def _error(api: str, kind: str, message: str) -> Dict[str, Any]:
+        if api == "anthropic":
+            return {"type": "error", "error": {"type": kind, "message": message}}
+        if api == "ollama":
+            return {"error": message}
+        return {"error": {"message": message, "type": kind, "code": None}}
+
+    @staticmethod
+    def _completion(api: str, model: str, text: str, usage: Tuple[int, int], delay: float) -> Dict[str, Any]:
+        prompt_tokens, output_tokens = usage
+        if api == "anthropic":
+            return {
+                "id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "model": model,
+                "content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "stop_sequence": None,
+                "usage": {"input_tokens": prompt_tokens, "output_tokens": output_tokens},
+            }
+        if api == "ollama":
+            return {
+                "model": model, "response": text, "done": True, "done_reason": "stop",
+                "prompt_eval_count": prompt_tokens, "eval_count": output_tokens, "total_duration": int(delay * 1e9),
+            }
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": output_tokens, "total_tokens": sum(usage)},
+        }
+
+    def _stream_events(
+        self, api: str, model: str, text: str, usage: Tuple[int, int], body: Dict[str, Any]
+    ) -> Tuple[str, List[bytes]]:
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        prompt_tokens, output_tokens = usage
+        if api == "ollama":
+            lines = [{"model": model, "response": piece, "done": False} for piece in pieces]
+            lines.append({"model": model, "response": "", "done": True, "done_reason": "stop",
+                          "prompt_eval_count": prompt_tokens, "eval_count": output_tokens})
+            return "application/x-ndjson", [(json.dumps(line) + "\n").encode() for line in lines]
+        if api == "anthropic":
+            events = [
+                {"type": "message_start", "message": {
+                    "id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "content": [], "model": model,
+                    "stop_reason": None, "stop_sequence": None, "usage": {"input_tokens": prompt_tokens, "output_tokens": 0}}},
+                {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                *({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": p}} for p in pieces),
+                {"type": "content_block_stop", "index": 0},
+                {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                 "usage": {"output_tokens": output_tokens}},
+                {"type": "message_stop"},
+            ]
+            return "text/event-stream", [f"event: {e['type']}\ndata: {json.dumps(e)}\n\n".encode() for e in events]
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> Dict[str, Any]:
+            return {"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+        events = [chunk({"role": "assistant", "content": p}) for p in pieces] + [chunk({}, "stop")]
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                           "choices": [], "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": output_tokens,
+                                                    "total_tokens": sum(usage)}})
+        return "text/event-stream", [f"data: {json.dumps(e)}\n\n".encode() for e in events] + [b"data: [DONE]\n\n"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns request counts, injected failures, peak concurrency and served QPS."""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
+            total = sum(self.requests.values())
+            return {
+                "requests": total,
+                "by_endpoint": dict(self.requests),
+                "completed": self.completed,
+                "rate_limited": self.rate_limited,
+                "errors": self.errors,
+                "peak_in_flight": self.peak_in_flight,
+                "elapsed_seconds": round(elapsed, 3),
+                "qps": round(total / elapsed, 2) if elapsed else 0.0,
+            }
@@ -0,0 +1,193 @@
+import cProfile
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_NULL_STAGE = nullcontext()
+
+
+class StageProfiler:
+    """
+    Collects a per-stage timing breakdown for an evaluation run.
+
+    Each stage (data load, model init, each metric, reporting) accumulates its
+    wall-clock time and call count; stages may be entered from worker threads.
+    Optionally the whole run is executed under cProfile, and tracemalloc
+    snapshots are taken at every stage boundary. cProfile only sees the thread
+    that enabled it, so work run in pool threads is profiled per thread via
+    `worker()` and merged into the hotspots. A disabled profiler hands out a
+    shared no-op context so the hot path stays cheap.
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = False, top_n: int = 25):
+        """
+        Args:
+            enabled: Whether to record anything at all.
+            trace_memory: Take tracemalloc snapshots at stage boundaries.
+            top_n: Number of hotspot functions / allocation sites kept in the report.
+        """
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.top_n = top_n
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.memory_snapshots: List[Dict[str, Any]] = []
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._cprofile_thread: Optional[int] = None
+        self._worker_profiles: List[cProfile.Profile] = []
+        self._local = threading.local()
+        self._started_at: Optional[float] = None
+        self._total_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Starts cProfile (and tracemalloc, if requested) for the whole run."""
+        if not self.enabled:
+            return
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile_thread = threading.get_ident()
+        self._started_at = time.perf_counter()
+        self._cprofile.enable()
+
+    def stop(self) -> None:
+        """Stops the run-level profilers. Safe to call more than once."""
+        if not self.enabled or self._cprofile is None:
+            return
+        self._cprofile.disable()
+        if self._started_at is not None:
+            self._total_seconds = time.perf_counter() - self._started_at
+            self._started_at = None
+
+    def stage(self, name: str):
+        """
+        Returns a context manager that accounts the enclosed block to `name`.
+        Repeated entries of the same stage accumulate time and call counts.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name)
+
+    def worker(self):
+        """
+        Returns a context manager that profiles the enclosed block when it runs
+        on a thread other than the one that started the run-level cProfile
+        (e.g. a metric task in a thread pool). Each thread keeps one profile,
+        merged into the hotspots of the report.
+        """
+        if self._cprofile is None or self._started_at is None or threading.get_ident() == self._cprofile_thread:
+            return _NULL_STAGE
+        return self._worker()
+
+    @contextmanager
+    def _worker(self) -> Iterator[None]:
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._worker_profiles.append(profile)
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one profiler at a time, and the run-level one already sees every thread.
+            profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        self._snapshot_memory(name, "enter")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self.stages.setdefault(name, {"calls": 0, "cumulative_seconds": 0.0, "max_seconds": 0.0})
+                stats["calls"] += 1
+                stats["cumulative_seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            self._snapshot_memory(name, "exit")
+
+    def _snapshot_memory(self, stage: str, boundary: str) -> None:
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            self.memory_snapshots.append({
+                "stage": stage,
+                "boundary": boundary,
+                "current_bytes": current,
+                "peak_bytes": peak,
+            })
+
+    def _hotspots(self) -> List[Dict[str, Any]]:
+        if self._cprofile is None:
+            return []
+        stats = pstats.Stats(self._cprofile)
+        for profile in self._worker_profiles:
+            profile.create_stats()
+            if profile.stats:
+                stats.add(profile)
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({func})",
+                "calls": nc,
+                "primitive_calls": cc,
+                "total_seconds": tt,
+                "cumulative_seconds": ct,
+            })
+        rows.sort(key=lambda r: r["cumulative_seconds"], reverse=True)
+        return rows[:self.top_n]
+
+    def _top_allocations(self) -> List[Dict[str, Any]]:
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot()
+        return [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:self.top_n]
+        ]
+
+    def report(self) -> Dict[str, Any]:
+        """Builds the profile report as a JSON-serializable dictionary."""
+        return {
+            "total_seconds": self._total_seconds,
+            "profiled_threads": 1 + len(self._worker_profiles) if self._cprofile is not None else 0,
+            "stages": self.stages,
+            "memory_snapshots": self.memory_snapshots,
+            "top_allocations": self._top_allocations(),
+            "hotspots": self._hotspots(),
+        }
+
+    def write_report(self, output_dir: str, filename: str = "profile_report.json") -> Optional[Path]:
+        """
+        Stops profiling and writes the report next to the evaluation report.
+
+        Returns:
+            The path of the written report, or None if profiling is disabled.
+        """
+        if not self.enabled:
+            return None
+        self.stop()
+        path = Path(output_dir) / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, default=str)
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        logger.info(f"Profile report written to '{path}'.")
+        return path
@@ -0,0 +1,169 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class SharedRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets per provider whose
+    state lives in a local SQLite file, so every process on the host (process
+    pool workers, parallel CLI invocations) draws from one combined budget.
+
+    Each bucket holds up to one minute of budget (or `burst_seconds` of it)
+    and refills continuously.
+    Updates run inside `BEGIN IMMEDIATE` transactions, which take SQLite's
+    write lock, so concurrent processes never double-spend a bucket.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Dict[str, float]],
+        path: str = ".cache/rate_limits.sqlite",
+        clock=time.time
+    ):
+        """
+        Args:
+            limits: Per provider, 'requests_per_minute' and/or 'tokens_per_minute',
+                and optionally 'burst_seconds' (default 60): how many seconds of
+                budget may be spent at once. Providers without an entry are not limited.
+            path: SQLite file shared by all processes on the host.
+            clock: Wall-clock time source (shared across processes).
+        """
+        self.limits = limits
+        self.path = Path(path)
+        self.clock = clock
+        self.waited_seconds = 0.0
+        self._wait_lock = threading.Lock()
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; isolation_level=None leaves transactions to us.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _buckets(self, provider: str, tokens: float) -> List[Tuple[str, float, float, float]]:
+        """Returns (bucket name, refill per second, capacity, amount needed) for a call."""
+        limits = self.limits.get(provider, {})
+        burst = float(limits.get("burst_seconds", 60.0))
+        buckets = []
+        if limits.get("requests_per_minute"):
+            rate = float(limits["requests_per_minute"]) / 60.0
+            buckets.append((f"{provider}:requests", rate, max(1.0, rate * burst), 1.0))
+        if limits.get("tokens_per_minute") and tokens > 0:
+            rate = float(limits["tokens_per_minute"]) / 60.0
+            capacity = rate * burst
+            buckets.append((f"{provider}:tokens", rate, capacity, min(float(tokens), capacity)))
+        return buckets
+
+    def try_acquire(self, provider: str, tokens: float = 0) -> float:
+        """
+        Takes one request and `tokens` tokens from the provider's buckets if all
+        of them have enough. Returns 0 on success, otherwise the seconds to wait
+        before the budget will be available (nothing is taken in that case).
+        """
+        buckets = self._buckets(provider, tokens)
+        if not buckets:
+            return 0.0
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = self.clock()
+            levels = {}
+            wait = 0.0
+            for name, rate, capacity, needed in buckets:
+                row = conn.execute("SELECT level, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+                level = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+                levels[name] = level
+                if level < needed:
+                    wait = max(wait, (needed - level) / rate)
+            if wait == 0.0:
+                for name, _, _, needed in buckets:
+                    levels[name] -= needed
+            conn.executemany(
+                "INSERT OR REPLACE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                [(name, level, now) for name, level in levels.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, provider: str, tokens: float = 0) -> float:
+        """Blocks until the call fits the shared budget; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(provider, tokens)
+            if wait == 0.0:
+                return self._record_wait(waited)
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, provider: str, tokens: float = 0) -> float:
+        """Async counterpart of `acquire`; waits with asyncio.sleep."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(provider, tokens)
+            if wait == 0.0:
+                return self._record_wait(waited)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def _record_wait(self, waited: float) -> float:
+        # Threads of one process share this limiter; `+=` on a float attribute is not atomic.
+        with self._wait_lock:
+            self.waited_seconds += waited
+        return waited
+
+    def adjust(self, provider: str, tokens: float) -> None:
+        """
+        Corrects the tokens bucket once a call's real usage is known: a positive
+        value debits extra tokens, a negative one refunds an over-estimate.
+        """
+        limits = self.limits.get(provider, {})
+        if not limits.get("tokens_per_minute") or not tokens:
+            return
+        rate = limits["tokens_per_minute"] / 60.0
+        capacity = rate * limits.get("burst_seconds", 60.0)
+        name = f"{provider}:tokens"
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT level, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            if row is not None:
+                now = self.clock()
+                level = min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+                conn.execute(
+                    "UPDATE buckets SET level = ?, updated_at = ? WHERE name = ?",
+                    (min(capacity, level - tokens), now, name),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        """Closes this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def estimate_tokens(prompt: str, max_tokens: Optional[int] = None) -> int:
+    """Rough token count of a call (about 4 characters per token plus the output allowance)."""
+    return len(prompt) // 4 + (max_tokens if max_tokens is not None else 1024)
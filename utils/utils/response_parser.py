@@ -1,8 +1,14 @@
 import json
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; the standard library parser is the fallback.
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -13,6 +19,103 @@ class ParsedResponse:
     provider: str
     model: str
 
+# Characters that may follow an opening brace, and a closing quote, in JSON.
+_AFTER_BRACE = '"}'
+_AFTER_STRING = ":,}]"
+
+
+class StreamingJSONExtractor:
+    """
+    Incrementally finds complete JSON objects in text that arrives in chunks.
+
+    Braces are matched while tracking string literals, so braces inside values
+    (e.g. a rationale quoting code) do not end an object early. Text around the
+    objects (prose, code fences, trailing explanations) is ignored: a candidate
+    is dropped as soon as a brace or string is followed by a token JSON does
+    not allow there, and a balanced span that is not valid JSON is rescanned
+    from just after its opening brace, so an object after a stray brace in
+    prose is still found. Chunks are kept in a list and every
+    other character is scanned once, however many chunks the text arrives in.
+    """
+
+    def __init__(self):
+        self.objects: List[Dict[str, Any]] = []
+        self._chunks: List[str] = []
+        self._parts: List[str] = []
+        self._depth = 0
+        self._expect = ""
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consumes a chunk and returns the objects it completed (usually none or one)."""
+        self._chunks.append(chunk)
+        found = []
+        # `begin` is where the open candidate starts in `text`; earlier chunks of it are in `_parts`.
+        text, position, begin = chunk, 0, 0
+        while position < len(text):
+            char = text[position]
+            position += 1
+            if self._depth == 0:
+                if char == "{":
+                    begin, self._depth, self._expect = position - 1, 1, _AFTER_BRACE
+                continue
+            if self._expect:
+                # Braces and quotes in prose are soon followed by something JSON does not allow.
+                if char.isspace():
+                    continue
+                if char not in self._expect:
+                    text, position = self._restart(text, begin, position - 1), 0
+                    continue
+                self._expect = ""
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string, self._expect = False, _AFTER_STRING
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth, self._expect = self._depth + 1, _AFTER_BRACE
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = "".join(self._parts) + text[begin:position]
+                    self._parts = []
+                    try:
+                        value = _json_loads(candidate)
+                    except ValueError:
+                        text, position = candidate[1:] + text[position:], 0
+                        continue
+                    if isinstance(value, dict):
+                        found.append(value)
+        if self._depth:
+            self._parts.append(text[begin:])
+        self.objects.extend(found)
+        return found
+
+    def _restart(self, text: str, begin: int, position: int) -> str:
+        """Abandons the open candidate and returns the text to scan next, starting after its opening brace."""
+        candidate = "".join(self._parts) + text[begin:position]
+        self._parts = []
+        self._depth, self._expect, self._in_string, self._escaped = 0, "", False, False
+        return candidate[1:] + text[position:]
+
+    @property
+    def first(self) -> Optional[Dict[str, Any]]:
+        """The first complete object seen so far, if any."""
+        return self.objects[0] if self.objects else None
+
+
 class ResponseParser:
     """Parser for different LLM response formats."""
 
@@ -28,17 +131,46 @@ class ResponseParser:
     @staticmethod
     def extract_json(text: str) -> Optional[Dict]:
         """
-        Attempts to extract and parse a JSON object from a string.
+        Returns the first complete, valid JSON object in a string (ignoring
+        surrounding prose and code fences), or None if there is none.
         """
-        try:
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            if start >= 0 and end > start:
-                json_str = text[start:end]
-                return json.loads(json_str)
-        except json.JSONDecodeError:
+        extractor = StreamingJSONExtractor()
+        extractor.feed(text)
+        if extractor.first is None and "{" in text:
             logger.warning("Failed to parse JSON from response")
-        return None
+        return extractor.first
+
+    @staticmethod
+    def extract_all_json(text: str) -> List[Dict]:
+        """Returns every complete, valid top-level JSON object in a string, in order."""
+        extractor = StreamingJSONExtractor()
+        return extractor.feed(text)
+
+    @staticmethod
+    def _usage_dict(usage: Any) -> Dict[str, Any]:
+        """
+        Converts a provider usage object (namedtuple-like or pydantic) into a dict.
+        """
+        if usage is None:
+            return {}
+        if isinstance(usage, dict):
+            return dict(usage)
+        if hasattr(usage, "_asdict"):
+            return usage._asdict()
+        if hasattr(usage, "model_dump"):
+            return usage.model_dump()
+        return {}
+
+    @staticmethod
+    def parse(response: Any, provider: str) -> ParsedResponse:
+        """
+        Parses a response using the parser matching the given provider.
+        """
+        if provider == "openai":
+            return ResponseParser.parse_openai(response)
+        if provider == "anthropic":
+            return ResponseParser.parse_anthropic(response)
+        return ResponseParser.parse_local(response)
 
     @staticmethod
     def parse_openai(response: Any) -> ParsedResponse:
@@ -49,7 +181,7 @@ class ResponseParser:
             text = response.choices[0].message.content
             metadata = {
                 "finish_reason": response.choices[0].finish_reason,
-                "usage": response.usage._asdict() if hasattr(response, "usage") else {},
+                "usage": ResponseParser._usage_dict(getattr(response, "usage", None)),
                 "model": response.model
             }
             return ParsedResponse(
@@ -74,7 +206,9 @@ class ResponseParser:
                 "stop_reason": response.stop_reason,
                 "usage": {
                     "input_tokens": response.usage.input_tokens,
-                    "output_tokens": response.usage.output_tokens
+                    "output_tokens": response.usage.output_tokens,
+                    "cache_read_input_tokens": getattr(response.usage, "cache_read_input_tokens", None) or 0,
+                    "cache_creation_input_tokens": getattr(response.usage, "cache_creation_input_tokens", None) or 0
                 },
                 "model": response.model
             }
@@ -102,6 +236,15 @@ class ResponseParser:
                     "total_duration": response.get("total_duration", 0),
                     "load_duration": response.get("load_duration", 0)
                 }
+                # Optional server timings (nanoseconds) and token counts.
+                for key in ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration", "done_reason"):
+                    if key in response:
+                        metadata[key] = response[key]
+                if "prompt_eval_count" in response or "eval_count" in response:
+                    metadata["usage"] = {
+                        "input_tokens": response.get("prompt_eval_count", 0),
+                        "output_tokens": response.get("eval_count", 0)
+                    }
             else:
                 text = str(response)
                 metadata = {"model": "unknown"}
@@ -1,7 +1,339 @@
+import asyncio
 import time
 import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, Callable, Deque, Dict, Optional
+
+import httpx
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors.
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+# Statuses signalling the provider is saturated (rate limited or overloaded).
+OVERLOAD_STATUS_CODES = frozenset({429, 503, 529})
+# Rejected or unauthorized API keys.
+AUTH_STATUS_CODES = frozenset({401, 403})
+
+
+class RetryError(Exception):
+    """Raised when a retryable call still fails after all permitted attempts."""
+
+    def __init__(self, message: str, attempts: int, last_error: Optional[BaseException] = None):
+        super().__init__(message)
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+class CircuitOpenError(RetryError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Classifies an error as transient (retryable) or fatal.
+
+    Rate limits, overload and server errors, timeouts and connection failures
+    are retryable; any other HTTP status (bad request, auth, not found, ...) and
+    non-network exceptions are fatal and must not be retried.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    # SDK connection/timeout errors (openai.APIConnectionError, anthropic.APIConnectionError).
+    return any(cls.__name__ in ("APIConnectionError", "APITimeoutError") for cls in type(error).__mro__)
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """Returns True if the call failed without an HTTP response (timeout or connection failure)."""
+    return _status_code(error) is None and is_retryable(error)
+
+
+def is_overload(error: BaseException) -> bool:
+    """Returns True if the error is a rate-limit or overload response."""
+    return _status_code(error) in OVERLOAD_STATUS_CODES
+
+
+def is_auth_error(error: BaseException) -> bool:
+    """Returns True if the error is an authentication or permission rejection."""
+    return _status_code(error) in AUTH_STATUS_CODES
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Returns the server-requested delay from Retry-After / retry-after-ms headers, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    Run-wide cap on retries, shared by every call that uses it.
+
+    Retries are allowed while they stay below `min_retries` plus `ratio` times the
+    number of first attempts, so a provider outage cannot multiply the run's
+    traffic by the per-call retry count.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """Consumes one retry if the budget allows it."""
+        with self._lock:
+            if self.retries >= self.min_retries + self.ratio * self.requests:
+                self.exhausted += 1
+                return False
+            self.retries += 1
+            return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "retries": self.retries, "exhausted": self.exhausted}
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider whose recent failure rate is too high.
+
+    Outcomes of the last `window` attempts are tracked; once at least `min_calls`
+    were seen and the failure rate reaches `failure_threshold`, the breaker opens
+    and calls fail fast for `cooldown` seconds. After the cooldown one trial call
+    is let through (half-open): success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: float = 0.5, window: int = 20, min_calls: int = 10, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.trips = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns True if a call may be attempted now."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            if self.state == "half_open":
+                if success:
+                    self.state = "closed"
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self.trips += 1
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"state": self.state, "trips": self.trips}
+
+
+class RetryPolicy:
+    """
+    Retry policy for provider calls.
+
+    Only retryable errors (see `is_retryable`) are retried; fatal errors are
+    raised immediately. The delay before retry N is `initial_delay *
+    exponential_base ** (N - 1)` with jitter, capped at `max_delay`, unless the
+    server asked for a specific delay via Retry-After. An optional run-wide
+    `RetryBudget` and per-key `CircuitBreaker`s (one per provider) are shared by
+    every call made through the policy.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        initial_delay: float = 1.0,
+        exponential_base: float = 2.0,
+        max_delay: float = 60.0,
+        jitter: bool = True,
+        budget: Optional[RetryBudget] = None,
+        breaker_factory: Optional[Callable[[], CircuitBreaker]] = None,
+        sleep: Optional[Callable[[float], None]] = None,
+        retryable: Callable[[BaseException], bool] = is_retryable
+    ):
+        """
+        Args:
+            max_retries: Maximum retries per call (attempts = max_retries + 1).
+            initial_delay: Delay before the first retry (in seconds).
+            exponential_base: Growth factor of the delay per retry.
+            max_delay: Upper bound for any single delay, including Retry-After.
+            jitter: Randomize computed delays to spread out synchronized retries.
+            budget: Optional run-wide retry budget.
+            breaker_factory: Creates a circuit breaker per key; None disables breakers.
+            sleep: Blocking sleep function; defaults to time.sleep.
+            retryable: Decides which errors are retried (default: `is_retryable`).
+        """
+        self.max_retries = max_retries
+        self.initial_delay = initial_delay
+        self.exponential_base = exponential_base
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.budget = budget
+        self.breaker_factory = breaker_factory
+        self.sleep = sleep
+        self.retryable = retryable
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_routed_backend(self) -> "RetryPolicy":
+        """
+        Returns a policy for one backend of an LLMRouter: it shares this policy's
+        budget and backoff but only retries timeouts and connection failures in
+        place, and has no circuit breaker. Overload and server errors then reach
+        the router at once, which fails over and tracks backend health itself.
+        """
+        return RetryPolicy(
+            max_retries=self.max_retries,
+            initial_delay=self.initial_delay,
+            exponential_base=self.exponential_base,
+            max_delay=self.max_delay,
+            jitter=self.jitter,
+            budget=self.budget,
+            sleep=self.sleep,
+            retryable=is_transport_error
+        )
+
+    def breaker(self, key: str) -> Optional[CircuitBreaker]:
+        """Returns the circuit breaker for a key (e.g. a provider), if breakers are enabled."""
+        if self.breaker_factory is None:
+            return None
+        with self._lock:
+            if key not in self.breakers:
+                self.breakers[key] = self.breaker_factory()
+            return self.breakers[key]
+
+    def delay_for(self, retry_number: int, error: BaseException) -> float:
+        """Returns the delay in seconds before the given (1-based) retry."""
+        server_delay = retry_after_seconds(error)
+        if server_delay is not None:
+            return min(server_delay, self.max_delay)
+        delay = min(self.initial_delay * self.exponential_base ** (retry_number - 1), self.max_delay)
+        if self.jitter:
+            delay *= random.uniform(0.5, 1.0)
+        return delay
+
+    def _next_delay(self, attempt: int, error: Exception, breaker: Optional[CircuitBreaker]) -> float:
+        """Records a failed attempt and returns the delay before retrying, or raises."""
+        retryable = self.retryable(error)
+        if breaker is not None:
+            # Client errors (bad request, auth) say nothing about provider health.
+            breaker.record(not retryable)
+        if not retryable:
+            raise error
+        if attempt > self.max_retries:
+            raise RetryError(f"Maximum retries ({self.max_retries}) exceeded. Last error: {error}", attempt, error) from error
+        if self.budget is not None and not self.budget.try_spend():
+            raise RetryError(f"Retry budget exhausted. Last error: {error}", attempt, error) from error
+        return self.delay_for(attempt, error)
+
+    def _check_breaker(self, key: str, attempt: int, last_error: Optional[Exception]) -> Optional[CircuitBreaker]:
+        breaker = self.breaker(key)
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"Circuit breaker for '{key}' is open.", attempt, last_error) from last_error
+        return breaker
+
+    def call(self, func: Callable, *args, breaker_key: str = "default", **kwargs) -> Any:
+        """Calls `func(*args, **kwargs)`, retrying transient failures per this policy."""
+        if self.budget is not None:
+            self.budget.record_request()
+        attempt, last_error = 0, None
+        while True:
+            attempt += 1
+            breaker = self._check_breaker(breaker_key, attempt, last_error)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                last_error = e
+                (self.sleep or time.sleep)(self._next_delay(attempt, e, breaker))
+                continue
+            if breaker is not None:
+                breaker.record(True)
+            return result
+
+    async def acall(self, func: Callable, *args, breaker_key: str = "default", **kwargs) -> Any:
+        """Async counterpart of `call` for coroutine functions; waits with asyncio.sleep."""
+        if self.budget is not None:
+            self.budget.record_request()
+        attempt, last_error = 0, None
+        while True:
+            attempt += 1
+            breaker = self._check_breaker(breaker_key, attempt, last_error)
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                last_error = e
+                await asyncio.sleep(self._next_delay(attempt, e, breaker))
+                continue
+            if breaker is not None:
+                breaker.record(True)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns budget and breaker state for run telemetry."""
+        with self._lock:
+            breakers = {key: breaker.to_dict() for key, breaker in self.breakers.items()}
+        return {"budget": self.budget.to_dict() if self.budget else None, "circuit_breakers": breakers}
+
 
 def retry_with_exponential_backoff(
     func: Callable,
@@ -13,9 +345,12 @@ def retry_with_exponential_backoff(
     """
     Decorator for retrying a function with exponential backoff and optional jitter.
 
+    Only retryable errors are retried (see `RetryPolicy`); server-provided
+    Retry-After delays are honoured.
+
     Args:
         func: The function to be decorated.
-        initial_delay: Starting delay between retries (in seconds).
+        initial_delay: Delay before the first retry (in seconds).
         exponential_base: The base for the exponential backoff.
         max_retries: Maximum number of retry attempts.
         jitter: Whether to add random jitter to the delay.
@@ -23,19 +358,28 @@ def retry_with_exponential_backoff(
     Returns:
         The decorated function with retry logic.
     """
+    policy = RetryPolicy(max_retries=max_retries, initial_delay=initial_delay, exponential_base=exponential_base, jitter=jitter)
+
     @wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        num_retries = 0
-        delay = initial_delay
-        while True:
-            try:
-                return func(*args, **kwargs)
-            except Exception as e:
-                num_retries += 1
-                if num_retries > max_retries:
-                    raise Exception(f"Maximum retries ({max_retries}) exceeded. Last error: {e}")
-                delay *= exponential_base
-                if jitter:
-                    delay += random.uniform(0, 1)
-                time.sleep(delay)
+        return policy.call(func, *args, **kwargs)
+    return wrapper
+
+
+def async_retry_with_exponential_backoff(
+    func: Callable,
+    initial_delay: float = 1.0,
+    exponential_base: float = 2.0,
+    max_retries: int = 5,
+    jitter: bool = True
+) -> Callable:
+    """
+    Async counterpart of `retry_with_exponential_backoff` for coroutine functions.
+    Waits with `asyncio.sleep`, so a backing-off call does not block other requests.
+    """
+    policy = RetryPolicy(max_retries=max_retries, initial_delay=initial_delay, exponential_base=exponential_base, jitter=jitter)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs) -> Any:
+        return await policy.acall(func, *args, **kwargs)
     return wrapper
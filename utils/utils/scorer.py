@@ -1,5 +1,7 @@
 from typing import List
 from dataclasses import dataclass
+from collections import OrderedDict
+import threading
 import numpy as np
 from deepeval.metrics import (
     FactualConsistencyMetric, ContextualRelevancyMetric, ContextualPrecisionMetric,
@@ -14,14 +16,21 @@ import logging
 class EvaluationResult:
     score: float
     details: str = ""
+    metric_name: str = ""
 
 class Scorer:
     """
     Scorer class that provides individual evaluation methods for each metric,
     using DeepEval and other NLP tools. All original metric logic is preserved.
     """
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", cache_size: int = 4096):
         self.logger = logging.getLogger("scorer")
+        # Texts (contexts in particular) repeat across rows and metrics, so their
+        # embeddings and spaCy docs are computed once and reused.
+        self.cache_size = cache_size
+        self._embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._doc_cache: "OrderedDict[str, object]" = OrderedDict()
+        self._cache_lock = threading.Lock()
         self.embedding_model = SentenceTransformer(model_name)
         try:
             self.nlp = spacy.load("en_core_web_sm")
@@ -30,6 +39,35 @@ class Scorer:
             spacy.cli.download("en_core_web_sm")
             self.nlp = spacy.load("en_core_web_sm")
 
+    def _cached(self, cache: OrderedDict, text: str, compute):
+        with self._cache_lock:
+            if text in cache:
+                cache.move_to_end(text)
+                return cache[text]
+        value = compute(text)
+        with self._cache_lock:
+            cache[text] = value
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return value
+
+    def embed(self, text: str) -> np.ndarray:
+        """Returns the sentence embedding for a text, reusing previously computed embeddings."""
+        return self._cached(self._embedding_cache, text, lambda t: self.embedding_model.encode([t])[0])
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Returns embeddings for several texts, encoding the uncached ones in one batch."""
+        with self._cache_lock:
+            missing = list(dict.fromkeys(t for t in texts if t not in self._embedding_cache))
+        if missing:
+            for text, vector in zip(missing, self.embedding_model.encode(missing)):
+                self._cached(self._embedding_cache, text, lambda t, v=vector: v)
+        return np.stack([self.embed(t) for t in texts]) if texts else np.zeros((0, 0), dtype=np.float32)
+
+    def parse(self, text: str):
+        """Returns the spaCy doc for a text (sentences, entities), reusing previous parses."""
+        return self._cached(self._doc_cache, text, self.nlp)
+
     def evaluate_answer_relevance(self, answer: str, question: str) -> EvaluationResult:
         metric = AnswerRelevancyMetric()
         score = metric.measure(query=question, answer=answer)
@@ -142,8 +180,8 @@ class Scorer:
 
     def evaluate_embedding_similarity(self, text1: str, text2: str) -> EvaluationResult:
         try:
-            embedding1 = self.embedding_model.encode([text1])[0]
-            embedding2 = self.embedding_model.encode([text2])[0]
+            embedding1 = self.embed(text1)
+            embedding2 = self.embed(text2)
             sim = np.dot(embedding1, embedding2) / (np.linalg.norm(embedding1) * np.linalg.norm(embedding2))
             return EvaluationResult(score=sim, details="Embedding similarity (cosine).")
         except Exception as e:
@@ -152,7 +190,7 @@ class Scorer:
 
     def evaluate_redundancy(self, answer: str) -> EvaluationResult:
         try:
-            doc = self.nlp(answer)
+            doc = self.parse(answer)
             sentences = [sent.text.strip() for sent in doc.sents]
             redundancy = 0.0
             if len(sentences) > 1:
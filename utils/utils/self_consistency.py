@@ -0,0 +1,116 @@
+import math
+import statistics
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def t_quantile(p: float, df: int) -> float:
+    """
+    Approximate quantile of Student's t distribution (Cornish-Fisher expansion
+    around the normal quantile; within a few percent of the exact value for df >= 2).
+    """
+    z = statistics.NormalDist().inv_cdf(p)
+    return (
+        z
+        + (z ** 3 + z) / (4 * df)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+    )
+
+
+class SelfConsistency:
+    """
+    Self-consistency sampling policy for judge verdicts.
+
+    Each verdict is sampled (at a non-zero temperature) up to `max_samples`
+    times, `concurrency` samples at a time. Sampling stops early once at least
+    `min_samples` scores agree within `tolerance`, or once a sequential test is
+    confident: the confidence interval of the mean score is narrower than
+    ±`tolerance`, or lies entirely on one side of the metric's pass threshold.
+    The verdict's score is the mean of the samples, reported with their variance.
+    """
+
+    def __init__(
+        self,
+        max_samples: int = 5,
+        min_samples: int = 2,
+        tolerance: float = 0.1,
+        confidence: float = 0.95,
+        temperature: float = 0.7,
+        concurrency: int = 1,
+        thresholds: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            max_samples: Most samples drawn per verdict.
+            min_samples: Fewest samples before sampling may stop.
+            tolerance: Largest score spread (and confidence half-width) considered agreement.
+            confidence: Confidence level of the sequential test.
+            temperature: Sampling temperature of the judge calls.
+            concurrency: Samples issued at once; 1 samples sequentially, `max_samples`
+                issues them all at once (no early stopping savings, lowest latency).
+            thresholds: Optional pass threshold per metric; sampling stops once the
+                confidence interval is clearly above or below it.
+        """
+        if not 1 <= min_samples <= max_samples:
+            raise ValueError(f"Need 1 <= min_samples <= max_samples, got {min_samples} and {max_samples}.")
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.tolerance = tolerance
+        self.confidence = confidence
+        self.temperature = temperature
+        self.concurrency = max(1, int(concurrency))
+        self.thresholds = dict(thresholds or {})
+        self.verdicts = 0
+        self.samples = 0
+        self.early_stops = 0
+        self._lock = threading.Lock()
+
+    def round_size(self, drawn: int) -> int:
+        """Returns the number of samples to draw next (0 once `max_samples` have been drawn)."""
+        return max(0, min(self.concurrency, self.max_samples - drawn))
+
+    def converged(self, scores: Sequence[float], metric_name: Optional[str] = None) -> bool:
+        """Returns True if no more samples are needed for these scores."""
+        n = len(scores)
+        if n >= self.max_samples:
+            return True
+        if n < self.min_samples:
+            return False
+        if max(scores) - min(scores) <= self.tolerance:
+            return True
+        if n < 3:
+            return False
+        mean = statistics.fmean(scores)
+        half_width = t_quantile((1 + self.confidence) / 2, n - 1) * statistics.stdev(scores) / math.sqrt(n)
+        if half_width <= self.tolerance:
+            return True
+        threshold = self.thresholds.get(metric_name) if metric_name else None
+        return threshold is not None and abs(mean - threshold) > half_width
+
+    def aggregate(self, scores: Sequence[float]) -> Tuple[float, float]:
+        """Returns the mean score and the sample variance (0.0 for a single sample)."""
+        return statistics.fmean(scores), statistics.variance(scores) if len(scores) > 1 else 0.0
+
+    def record(self, samples: int) -> None:
+        """Records one aggregated verdict and the number of samples it took."""
+        with self._lock:
+            self.verdicts += 1
+            self.samples += samples
+            if samples < self.max_samples:
+                self.early_stops += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns sampling counters for run telemetry."""
+        with self._lock:
+            return {
+                "verdicts": self.verdicts,
+                "samples": self.samples,
+                "mean_samples": round(self.samples / self.verdicts, 3) if self.verdicts else 0.0,
+                "early_stops": self.early_stops,
+                "max_samples": self.max_samples
+            }
@@ -0,0 +1,102 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def normalize_payload(metric_name: str, data_point: Dict[str, Any], inputs: Sequence[str]) -> str:
+    """Builds the normalized (metric, inputs) text that is embedded for lookups."""
+    parts = [metric_name]
+    for name in inputs:
+        value = data_point.get(name)
+        if isinstance(value, (list, tuple)):
+            value = "\n".join(str(v) for v in value)
+        parts.append(f"{name}: {' '.join(str(value or '').lower().split())}")
+    return "\n".join(parts)
+
+
+class _MetricIndex:
+    """Growable matrix of unit-normalized embeddings with their verdicts."""
+
+    def __init__(self, dim: int, capacity: int = 256):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.verdicts: List[Dict[str, Any]] = []
+
+    def add(self, vector: np.ndarray, verdict: Dict[str, Any]) -> None:
+        size = len(self.verdicts)
+        if size == self.vectors.shape[0]:
+            self.vectors = np.vstack([self.vectors, np.zeros_like(self.vectors)])
+        self.vectors[size] = vector
+        self.verdicts.append(verdict)
+
+    def nearest(self, vector: np.ndarray) -> Tuple[int, float]:
+        size = len(self.verdicts)
+        similarities = self.vectors[:size] @ vector
+        best = int(np.argmax(similarities))
+        return best, float(similarities[best])
+
+
+class SemanticVerdictCache:
+    """
+    In-process semantic cache for judge verdicts.
+
+    The normalized (metric, answer, context, ...) payload is embedded and
+    compared by cosine similarity against previously judged payloads of the
+    same metric. A neighbour at or above `threshold` is treated as a hit and its
+    verdict is reused, so paraphrased or reformatted rows skip the judge call.
+    """
+
+    def __init__(self, embed_fn: Callable[[str], np.ndarray], threshold: float = 0.97, max_entries: int = 50_000):
+        """
+        Args:
+            embed_fn: Returns an embedding vector for a text (e.g. Scorer.embed).
+            threshold: Minimum cosine similarity for a hit.
+            max_entries: Per-metric cap; once reached new verdicts are not indexed.
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._indexes: Dict[str, _MetricIndex] = {}
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else None
+
+    def lookup(self, metric_name: str, payload: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Returns (verdict, similarity) of the nearest stored payload for the metric,
+        or None if there is no neighbour above the threshold.
+        """
+        vector = self._embed(payload)
+        with self._lock:
+            index = self._indexes.get(metric_name)
+            if vector is None or index is None or not index.verdicts:
+                self.misses += 1
+                return None
+            position, similarity = index.nearest(vector)
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(index.verdicts[position]), similarity
+
+    def add(self, metric_name: str, payload: str, verdict: Dict[str, Any]) -> None:
+        """Indexes a fresh judge verdict for later reuse."""
+        vector = self._embed(payload)
+        if vector is None:
+            return
+        with self._lock:
+            index = self._indexes.get(metric_name)
+            if index is None:
+                index = self._indexes[metric_name] = _MetricIndex(dim=vector.shape[0])
+            if len(index.verdicts) >= self.max_entries:
+                return
+            index.add(vector, dict(verdict))
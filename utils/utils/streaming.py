@@ -0,0 +1,74 @@
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .response_parser import ParsedResponse, ResponseParser
+
+# A provider stream yields (text delta, metadata update) pairs; either may be empty.
+StreamChunks = Iterator[Tuple[str, Dict[str, Any]]]
+
+
+class CompletionStream:
+    """
+    A streamed completion: iterating it yields text deltas as they arrive.
+
+    Metadata reported by the provider (usage, timings, finish reason) is merged
+    into `metadata` as the stream progresses; `time_to_first_token` (seconds) is
+    measured client-side. Closing the stream before it ends stops the generation
+    and closes the underlying HTTP response; `on_close` is then called once with
+    the stream (e.g. to record its usage).
+    """
+
+    def __init__(
+        self, chunks: StreamChunks, provider: str, model: str, on_close: Optional[Callable[["CompletionStream"], None]] = None
+    ):
+        self.provider = provider
+        self.model = model
+        self.metadata: Dict[str, Any] = {"model": model}
+        self.finished = False
+        self.stopped_early = False
+        self._chunks = chunks
+        self._on_close = on_close
+        self._parts: List[str] = []
+        self._start = time.perf_counter()
+
+    def __iter__(self) -> Iterator[str]:
+        for text, metadata in self._chunks:
+            if metadata:
+                self.metadata.update(metadata)
+            if text:
+                if not self._parts:
+                    self.metadata["time_to_first_token"] = time.perf_counter() - self._start
+                self._parts.append(text)
+                yield text
+        self.finished = True
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        return "".join(self._parts)
+
+    def close(self) -> None:
+        """Stops the stream; a stream closed before its end is marked `stopped_early`."""
+        if not self.finished:
+            self.stopped_early = True
+            self.metadata["stopped_early"] = True
+        self._chunks.close()
+        if self._on_close is not None:
+            on_close, self._on_close = self._on_close, None
+            on_close(self)
+
+    def __enter__(self) -> "CompletionStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def to_parsed(self, text: Optional[str] = None) -> ParsedResponse:
+        """Returns the received text and metadata as a ParsedResponse."""
+        return ParsedResponse(
+            text=ResponseParser.clean_text(self.text if text is None else text),
+            raw_response=None,
+            metadata=dict(self.metadata),
+            provider=self.provider,
+            model=self.metadata.get("model", self.model)
+        )
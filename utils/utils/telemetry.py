@@ -0,0 +1,98 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class MetricCostModel:
+    """
+    Per-task-type cost estimates (seconds) learned from observed durations.
+
+    Keys are metric names for single-row metric calls, "group:<name>" for
+    combined judge calls and "batch:<metric>" for cross-row judge batches.
+    Each estimate is an exponentially weighted moving average, so it adapts
+    to provider latency drifting between runs.
+    """
+
+    def __init__(self, costs: Optional[Dict[str, Dict[str, float]]] = None, alpha: float = 0.3, default_cost: float = 1.0):
+        """
+        Args:
+            costs: Previously learned costs, as produced by `to_dict`.
+            alpha: EWMA weight of a new observation.
+            default_cost: Estimate for task types never seen before. Unknown tasks
+                are assumed to be expensive so they are not left until last.
+        """
+        self.alpha = alpha
+        self.default_cost = default_cost
+        self._costs: Dict[str, Dict[str, float]] = {k: dict(v) for k, v in (costs or {}).items()}
+        self._lock = threading.Lock()
+
+    def estimate(self, key: str) -> float:
+        """Returns the expected duration in seconds of one task of the given type."""
+        entry = self._costs.get(key)
+        return entry["mean_seconds"] if entry else self.default_cost
+
+    def observe(self, key: str, seconds: float) -> None:
+        """Folds one observed task duration into the estimate."""
+        with self._lock:
+            entry = self._costs.get(key)
+            if entry is None:
+                self._costs[key] = {"mean_seconds": seconds, "samples": 1}
+            else:
+                entry["mean_seconds"] += self.alpha * (seconds - entry["mean_seconds"])
+                entry["samples"] += 1
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._costs.items()}
+
+
+class RunTelemetry:
+    """
+    Run-level telemetry persisted as 'run_telemetry.json' next to the results.
+    The metric cost model learned in one run seeds the scheduler of the next.
+    Other components add their own sections (e.g. concurrency limits, usage).
+    """
+
+    FILENAME = "run_telemetry.json"
+
+    def __init__(self, cost_model: Optional[MetricCostModel] = None, previous: Optional[Dict[str, Any]] = None):
+        self.cost_model = cost_model or MetricCostModel()
+        self.sections: Dict[str, Any] = {}
+        self.previous = previous or {}
+
+    @classmethod
+    def load(cls, output_dir: str) -> "RunTelemetry":
+        """Loads telemetry from a previous run in `output_dir`, or starts empty."""
+        path = Path(output_dir) / cls.FILENAME
+        if not path.is_file():
+            return cls()
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable telemetry file '{path}': {e}")
+            return cls()
+        return cls(MetricCostModel(costs=data.get("metric_costs", {})), previous=data)
+
+    def previous_section(self, name: str) -> Dict[str, Any]:
+        """Returns a section written by the previous run (empty if absent)."""
+        section = self.previous.get(name)
+        return section if isinstance(section, dict) else {}
+
+    def set_section(self, name: str, value: Any) -> None:
+        """Stores a named telemetry section to be written with the run."""
+        self.sections[name] = value
+
+    def save(self, output_dir: str) -> Path:
+        """Writes the telemetry file into `output_dir`."""
+        path = Path(output_dir) / self.FILENAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"metric_costs": self.cost_model.to_dict(), **self.sections}
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+        return path
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class Span:
+    """A single timed unit of work (a row, a metric call, an LLM request)."""
+
+    __slots__ = ("tracer", "name", "category", "args", "outcome", "_start_ns")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.outcome = "ok"
+        self._start_ns = 0
+
+    def set(self, **args: Any) -> None:
+        """Attaches extra arguments to the span (shown in the trace viewer)."""
+        self.args.update(args)
+
+    def __enter__(self) -> "Span":
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.outcome = f"error:{exc_type.__name__}"
+        self.tracer._record(self, self._start_ns, end_ns)
+        return False
+
+
+class _NullSpan:
+    """Shared no-op span handed out when tracing is disabled."""
+
+    __slots__ = ()
+    outcome = "ok"
+
+    def set(self, **args: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Records spans for rows, metric calls and LLM requests and exports them in
+    the Chrome trace-event format (viewable in Perfetto or chrome://tracing).
+    Every span carries its worker id, so idle workers and serialization points
+    show up as gaps and stacked lanes. When disabled, `span()` returns a shared
+    no-op object and nothing is allocated per call.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._events: List[Dict[str, Any]] = []
+        self._workers: Dict[int, int] = {}
+        self._worker_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def span(self, name: str, category: str = "evaluation", **args: Any):
+        """
+        Returns a context manager timing the enclosed block.
+
+        Args:
+            name: Span name, e.g. the metric name.
+            category: Trace category ("row", "metric", "llm", ...).
+            **args: Extra key/value pairs attached to the span.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def counter(self, name: str, **values: float) -> None:
+        """Records a counter sample (e.g. an in-flight limit) at the current time."""
+        if not self.enabled:
+            return
+        event = {
+            "name": name,
+            "ph": "C",
+            "ts": (time.perf_counter_ns() - self._origin_ns) / 1000.0,
+            "pid": self._pid,
+            "tid": self._worker_id(),
+            "args": values,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def async_span(self, name: str, category: str, start_ns: int, end_ns: int, span_id: int, **args: Any) -> None:
+        """
+        Records an already finished span that may overlap others on the same
+        lane (a Chrome async begin/end pair), e.g. a row whose metric tasks ran
+        on several workers. Times are `time.perf_counter_ns()` values.
+        """
+        if not self.enabled:
+            return
+        common = {"name": name, "cat": category, "id": span_id, "pid": self._pid, "tid": self._worker_id()}
+        begin = {**common, "ph": "b", "ts": (start_ns - self._origin_ns) / 1000.0, "args": args}
+        end = {**common, "ph": "e", "ts": (end_ns - self._origin_ns) / 1000.0}
+        with self._lock:
+            self._events.extend((begin, end))
+
+    def _worker_id(self) -> int:
+        ident = threading.get_ident()
+        worker_id = self._workers.get(ident)
+        if worker_id is None:
+            with self._lock:
+                worker_id = self._workers.setdefault(ident, len(self._workers))
+                self._worker_names[worker_id] = threading.current_thread().name
+        return worker_id
+
+    def _record(self, span: Span, start_ns: int, end_ns: int) -> None:
+        worker_id = self._worker_id()
+        args = dict(span.args)
+        args["outcome"] = span.outcome
+        args["worker"] = worker_id
+        event = {
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": (start_ns - self._origin_ns) / 1000.0,
+            "dur": (end_ns - start_ns) / 1000.0,
+            "pid": self._pid,
+            "tid": worker_id,
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        """A copy of the recorded trace events."""
+        with self._lock:
+            return list(self._events)
+
+    def export_chrome_trace(self, path: str) -> Optional[Path]:
+        """
+        Writes all recorded spans as a Chrome trace-event JSON file.
+
+        Returns:
+            The path of the written trace, or None if tracing is disabled.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": worker_id, "args": {"name": f"worker-{worker_id} ({name})"}}
+                for worker_id, name in self._worker_names.items()
+            ]
+            events = metadata + list(self._events)
+        out_path = Path(path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with out_path.open("w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        logger.info(f"Chrome trace with {len(events)} events written to '{out_path}'.")
+        return out_path
@@ -0,0 +1,327 @@
+import contextlib
+import contextvars
+import json
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Price of a prompt-cache write relative to plain input, unless a model sets 'cache_write_input_per_million'.
+CACHE_WRITE_PREMIUM = 1.25
+
+# The (rows, metrics) the current LLM call is made for; set by MetricsManager around each task.
+_SCOPE: contextvars.ContextVar[Tuple[Tuple[int, ...], Tuple[str, ...]]] = contextvars.ContextVar(
+    "llm_usage_scope", default=((), ())
+)
+
+
+@contextlib.contextmanager
+def usage_scope(rows: Sequence[int], metrics: Sequence[str]) -> Iterator[None]:
+    """Attributes the LLM calls made inside the block to the given rows and metrics."""
+    token = _SCOPE.set((tuple(rows), tuple(metrics)))
+    try:
+        yield
+    finally:
+        _SCOPE.reset(token)
+
+
+def token_counts(usage: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Returns (input tokens, output tokens) from an OpenAI-, Anthropic- or
+    Ollama-style usage dict. Input tokens include prompt-cache reads and writes
+    (which Anthropic reports separately from 'input_tokens').
+    """
+    usage = usage or {}
+    input_tokens = usage.get("input_tokens", usage.get("prompt_tokens", usage.get("prompt_eval_count"))) or 0
+    if "input_tokens" in usage:
+        input_tokens += (usage.get("cache_read_input_tokens") or 0) + (usage.get("cache_creation_input_tokens") or 0)
+    output_tokens = usage.get("output_tokens", usage.get("completion_tokens", usage.get("eval_count"))) or 0
+    return int(input_tokens), int(output_tokens)
+
+
+def cache_read_tokens(usage: Optional[Dict[str, Any]]) -> int:
+    """Returns the input tokens served from the provider's prompt cache (0 if not reported)."""
+    usage = usage or {}
+    if usage.get("cache_read_input_tokens") is not None:
+        return int(usage["cache_read_input_tokens"])
+    details = usage.get("prompt_tokens_details") or {}
+    return int(details.get("cached_tokens") or 0) if isinstance(details, dict) else 0
+
+
+def cache_write_tokens(usage: Optional[Dict[str, Any]]) -> int:
+    """Returns the input tokens written to the provider's prompt cache (Anthropic only; 0 if not reported)."""
+    return int((usage or {}).get("cache_creation_input_tokens") or 0)
+
+
+@dataclass
+class UsageRecord:
+    """One LLM call and the rows/metrics it was made for."""
+
+    provider: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    cost: float
+    latency: float
+    cached: bool
+    rows: Tuple[int, ...]
+    metrics: Tuple[str, ...]
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    estimated: bool = False
+
+
+def _first_rows(row_index: Optional[Sequence[int]]) -> Dict[int, int]:
+    """Maps each scored (deduplicated) row to the first original row it stands for."""
+    if row_index is None:
+        return {}
+    first: Dict[int, int] = {}
+    for original, position in enumerate(row_index):
+        first.setdefault(position, original)
+    return first
+
+
+def _empty_totals() -> Dict[str, float]:
+    return {
+        "calls": 0, "cached_calls": 0, "estimated_calls": 0, "input_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0,
+        "output_tokens": 0, "cost": 0.0, "latency_seconds": 0.0
+    }
+
+
+class UsageTracker:
+    """
+    Collects token usage, cost, latency and cache status of every LLM call.
+
+    Each call is attributed to the (row, metric) pairs of the enclosing
+    `usage_scope`; a batched or grouped call is split evenly over its pairs.
+    Cost comes from per-model prices in USD per million tokens; cache hits
+    keep their token counts but cost nothing. Input tokens read from or
+    written to the provider's prompt cache are counted separately and priced
+    at the model's cached input and cache write prices.
+    """
+
+    def __init__(self, pricing: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Args:
+            pricing: Per model, 'input_per_million', 'output_per_million' and optionally
+                'cached_input_per_million' (defaults to the input price) and
+                'cache_write_input_per_million' (defaults to 1.25x the input price,
+                Anthropic's premium for 5-minute cache writes) in USD.
+                A model without an exact entry uses the longest entry that prefixes
+                its name (so 'gpt-4o-mini' prices 'gpt-4o-mini-2024-07-18').
+        """
+        self.pricing = pricing or {}
+        self.records: List[UsageRecord] = []
+        self._lock = threading.Lock()
+
+    def price(self, model: str, input_tokens: int, output_tokens: int, cache_read: int = 0, cache_write: int = 0) -> float:
+        """
+        Returns the USD cost of a call, or 0.0 if the model has no price.
+        `cache_read` and `cache_write` are the parts of `input_tokens` read
+        from and written to the prompt cache.
+        """
+        prices = self.pricing.get(model)
+        if prices is None:
+            matches = [name for name in self.pricing if model.startswith(name)]
+            prices = self.pricing[max(matches, key=len)] if matches else {}
+        input_price = prices.get("input_per_million", 0.0)
+        cached_price = prices.get("cached_input_per_million", input_price)
+        write_price = prices.get("cache_write_input_per_million", input_price * CACHE_WRITE_PREMIUM)
+        return (
+            (input_tokens - cache_read - cache_write) * input_price + cache_read * cached_price
+            + cache_write * write_price + output_tokens * prices.get("output_per_million", 0.0)
+        ) / 1e6
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        usage: Optional[Dict[str, Any]],
+        latency: float,
+        cached: bool = False,
+        discount: float = 0.0,
+        estimated: bool = False
+    ) -> UsageRecord:
+        """
+        Records one LLM call against the current usage scope. `discount` is the
+        share of the list price not charged (e.g. 0.5 for batch API calls);
+        `estimated` marks token counts that were not reported by the provider.
+        """
+        input_tokens, output_tokens = token_counts(usage)
+        cache_read = cache_read_tokens(usage)
+        cache_write = cache_write_tokens(usage)
+        rows, metrics = _SCOPE.get()
+        record = UsageRecord(
+            provider=provider,
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost=0.0 if cached else self.price(model, input_tokens, output_tokens, cache_read, cache_write) * (1.0 - discount),
+            latency=latency,
+            cached=cached,
+            rows=rows,
+            metrics=metrics,
+            cache_read_tokens=cache_read,
+            cache_write_tokens=cache_write,
+            estimated=estimated,
+        )
+        with self._lock:
+            self.records.append(record)
+        return record
+
+    def per_task(self, row_index: Optional[Sequence[int]] = None) -> Dict[Tuple[int, str], Dict[str, Any]]:
+        """
+        Returns usage per (row, metric), splitting shared calls evenly.
+
+        Args:
+            row_index: Optional map from original rows to the deduplicated rows
+                the calls were made for (see `deduplicate_rows`). Usage is then
+                keyed by original row: the first row of each duplicate set carries
+                the cost, later duplicates get zero totals with `duplicate_of_row`.
+        """
+        tasks: Dict[Tuple[int, str], Dict[str, Any]] = defaultdict(_empty_totals)
+        for record in self._snapshot():
+            pairs = [(row, metric) for row in record.rows for metric in record.metrics]
+            for pair in pairs:
+                self._add(tasks[pair], record, 1.0 / len(pairs))
+        if row_index is None:
+            return {pair: self._rounded(totals) for pair, totals in tasks.items()}
+        by_row: Dict[int, List[str]] = defaultdict(list)
+        for row, metric in tasks:
+            by_row[row].append(metric)
+        first = _first_rows(row_index)
+        per_row: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for original, position in enumerate(row_index):
+            for metric in by_row.get(position, ()):
+                if original == first[position]:
+                    per_row[(original, metric)] = self._rounded(tasks[(position, metric)])
+                else:
+                    per_row[(original, metric)] = {**_empty_totals(), "duplicate_of_row": first[position]}
+        return per_row
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns run totals and breakdowns per metric, per provider/model and per provider."""
+        totals = _empty_totals()
+        by_metric: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+        by_model: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+        by_provider: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+        for record in self._snapshot():
+            self._add(totals, record)
+            self._add(by_model[f"{record.provider}/{record.model}"], record)
+            self._add(by_provider[record.provider], record)
+            metrics = record.metrics or ("(unattributed)",)
+            for metric in metrics:
+                self._add(by_metric[metric], record, 1.0 / len(metrics))
+        return {
+            "totals": self._rounded(totals),
+            "by_metric": {k: self._rounded(v) for k, v in sorted(by_metric.items())},
+            "by_model": {k: self._rounded(v) for k, v in sorted(by_model.items())},
+            "by_provider": {k: self._rounded(v) for k, v in sorted(by_provider.items())},
+        }
+
+    def save(self, output_dir: str, filename: str = "usage_report.json") -> Path:
+        """Writes the usage summary into `output_dir`."""
+        path = Path(output_dir) / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def save_to_db(
+        self,
+        db_path: str,
+        run_id: str,
+        model_name: str = "default",
+        dataset_name: str = "default",
+        row_index: Optional[Sequence[int]] = None
+    ) -> int:
+        """
+        Appends per (row, metric, provider, model) usage to the 'llm_usage' table
+        of the results database. Returns the number of rows written.
+
+        With `row_index` (original row -> deduplicated row), usage is written
+        under the first original row of each duplicate set, so the table's row
+        numbers match the dataset and each call is counted once.
+        """
+        first = _first_rows(row_index)
+        per_key: Dict[Tuple[int, str, str, str], Dict[str, Any]] = defaultdict(_empty_totals)
+        for record in self._snapshot():
+            rows = [first.get(row, row) for row in record.rows]
+            pairs = [(row, metric) for row in rows for metric in record.metrics] or [(-1, "(unattributed)")]
+            for row, metric in pairs:
+                self._add(per_key[(row, metric, record.provider, record.model)], record, 1.0 / len(pairs))
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                run_id TEXT,
+                model_name TEXT,
+                dataset_name TEXT,
+                row_index INTEGER,
+                metric_name TEXT,
+                provider TEXT,
+                llm_model TEXT,
+                calls REAL,
+                cached_calls REAL,
+                estimated_calls REAL,
+                input_tokens REAL,
+                cache_read_tokens REAL,
+                cache_write_tokens REAL,
+                output_tokens REAL,
+                cost REAL,
+                latency_seconds REAL
+            )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_usage)")}
+            for column in ("cache_read_tokens", "cache_write_tokens", "estimated_calls"):
+                if column not in columns:
+                    # Tables created before prompt-cache and estimate accounting lack the columns.
+                    conn.execute(f"ALTER TABLE llm_usage ADD COLUMN {column} REAL")
+            conn.executemany(
+                """
+                INSERT INTO llm_usage (
+                    run_id, model_name, dataset_name, row_index, metric_name, provider, llm_model,
+                    calls, cached_calls, estimated_calls, input_tokens, cache_read_tokens, cache_write_tokens,
+                    output_tokens, cost, latency_seconds
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (run_id, model_name, dataset_name, row, metric, provider, model,
+                     t["calls"], t["cached_calls"], t["estimated_calls"], t["input_tokens"], t["cache_read_tokens"], t["cache_write_tokens"],
+                     t["output_tokens"], t["cost"], t["latency_seconds"])
+                    for (row, metric, provider, model), t in per_key.items()
+                ],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(per_key)
+
+    def _snapshot(self) -> List[UsageRecord]:
+        with self._lock:
+            return list(self.records)
+
+    @staticmethod
+    def _add(totals: Dict[str, float], record: UsageRecord, share: float = 1.0) -> None:
+        totals["calls"] += share
+        totals["cached_calls"] += share if record.cached else 0.0
+        totals["estimated_calls"] += share if record.estimated else 0.0
+        totals["input_tokens"] += record.input_tokens * share
+        totals["cache_read_tokens"] += record.cache_read_tokens * share
+        totals["cache_write_tokens"] += record.cache_write_tokens * share
+        totals["output_tokens"] += record.output_tokens * share
+        totals["cost"] += record.cost * share
+        totals["latency_seconds"] += record.latency * share
+
+    @staticmethod
+    def _rounded(totals: Dict[str, float]) -> Dict[str, Any]:
+        return {key: round(value, 6 if key == "cost" else 4) for key, value in totals.items()}